@@ -34,10 +34,11 @@ from debate_app.agents.providers import (
     build_custom_model_spec,
     provider_has_key,
 )
+from debate_app import run_store
 from debate_app.core.prompts import (
-    ADVERSARIAL_SYSTEM_PROMPT,
+    ADVERSARIAL_TEMPLATE,
     DEBATER_SYSTEM_PROMPT,
-    FACT_CHECKER_SYSTEM_PROMPT,
+    FACT_CHECKER_TEMPLATE,
     JUDGE_SYSTEM_PROMPT,
 )
 
@@ -247,14 +248,6 @@ def trim_text(value: str, limit: int = 650) -> str:
     return text[:limit].rstrip() + " ..."
 
 
-def fill_prompt(template: str, replacements: Dict[str, object]) -> str:
-    """Safely replace only known placeholders and keep all other braces untouched."""
-    output = template
-    for key, value in replacements.items():
-        output = output.replace("{" + key + "}", str(value))
-    return output
-
-
 # ── SAM-AI UI Helpers ───────────────────────────────────────────────────────
 
 def _truth_badge(score: float, rating: str) -> str:
@@ -646,10 +639,7 @@ def run_debate(
                 "Verifier",
                 build_agent_from_spec(
                     spec,
-                    fill_prompt(
-                        FACT_CHECKER_SYSTEM_PROMPT,
-                        {"round_number": "{round}", "agent_name": "multiple agents"},
-                    ),
+                    FACT_CHECKER_TEMPLATE.render(round_number="{round}"),
                     keys,
                     "Verifier",
                     temp,
@@ -666,10 +656,7 @@ def run_debate(
                 "Stress Tester",
                 build_agent_from_spec(
                     spec,
-                    fill_prompt(
-                        ADVERSARIAL_SYSTEM_PROMPT,
-                        {"round_number": "{round}", "agent_name": "consensus", "topic": query},
-                    ),
+                    ADVERSARIAL_TEMPLATE.render(round_number="{round}"),
                     keys,
                     "Stress Tester",
                     temp,
@@ -680,7 +667,7 @@ def run_debate(
     judge_spec = specs["judge"]
     judge = build_agent_from_spec(
         judge_spec,
-        fill_prompt(JUDGE_SYSTEM_PROMPT, {"original_question": query, "n": rounds}),
+        JUDGE_SYSTEM_PROMPT,
         keys,
         "Synthesizer",
         max(temp - 0.05, 0.0),
@@ -769,7 +756,8 @@ def run_debate(
     if total_cost < budget and not fatal_failure:
         status.markdown("Synthesizer is generating final answer ...")
         judge_query = (
-            f"Original question: {query}\n\nCollaborative transcript:\n{context}\n\n"
+            f"Original question: {query}\nModels contributing: {len(roster)}\n\n"
+            f"Collaborative transcript:\n{context}\n\n"
             "Deliver one final answer with rationale, uncertainties, and practical next actions."
         )
         verdict = judge.generate_response(query=judge_query, context="")
@@ -996,6 +984,8 @@ def main() -> None:
                 consensus_threshold=float(st.session_state["consensus_threshold"]),
                 delay_seconds=float(st.session_state["delay_ms"]) / 1000.0,
             )
+            if st.session_state["run"]:
+                st.session_state["run"]["run_id"] = run_store.save(st.session_state["run"])
 
         run = normalize_run_payload(st.session_state.get("run"))
         st.session_state["run"] = run
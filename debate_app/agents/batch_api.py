@@ -0,0 +1,463 @@
+"""
+Provider batch APIs for non-interactive runs.
+
+OpenAI's Batch API and Anthropic's Message Batches API price calls at a
+discount (see the "batch" multiplier in `core.pricing`) in exchange for
+asynchronous completion. `ProviderBatches.wrap` swaps an `OpenAIAgent` or
+`AnthropicAgent` for a `BatchAPIAgent` whose calls go to a per-account
+`BatchCollector` instead of the realtime endpoint. The collector gathers calls
+from every debate running at the same time for `window_s`, submits them as one
+batch, and polls until the results arrive. Meanwhile each debate waits at
+its round barrier because its agent calls have not returned yet. It resumes
+as soon as the batch lands.
+
+Only worth it where latency does not matter (nightly `debate_app.batch` runs):
+a round takes as long as the provider needs to process the batch, which is up
+to 24 hours. Other providers keep their realtime calls.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..core.base import Agent, AgentResponse
+from ..core.pricing import estimate_cost
+from .providers import CACHE_CONTROL, AnthropicAgent, ModelSpec, OpenAIAgent, system_text, user_prompt
+
+BATCH_PROVIDERS = ("openai", "anthropic", "local")
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+ANTHROPIC_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+ANTHROPIC_MAX_TOKENS = 1024
+DEFAULT_WINDOW_S = 5.0
+DEFAULT_POLL_INTERVAL_S = 30.0
+DEFAULT_MAX_BATCH = 5000
+DEFAULT_TIMEOUT_S = 25 * 3600.0  # the providers' 24h completion window plus slack
+HTTP_TIMEOUT_S = 120.0
+
+
+class BatchAPIError(RuntimeError):
+    """A batch request to the provider failed."""
+
+
+class BatchFailed(BatchAPIError):
+    """The provider ended a batch without producing results."""
+
+
+@dataclass
+class BatchRequest:
+    custom_id: str
+    model: str
+    system_prompt: str
+    user_content: str
+    temperature: float
+
+
+@dataclass
+class BatchResult:
+    content: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0
+    error: Optional[str] = None
+    batch_id: str = ""
+
+
+def _http(method: str, url: str, headers: Dict[str, str], body: Optional[bytes] = None) -> bytes:
+    request = urllib.request.Request(url, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT_S) as response:
+            return response.read()
+    except urllib.error.HTTPError as exc:
+        detail = exc.read().decode("utf-8", "replace")[:300]
+        raise BatchAPIError(f"{method} {url} returned HTTP {exc.code}: {detail}") from exc
+    except (urllib.error.URLError, OSError) as exc:
+        raise BatchAPIError(f"{method} {url} failed: {exc}") from exc
+
+
+def _json_lines(data: bytes) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+class OpenAIBatchClient:
+    """Batch API client for OpenAI and OpenAI-compatible servers: upload JSONL, create, poll, download."""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL", "") or OPENAI_BASE_URL).rstrip("/")
+
+    def _headers(self, content_type: str = "application/json") -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": content_type}
+
+    def submit(self, requests: Sequence[BatchRequest]) -> str:
+        lines = "".join(
+            json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": request.model,
+                    "temperature": request.temperature,
+                    "messages": [
+                        {"role": "system", "content": request.system_prompt},
+                        {"role": "user", "content": request.user_content},
+                    ],
+                },
+            }) + "\n"
+            for request in requests
+        )
+        boundary = uuid.uuid4().hex
+        form = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="purpose"\r\n\r\nbatch\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="batch.jsonl"\r\n'
+            f"Content-Type: application/jsonl\r\n\r\n{lines}\r\n--{boundary}--\r\n"
+        ).encode("utf-8")
+        uploaded = json.loads(_http("POST", f"{self.base_url}/files", self._headers(f"multipart/form-data; boundary={boundary}"), form))
+        created = json.loads(_http("POST", f"{self.base_url}/batches", self._headers(), json.dumps({
+            "input_file_id": uploaded["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        }).encode("utf-8")))
+        return created["id"]
+
+    def poll(self, batch_id: str) -> Optional[Dict[str, BatchResult]]:
+        """Results by custom_id once the batch has ended, else None."""
+        batch = json.loads(_http("GET", f"{self.base_url}/batches/{batch_id}", self._headers()))
+        status = batch.get("status")
+        if status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return None
+        results: Dict[str, BatchResult] = {}
+        for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+            if file_id:
+                for line in _json_lines(_http("GET", f"{self.base_url}/files/{file_id}/content", self._headers())):
+                    results[line["custom_id"]] = self._result(line)
+        if not results and status != "completed":
+            errors = (batch.get("errors") or {}).get("data") or []
+            raise BatchFailed(f"Batch {batch_id} {status}: {errors[0].get('message') if errors else 'no results'}")
+        return results
+
+    @staticmethod
+    def _result(line: Dict[str, Any]) -> BatchResult:
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            error = line.get("error") or body.get("error") or {}
+            return BatchResult(error=f"HTTP {response.get('status_code')}: {error.get('message', error)}")
+        usage = body.get("usage") or {}
+        message = ((body.get("choices") or [{}])[0]).get("message") or {}
+        return BatchResult(
+            content=message.get("content") or "",
+            input_tokens=int(usage.get("prompt_tokens") or 0),
+            output_tokens=int(usage.get("completion_tokens") or 0),
+            cached_input_tokens=int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0),
+        )
+
+
+class AnthropicBatchClient:
+    """Message Batches API client: create with inline requests, poll, download the results JSONL."""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("ANTHROPIC_BASE_URL", "") or ANTHROPIC_BASE_URL).rstrip("/")
+
+    def _headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_key, "anthropic-version": ANTHROPIC_VERSION, "Content-Type": "application/json"}
+
+    def submit(self, requests: Sequence[BatchRequest]) -> str:
+        body = {"requests": [
+            {
+                "custom_id": request.custom_id,
+                "params": {
+                    "model": request.model,
+                    "max_tokens": ANTHROPIC_MAX_TOKENS,
+                    "temperature": request.temperature,
+                    "system": [{"type": "text", "text": request.system_prompt, "cache_control": CACHE_CONTROL}],
+                    "messages": [{"role": "user", "content": request.user_content}],
+                },
+            }
+            for request in requests
+        ]}
+        created = json.loads(_http("POST", f"{self.base_url}/v1/messages/batches", self._headers(), json.dumps(body).encode("utf-8")))
+        return created["id"]
+
+    def poll(self, batch_id: str) -> Optional[Dict[str, BatchResult]]:
+        batch = json.loads(_http("GET", f"{self.base_url}/v1/messages/batches/{batch_id}", self._headers()))
+        if batch.get("processing_status") != "ended":
+            return None
+        results_url = batch.get("results_url") or f"{self.base_url}/v1/messages/batches/{batch_id}/results"
+        return {line["custom_id"]: self._result(line) for line in _json_lines(_http("GET", results_url, self._headers()))}
+
+    @staticmethod
+    def _result(line: Dict[str, Any]) -> BatchResult:
+        result = line.get("result") or {}
+        if result.get("type") != "succeeded":
+            error = (result.get("error") or {}).get("error") or result.get("error") or {}
+            return BatchResult(error=f"{result.get('type', 'unknown')}: {error.get('message', '') if isinstance(error, dict) else error}")
+        message = result.get("message") or {}
+        usage = message.get("usage") or {}
+        text = "".join(block.get("text", "") for block in message.get("content") or [] if block.get("type") == "text")
+        cache_read = int(usage.get("cache_read_input_tokens") or 0)
+        cache_write = int(usage.get("cache_creation_input_tokens") or 0)
+        return BatchResult(
+            content=text,
+            # Anthropic's input_tokens excludes cache reads and writes.
+            input_tokens=int(usage.get("input_tokens") or 0) + cache_read + cache_write,
+            output_tokens=int(usage.get("output_tokens") or 0),
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write,
+        )
+
+
+@dataclass
+class _Submitted:
+    batch_id: str
+    futures: Dict[str, Future]
+    submitted_at: float
+    next_poll: float
+
+
+class BatchCollector:
+    """
+    Gathers calls for one provider account into batches and resolves each call's
+    future when its batch ends. One background thread submits and polls.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        window_s: float = DEFAULT_WINDOW_S,
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        timeout_s: float = DEFAULT_TIMEOUT_S,
+    ):
+        self.client = client
+        self.window_s = max(0.0, float(window_s))
+        self.poll_interval_s = max(0.01, float(poll_interval_s))
+        self.max_batch = max(1, int(max_batch))
+        self.timeout_s = float(timeout_s)
+        self.batches = 0
+        self.requests = 0
+        self.failed_batches = 0
+        self._pending: List[Tuple[BatchRequest, Future]] = []
+        self._first_pending_at: Optional[float] = None
+        self._in_flight: List[_Submitted] = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name="provider-batch", daemon=True)
+        self._thread.start()
+
+    def call(self, request: BatchRequest) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise BatchAPIError("Batch collector is closed.")
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((request, future))
+            self._cond.notify_all()
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """Submit what is pending; with `wait`, block until every batch has been resolved."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            self._thread.join()
+
+    def _next_wake(self, now: float) -> Optional[float]:
+        deadlines = [submitted.next_poll for submitted in self._in_flight]
+        if self._pending:
+            full = len(self._pending) >= self.max_batch or self._closed
+            deadlines.append(now if full else self._first_pending_at + self.window_s)
+        return min(deadlines) - now if deadlines else None
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._closed and not self._pending and not self._in_flight:
+                        return
+                    wait_s = self._next_wake(now)
+                    if wait_s is not None and wait_s <= 0:
+                        break
+                    self._cond.wait(wait_s)
+                flush: List[Tuple[BatchRequest, Future]] = []
+                if self._pending and (
+                    self._closed or len(self._pending) >= self.max_batch or now >= self._first_pending_at + self.window_s
+                ):
+                    flush, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch:]
+                    self._first_pending_at = now if self._pending else None
+                due = [submitted for submitted in self._in_flight if submitted.next_poll <= now]
+            if flush:
+                self._submit(flush)
+            for submitted in due:
+                self._poll(submitted)
+
+    def _submit(self, calls: List[Tuple[BatchRequest, Future]]) -> None:
+        try:
+            batch_id = self.client.submit([request for request, _ in calls])
+        except Exception as exc:
+            self.failed_batches += 1
+            for _, future in calls:
+                future.set_result(BatchResult(error=f"batch submission failed ({exc})"))
+            return
+        now = time.monotonic()
+        with self._cond:
+            self.batches += 1
+            self.requests += len(calls)
+            self._in_flight.append(_Submitted(
+                batch_id=batch_id,
+                futures={request.custom_id: future for request, future in calls},
+                submitted_at=now,
+                next_poll=now + self.poll_interval_s,
+            ))
+
+    def _poll(self, submitted: _Submitted) -> None:
+        error = None
+        try:
+            results = self.client.poll(submitted.batch_id)
+        except BatchFailed as exc:
+            results, error = {}, str(exc)
+        except Exception as exc:
+            # Transient polling errors are retried until the batch times out.
+            results, error = None, str(exc)
+        now = time.monotonic()
+        if results is None and now - submitted.submitted_at < self.timeout_s:
+            submitted.next_poll = now + self.poll_interval_s
+            return
+        with self._cond:
+            self._in_flight.remove(submitted)
+        missing = "missing from batch output"
+        if results is None or error:
+            self.failed_batches += 1
+            missing = error or f"batch {submitted.batch_id} had no results after {self.timeout_s:.0f}s"
+        for custom_id, future in submitted.futures.items():
+            result = (results or {}).get(custom_id) or BatchResult(error=missing)
+            future.set_result(replace(result, batch_id=submitted.batch_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "failed_batches": self.failed_batches,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+        }
+
+
+class BatchAPIAgent(Agent):
+    """Sends `agent`'s calls through a `BatchCollector` and prices them at the batch rate."""
+
+    def __init__(self, agent: Agent, collector: BatchCollector):
+        super().__init__(agent.name, getattr(agent, "description", ""), agent.system_prompt, getattr(agent, "model", None))
+        self.agent = agent
+        self.collector = collector
+        self.model_name = agent.model_name
+
+    def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
+        request = BatchRequest(
+            custom_id=f"call-{uuid.uuid4().hex}",
+            model=self.agent.model_name,
+            system_prompt=system_text(self.agent.system_prompt),
+            user_content=user_prompt(query, context),
+            temperature=self.agent.temperature,
+        )
+        result = self.collector.call(request).result()
+        if result.error:
+            return AgentResponse(content=f"Error: {result.error}", confidence=0.0, model_name=self.model_name)
+        # The wrapped agent's own finaliser keeps confidence and token accounting
+        # identical to realtime calls; only the price changes.
+        message = SimpleNamespace(
+            content=result.content,
+            response_metadata={},
+            usage_metadata={
+                "input_tokens": result.input_tokens,
+                "output_tokens": result.output_tokens,
+                "total_tokens": result.input_tokens + result.output_tokens,
+                "input_token_details": {
+                    "cache_read": result.cached_input_tokens,
+                    "cache_creation": result.cache_write_tokens,
+                },
+            },
+        )
+        response = self.agent._finalize_response(message, [request.system_prompt, request.user_content])
+        usage = response.token_usage
+        return replace(
+            response,
+            cost=estimate_cost(
+                self.model_name, usage["input"], usage["output"], batch=True,
+                cached_input_tokens=usage.get("cached_input", 0), cache_write_tokens=usage.get("cache_write", 0),
+            ),
+            metadata={"batch_id": result.batch_id},
+        )
+
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        return self.agent.coalesce_key(query, context)
+
+    @property
+    def call_timeout_s(self) -> float:
+        """How long a call may wait for its batch; callers sharing it wait as long."""
+        return self.collector.window_s + self.collector.timeout_s + self.collector.poll_interval_s
+
+
+class ProviderBatches:
+    """One `BatchCollector` per provider account, shared by every debate of a batch run."""
+
+    def __init__(
+        self,
+        window_s: float = DEFAULT_WINDOW_S,
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        timeout_s: float = DEFAULT_TIMEOUT_S,
+        anthropic_base_url: Optional[str] = None,
+    ):
+        self.settings = {
+            "window_s": window_s,
+            "poll_interval_s": poll_interval_s,
+            "max_batch": max_batch,
+            "timeout_s": timeout_s,
+        }
+        self.anthropic_base_url = anthropic_base_url
+        self._collectors: Dict[tuple, BatchCollector] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, agent: Agent, spec: ModelSpec) -> Optional[Agent]:
+        """A `BatchAPIAgent` for agents whose provider has a batch API, else None."""
+        if spec.provider not in BATCH_PROVIDERS or not getattr(agent, "api_key", ""):
+            return None
+        if isinstance(agent, OpenAIAgent):
+            account = ("openai", agent.base_url or "", agent.api_key)
+            factory = lambda: OpenAIBatchClient(agent.api_key, agent.base_url)
+        elif isinstance(agent, AnthropicAgent):
+            account = ("anthropic", self.anthropic_base_url or "", agent.api_key)
+            factory = lambda: AnthropicBatchClient(agent.api_key, self.anthropic_base_url)
+        else:
+            return None
+        with self._lock:
+            collector = self._collectors.get(account)
+            if collector is None:
+                collector = self._collectors[account] = BatchCollector(factory(), **self.settings)
+        return BatchAPIAgent(agent, collector)
+
+    def close(self) -> None:
+        with self._lock:
+            collectors = list(self._collectors.values())
+        for collector in collectors:
+            collector.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._collectors.items())
+        return {f"{provider}@{base_url or 'default'}": collector.stats() for (provider, base_url, _), collector in items}
@@ -0,0 +1,198 @@
+"""
+Single-flight coalescing of identical in-flight provider calls.
+
+When several debates send the same request at the same moment (a popular preset
+on a popular query: round 1 has no context, so the prompts are byte-identical),
+only the first caller (the leader) goes upstream. Callers arriving while it is
+in flight (followers) replay the leader's deltas as they arrive and receive the
+same final response. Nothing is kept once the call finishes, so this is not a
+cache: a later identical call goes upstream again.
+
+Identity comes from `Agent.coalesce_key`, which covers the agent's roster slot
+name, model, system prompt, messages, temperature and a hash of the
+credentials. The slot name keeps contributors of one debate that repeat a model
+independent; the same slot in concurrent debates shares. Agents returning None
+(replays, rate-limited batch wrappers without a key) never coalesce. The
+upstream cost is split evenly across everyone who shared the call, and each
+response carries `metadata["coalesced"]` with the share count, whether it led,
+and the full upstream cost. Set SYNAPSE_COALESCE=0 to disable.
+
+A follower gives up on a leader that goes quiet: no new delta for the leader's
+own call bound. That is the agent's `call_timeout_s` when it has one (batch-API
+agents wait for the provider's completion window) and CALL_TIMEOUT_S
+otherwise. The clock restarts with every delta, so a slow but live stream is
+followed to the end. A follower that gives up leaves the flight (it no longer
+takes a share of the cost) and makes its own call, or, if it already replayed
+some deltas, ends with an error response.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Union
+
+from ..core.base import Agent, AgentResponse
+from .. import metrics
+
+COALESCE_ENV = "SYNAPSE_COALESCE"
+CALL_TIMEOUT_S = 60.0
+
+Item = Union[str, AgentResponse]
+
+
+class _Flight:
+    """One upstream call and the deltas it has produced so far."""
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self.deltas: List[str] = []
+        self.done = False
+        self.result: Optional[AgentResponse] = None
+        self.error: Optional[BaseException] = None
+        self.sharers = 1
+        self.changed = threading.Condition()
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by `Agent.coalesce_key`."""
+
+    def __init__(self, enabled: bool = True, timeout: float = CALL_TIMEOUT_S):
+        self.enabled = enabled
+        self.timeout = timeout
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self, key: Hashable, produce: Callable[[], Iterator[Item]], timeout: Optional[float] = None,
+    ) -> Iterator[Item]:
+        """
+        Yield the deltas and final response of `produce()`, sharing it with
+        concurrent callers of `key`. `timeout` bounds the call without progress
+        (default: the registry's timeout); the leader's bound is the one followers use.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(timeout or self.timeout)
+                self.leaders += 1
+            else:
+                flight.sharers += 1
+                self.followers += 1
+        if leader:
+            return self._lead(key, flight, produce)
+        metrics.CACHE_HITS.inc(cache="single_flight")
+        return self._follow(flight, produce)
+
+    def _lead(self, key: Hashable, flight: _Flight, produce: Callable[[], Iterator[Item]]) -> Iterator[Item]:
+        try:
+            for item in produce():
+                if isinstance(item, AgentResponse):
+                    flight.result = item
+                    continue
+                with flight.changed:
+                    flight.deltas.append(item)
+                    flight.changed.notify_all()
+                yield item
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            # Unregister before publishing so late arrivals start a fresh flight
+            # and the share count is final when followers read it.
+            with self._lock:
+                self._flights.pop(key, None)
+            with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+        if flight.result is not None:
+            yield _share(flight, leader=True)
+
+    def _follow(self, flight: _Flight, produce: Callable[[], Iterator[Item]]) -> Iterator[Item]:
+        deadline = time.monotonic() + flight.timeout
+        sent = 0
+        while True:
+            with flight.changed:
+                while sent == len(flight.deltas) and not flight.done:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    flight.changed.wait(remaining)
+                pending = flight.deltas[sent:]
+                finished = flight.done
+                if not pending and not finished:
+                    # Timed out on a hung leader: leave before the share count is read.
+                    flight.sharers -= 1
+            if not pending and not finished:
+                yield from self._abandon(flight, sent, produce)
+                return
+            for delta in pending:
+                yield delta
+            sent += len(pending)
+            # The leader is alive: wait its full bound again for the next delta.
+            deadline = time.monotonic() + flight.timeout
+            if finished and sent == len(flight.deltas):
+                break
+        if flight.error is not None:
+            raise flight.error
+        if flight.result is not None:
+            yield _share(flight, leader=False)
+
+    def _abandon(self, flight: _Flight, sent: int, produce: Callable[[], Iterator[Item]]) -> Iterator[Item]:
+        self.timeouts += 1
+        if sent == 0:
+            yield from produce()
+            return
+        yield AgentResponse(
+            content=f"Error: shared provider call timed out after {flight.timeout:g}s without progress.", confidence=0.0,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "timeouts": self.timeouts,
+        }
+
+
+def _share(flight: _Flight, leader: bool) -> AgentResponse:
+    """The flight's response with this caller's share of the cost (unchanged if nobody joined)."""
+    result = flight.result
+    if flight.sharers == 1:
+        return result
+    metadata = dict(result.metadata)
+    metadata["coalesced"] = {"shared_by": flight.sharers, "leader": leader, "upstream_cost": result.cost}
+    return replace(
+        result,
+        cost=result.cost / flight.sharers,
+        token_usage=dict(result.token_usage),
+        metadata=metadata,
+    )
+
+
+def generate(
+    agent: Agent,
+    query: str,
+    context: Optional[str],
+    streaming: bool,
+    coalesce: bool = True,
+) -> Iterator[Item]:
+    """Call `agent` (streamed or blocking), coalescing with identical in-flight calls when allowed."""
+    if streaming:
+        produce = lambda: agent.generate_response_stream(query=query, context=context)
+    else:
+        produce = lambda: iter([agent.generate_response(query=query, context=context)])
+    key = agent.coalesce_key(query, context) if coalesce and FLIGHTS.enabled else None
+    if key is None:
+        return produce()
+    return FLIGHTS.run(key, produce, getattr(agent, "call_timeout_s", None))
+
+
+FLIGHTS = SingleFlight(enabled=os.getenv(COALESCE_ENV, "1").strip().lower() not in ("0", "false", "no", "off"))
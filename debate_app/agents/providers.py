@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import math
 import os
 import random
+import re
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from ..core.base import Agent, AgentResponse
 from ..core.pricing import estimate_cost
@@ -14,6 +20,7 @@ PROVIDER_LABELS = {
     "anthropic": "Anthropic",
     "openrouter": "OpenRouter",
     "grok": "xAI (Grok)",
+    "local": "Local (OpenAI-compatible)",
     "mock": "Mock",
 }
 
@@ -23,9 +30,13 @@ PROVIDER_ENV_KEYS = {
     "anthropic": "ANTHROPIC_API_KEY",
     "openrouter": "OPENROUTER_API_KEY",
     "grok": "XAI_API_KEY",
+    "local": "LOCAL_OPENAI_API_KEY",
     "mock": "",
 }
 
+LOCAL_BASE_URL_ENV = "LOCAL_OPENAI_BASE_URL"
+DEFAULT_LOCAL_BASE_URL = "http://127.0.0.1:8089/v1"
+
 
 @dataclass(frozen=True)
 class ModelSpec:
@@ -102,6 +113,12 @@ MODEL_CATALOG: List[ModelSpec] = [
         model_id="deepseek/deepseek-chat",
         role_hints=("debater", "fact_checker", "adversarial"),
     ),
+    ModelSpec(
+        label="Local Stand-in",
+        provider="local",
+        model_id="local-standin",
+        role_hints=("debater", "judge", "fact_checker", "adversarial"),
+    ),
     ModelSpec(
         label="Mock Skeptic",
         provider="mock",
@@ -148,6 +165,7 @@ def normalize_provider(provider: str) -> str:
         "openrouter": "openrouter",
         "grok": "grok",
         "xai": "grok",
+        "local": "local",
         "mock": "mock",
     }
     return aliases.get(normalized, normalized)
@@ -211,7 +229,7 @@ def resolve_provider_key(provider: str, explicit_keys: Optional[Dict[str, str]]
 
 
 def provider_has_key(provider: str, explicit_keys: Optional[Dict[str, str]] = None) -> bool:
-    if normalize_provider(provider) == "mock":
+    if normalize_provider(provider) in ("mock", "local"):
         return True
     return bool(resolve_provider_key(provider, explicit_keys))
 
@@ -248,30 +266,110 @@ def _metadata_dict(response: Any) -> Dict[str, Any]:
     return {}
 
 
+def _usage_metadata(response: Any) -> Dict[str, Any]:
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        return usage
+    return {}
+
+
+def _cache_read_tokens(streamed: Dict[str, Any]) -> int:
+    """Prompt tokens served from the provider's prompt cache, from LangChain usage metadata."""
+    return _to_int((streamed.get("input_token_details") or {}).get("cache_read"))
+
+
 def _response_text(response: Any) -> str:
     content = getattr(response, "content", "")
     return _coerce_content(content)
 
 
-def _build_messages(system_prompt: str, query: str, context: Optional[str]) -> List[object]:
-    rolling_context = context.strip() if context else "No previous context."
-    content = (
-        f"Original Question: {query}\n\n"
-        f"Context from previous debate rounds:\n{rolling_context}\n\n"
-        "Respond with your best current answer. If context exists, critique and improve previous arguments."
-    )
+def _stream_agent_response(agent: Any, messages: List[object]) -> Iterator[Union[str, AgentResponse]]:
+    """Stream ``agent.model`` with LangChain ``.stream()`` and finish with ``agent._finalize_response``.
+
+    Chunks are summed into one aggregated message so the final response carries the
+    same usage metadata a blocking ``invoke`` would have returned.
+    """
+    aggregate = None
+    try:
+        for chunk in agent.model.stream(messages):
+            aggregate = chunk if aggregate is None else aggregate + chunk
+            delta = _coerce_content(getattr(chunk, "content", ""))
+            if delta:
+                yield delta
+        yield agent._finalize_response(aggregate, messages)
+    except Exception as exc:
+        yield AgentResponse(content=f"Error: {exc}", confidence=0.0, model_name=agent.model_name)
+
+
+def _upstream_key(agent: Any, query: str, context: Optional[str], *extra: object) -> Optional[tuple]:
+    """
+    Coalescing key for a hosted model call; the API key is hashed so calls never
+    share across accounts. The agent name (its roster slot) is part of the key, so
+    contributors of one debate that repeat a model stay independent samples; only
+    the same slot in concurrent runs shares.
+    """
+    if not agent.model:
+        return None
+    account = hashlib.sha256(agent.api_key.encode("utf-8")).hexdigest()[:16]
+    return (type(agent).__name__, agent.name, agent.model_name, agent.temperature, account,
+            agent.system_prompt, query, context or "", *extra)
+
+
+RESPONSE_INSTRUCTION = (
+    "Respond with your best current answer. If context exists, critique and improve previous arguments."
+)
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def system_text(system_prompt: str) -> str:
+    """The system turn: the agent's static prompt plus the static response instruction."""
+    return f"{(system_prompt or 'You are a helpful assistant.').rstrip()}\n\n{RESPONSE_INSTRUCTION}"
+
+
+def prompt_blocks(query: str, context: Optional[str]) -> List[str]:
+    """
+    The user turn split at round boundaries. The rolling context only ever
+    appends rounds, so every block but the last is byte-identical to the
+    previous round's call: a stable prefix providers can cache. Blocks after
+    the first carry their leading separator so earlier blocks never change.
+    """
+    rolling_context = context.strip() if context else ""
+    if not rolling_context:
+        return [f"Original Question: {query}\n\nContext from previous debate rounds:\nNo previous context."]
+    rounds = re.split(r"\n\n(?=Round \d+\n)", rolling_context)
+    return [
+        f"Original Question: {query}",
+        f"\n\nContext from previous debate rounds:\n{rounds[0]}",
+        *(f"\n\n{block}" for block in rounds[1:]),
+    ]
+
+
+def user_prompt(query: str, context: Optional[str]) -> str:
+    """The user turn every hosted provider receives for (query, rolling context)."""
+    return "".join(prompt_blocks(query, context))
+
+
+def _build_messages(
+    system_prompt: str, query: str, context: Optional[str], cache_control: bool = False
+) -> List[object]:
+    """
+    System turn first, then the question, then the growing context, so the
+    static part leads every request. `cache_control` adds Anthropic cache
+    breakpoints after the system prompt and after the newest round.
+    """
+    system: Union[str, List[Dict[str, Any]]] = system_text(system_prompt)
+    blocks = prompt_blocks(query, context)
+    content: Union[str, List[Dict[str, Any]]] = "".join(blocks)
+    if cache_control:
+        system = [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+        content = [{"type": "text", "text": block} for block in blocks]
+        content[-1]["cache_control"] = CACHE_CONTROL
     try:
         from langchain_core.messages import HumanMessage, SystemMessage
 
-        return [
-            SystemMessage(content=system_prompt or "You are a helpful assistant."),
-            HumanMessage(content=content),
-        ]
+        return [SystemMessage(content=system), HumanMessage(content=content)]
     except Exception:
-        return [
-            {"role": "system", "content": system_prompt or "You are a helpful assistant."},
-            {"role": "user", "content": content},
-        ]
+        return [{"role": "system", "content": system}, {"role": "user", "content": content}]
 
 
 class OpenAIAgent(Agent):
@@ -288,11 +386,17 @@ class OpenAIAgent(Agent):
         self.model_name = model_name
         self.api_key = (api_key or os.getenv("OPENAI_API_KEY", "")).strip()
         self.temperature = temperature
+        self.base_url = base_url
         self.init_error: Optional[str] = None
         if self.api_key:
             try:
                 from langchain_openai import ChatOpenAI
-                kwargs = {"model": model_name, "api_key": self.api_key, "temperature": temperature}
+                kwargs = {
+                    "model": model_name,
+                    "api_key": self.api_key,
+                    "temperature": temperature,
+                    "stream_usage": True,
+                }
                 if base_url:
                     kwargs["base_url"] = base_url
                 self.model = ChatOpenAI(**kwargs)
@@ -300,36 +404,67 @@ class OpenAIAgent(Agent):
                 self.model = None
                 self.init_error = str(exc)
 
+    def _unavailable_response(self) -> AgentResponse:
+        if self.api_key and self.init_error:
+            return AgentResponse(
+                content=f"Error: OpenAI client unavailable ({self.init_error}).",
+                confidence=0.0,
+                model_name=self.model_name,
+            )
+        return AgentResponse(content="Error: OpenAI API key is missing.", confidence=0.0, model_name=self.model_name)
+
+    def _finalize_response(self, full_response: Any, messages: List[object]) -> AgentResponse:
+        content = _response_text(full_response)
+
+        usage = _metadata_dict(full_response).get("token_usage") or {}
+        streamed = _usage_metadata(full_response)
+        input_tokens = _to_int(
+            usage.get("prompt_tokens", streamed.get("input_tokens")),
+            fallback=max(len(str(messages)) // 4, 1),
+        )
+        output_tokens = _to_int(
+            usage.get("completion_tokens", streamed.get("output_tokens")),
+            fallback=max(len(content) // 4, 1),
+        )
+        total_tokens = _to_int(
+            usage.get("total_tokens", streamed.get("total_tokens")),
+            fallback=input_tokens + output_tokens,
+        )
+        # Prompt caching is automatic for prefixes of 1024+ tokens.
+        cached_tokens = _to_int(
+            (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+            fallback=_cache_read_tokens(streamed),
+        )
+
+        return AgentResponse(
+            content=content,
+            confidence=0.88,
+            token_usage={"input": input_tokens, "output": output_tokens, "total": total_tokens, "cached_input": cached_tokens},
+            cost=estimate_cost(self.model_name, input_tokens, output_tokens, cached_input_tokens=cached_tokens),
+            model_name=self.model_name,
+        )
+
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        return _upstream_key(self, query, context, self.base_url)
+
     def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
         if not self.model:
-            if self.api_key and self.init_error:
-                return AgentResponse(
-                    content=f"Error: OpenAI client unavailable ({self.init_error}).",
-                    confidence=0.0,
-                    model_name=self.model_name,
-                )
-            return AgentResponse(content="Error: OpenAI API key is missing.", confidence=0.0, model_name=self.model_name)
+            return self._unavailable_response()
 
         messages = _build_messages(self.system_prompt, query, context)
         try:
-            full_response = self.model.invoke(messages)
-            content = _response_text(full_response)
-
-            usage = _metadata_dict(full_response).get("token_usage", {})
-            input_tokens = _to_int(usage.get("prompt_tokens"), fallback=max(len(str(messages)) // 4, 1))
-            output_tokens = _to_int(usage.get("completion_tokens"), fallback=max(len(content) // 4, 1))
-            total_tokens = _to_int(usage.get("total_tokens"), fallback=input_tokens + output_tokens)
-
-            return AgentResponse(
-                content=content,
-                confidence=0.88,
-                token_usage={"input": input_tokens, "output": output_tokens, "total": total_tokens},
-                cost=estimate_cost(self.model_name, input_tokens, output_tokens),
-                model_name=self.model_name,
-            )
+            return self._finalize_response(self.model.invoke(messages), messages)
         except Exception as exc:
             return AgentResponse(content=f"Error: {exc}", confidence=0.0, model_name=self.model_name)
 
+    def generate_response_stream(
+        self, query: str, context: Optional[str] = None
+    ) -> Iterator[Union[str, AgentResponse]]:
+        if not self.model:
+            yield self._unavailable_response()
+            return
+        yield from _stream_agent_response(self, _build_messages(self.system_prompt, query, context))
+
 
 class GeminiAgent(Agent):
     def __init__(
@@ -358,36 +493,64 @@ class GeminiAgent(Agent):
                 self.model = None
                 self.init_error = str(exc)
 
+    def _unavailable_response(self) -> AgentResponse:
+        if self.api_key and self.init_error:
+            return AgentResponse(
+                content=f"Error: Google client unavailable ({self.init_error}).",
+                confidence=0.0,
+                model_name=self.model_name,
+            )
+        return AgentResponse(content="Error: Google API key is missing.", confidence=0.0, model_name=self.model_name)
+
+    def _finalize_response(self, full_response: Any, messages: List[object]) -> AgentResponse:
+        content = _response_text(full_response)
+
+        usage = _metadata_dict(full_response).get("usage_metadata") or {}
+        streamed = _usage_metadata(full_response)
+        input_tokens = _to_int(
+            usage.get("prompt_token_count", streamed.get("input_tokens")),
+            fallback=max(len(str(messages)) // 4, 1),
+        )
+        output_tokens = _to_int(
+            usage.get("candidates_token_count", streamed.get("output_tokens")),
+            fallback=max(len(content) // 4, 1),
+        )
+        total_tokens = _to_int(
+            usage.get("total_token_count", streamed.get("total_tokens")),
+            fallback=input_tokens + output_tokens,
+        )
+        # Implicit caching: prompt_token_count already includes the cached share.
+        cached_tokens = _to_int(usage.get("cached_content_token_count"), fallback=_cache_read_tokens(streamed))
+
+        return AgentResponse(
+            content=content,
+            confidence=0.84,
+            token_usage={"input": input_tokens, "output": output_tokens, "total": total_tokens, "cached_input": cached_tokens},
+            cost=estimate_cost(self.model_name, input_tokens, output_tokens, cached_input_tokens=cached_tokens),
+            model_name=self.model_name,
+        )
+
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        return _upstream_key(self, query, context)
+
     def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
         if not self.model:
-            if self.api_key and self.init_error:
-                return AgentResponse(
-                    content=f"Error: Google client unavailable ({self.init_error}).",
-                    confidence=0.0,
-                    model_name=self.model_name,
-                )
-            return AgentResponse(content="Error: Google API key is missing.", confidence=0.0, model_name=self.model_name)
+            return self._unavailable_response()
 
         messages = _build_messages(self.system_prompt, query, context)
         try:
-            full_response = self.model.invoke(messages)
-            content = _response_text(full_response)
-
-            usage = _metadata_dict(full_response).get("usage_metadata", {})
-            input_tokens = _to_int(usage.get("prompt_token_count"), fallback=max(len(str(messages)) // 4, 1))
-            output_tokens = _to_int(usage.get("candidates_token_count"), fallback=max(len(content) // 4, 1))
-            total_tokens = _to_int(usage.get("total_token_count"), fallback=input_tokens + output_tokens)
-
-            return AgentResponse(
-                content=content,
-                confidence=0.84,
-                token_usage={"input": input_tokens, "output": output_tokens, "total": total_tokens},
-                cost=estimate_cost(self.model_name, input_tokens, output_tokens),
-                model_name=self.model_name,
-            )
+            return self._finalize_response(self.model.invoke(messages), messages)
         except Exception as exc:
             return AgentResponse(content=f"Error: {exc}", confidence=0.0, model_name=self.model_name)
 
+    def generate_response_stream(
+        self, query: str, context: Optional[str] = None
+    ) -> Iterator[Union[str, AgentResponse]]:
+        if not self.model:
+            yield self._unavailable_response()
+            return
+        yield from _stream_agent_response(self, _build_messages(self.system_prompt, query, context))
+
 
 class AnthropicAgent(Agent):
     def __init__(
@@ -416,86 +579,297 @@ class AnthropicAgent(Agent):
                 self.model = None
                 self.init_error = str(exc)
 
+    def _unavailable_response(self) -> AgentResponse:
+        if self.api_key and self.init_error:
+            return AgentResponse(
+                content=f"Error: Anthropic client unavailable ({self.init_error}).",
+                confidence=0.0,
+                model_name=self.model_name,
+            )
+        return AgentResponse(content="Error: Anthropic API key is missing.", confidence=0.0, model_name=self.model_name)
+
+    def _finalize_response(self, full_response: Any, messages: List[object]) -> AgentResponse:
+        content = _response_text(full_response)
+
+        usage = _metadata_dict(full_response).get("usage") or {}
+        streamed = _usage_metadata(full_response)
+        details = streamed.get("input_token_details") or {}
+        cache_read = _to_int(usage.get("cache_read_input_tokens"), fallback=_to_int(details.get("cache_read")))
+        cache_write = _to_int(usage.get("cache_creation_input_tokens"), fallback=_to_int(details.get("cache_creation")))
+        if "input_tokens" in usage:
+            # The raw API count excludes cache reads and writes; LangChain's usage_metadata already includes them.
+            input_tokens = _to_int(usage["input_tokens"]) + cache_read + cache_write
+        else:
+            input_tokens = _to_int(streamed.get("input_tokens"), fallback=max(len(str(messages)) // 4, 1))
+        output_tokens = _to_int(
+            usage.get("output_tokens", streamed.get("output_tokens")),
+            fallback=max(len(content) // 4, 1),
+        )
+
+        return AgentResponse(
+            content=content,
+            confidence=0.9,
+            token_usage={
+                "input": input_tokens,
+                "output": output_tokens,
+                "total": input_tokens + output_tokens,
+                "cached_input": cache_read,
+                "cache_write": cache_write,
+            },
+            cost=estimate_cost(
+                self.model_name, input_tokens, output_tokens,
+                cached_input_tokens=cache_read, cache_write_tokens=cache_write,
+            ),
+            model_name=self.model_name,
+        )
+
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        return _upstream_key(self, query, context)
+
     def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
         if not self.model:
-            if self.api_key and self.init_error:
-                return AgentResponse(
-                    content=f"Error: Anthropic client unavailable ({self.init_error}).",
-                    confidence=0.0,
-                    model_name=self.model_name,
-                )
-            return AgentResponse(content="Error: Anthropic API key is missing.", confidence=0.0, model_name=self.model_name)
+            return self._unavailable_response()
 
-        messages = _build_messages(self.system_prompt, query, context)
+        messages = _build_messages(self.system_prompt, query, context, cache_control=True)
         try:
-            full_response = self.model.invoke(messages)
-            content = _response_text(full_response)
-
-            usage = _metadata_dict(full_response).get("usage", {})
-            input_tokens = _to_int(usage.get("input_tokens"), fallback=max(len(str(messages)) // 4, 1))
-            output_tokens = _to_int(usage.get("output_tokens"), fallback=max(len(content) // 4, 1))
-
-            return AgentResponse(
-                content=content,
-                confidence=0.9,
-                token_usage={
-                    "input": input_tokens,
-                    "output": output_tokens,
-                    "total": input_tokens + output_tokens,
-                },
-                cost=estimate_cost(self.model_name, input_tokens, output_tokens),
-                model_name=self.model_name,
-            )
+            return self._finalize_response(self.model.invoke(messages), messages)
         except Exception as exc:
             return AgentResponse(content=f"Error: {exc}", confidence=0.0, model_name=self.model_name)
 
+    def generate_response_stream(
+        self, query: str, context: Optional[str] = None
+    ) -> Iterator[Union[str, AgentResponse]]:
+        if not self.model:
+            yield self._unavailable_response()
+            return
+        yield from _stream_agent_response(self, _build_messages(self.system_prompt, query, context, cache_control=True))
+
+
+MOCK_PROFILE_ENV = "SYNAPSE_MOCK_PROFILE"
+
+MOCK_RESPONSE_TEMPLATES = {
+    "skeptical": [
+        "The strongest risk is hidden assumptions. The claim should be tested against edge cases before adoption.",
+        "I do not accept the conclusion yet. We need stronger causal evidence and clearer constraints.",
+    ],
+    "optimistic": [
+        "The opportunity is meaningful if execution is disciplined. Early pilots can de-risk rollout.",
+        "Benefits are plausible, especially with phased implementation and measurable milestones.",
+    ],
+    "fact-checking": [
+        "Key claims need citations with dates and methodology. Confidence should remain moderate until verified.",
+        "Several statements are directionally right but under-sourced. Add references and confidence bounds.",
+    ],
+    "adversarial": [
+        "Counterpoint: the consensus ignores failure modes under resource constraints.",
+        "Alternative view: current reasoning may overfit best-case assumptions and ignore long-tail outcomes.",
+    ],
+    "judge": [
+        "Synthesis: combine the cautious evidence filter with pragmatic implementation steps.",
+        "Final verdict: balanced strategy wins - pursue upside while explicitly controlling downside risk.",
+    ],
+}
+
+
+def _load_latency_trace(path: str) -> Tuple[float, ...]:
+    """
+    Read recorded latencies in milliseconds from a JSON list of numbers, or from
+    JSON lines carrying a `latency_ms` / `provider_ms` field.
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        raw = handle.read().strip()
+    if raw.startswith("["):
+        return tuple(float(value) for value in json.loads(raw))
+    samples: List[float] = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        value = row.get("latency_ms", row.get("provider_ms")) if isinstance(row, dict) else row
+        if value is not None:
+            samples.append(float(value))
+    return tuple(samples)
+
+
+@dataclass(frozen=True)
+class MockProfile:
+    """
+    Load-testing behaviour for MockAgent. The default profile is the instant,
+    zero-cost demo agent; the other knobs simulate a real provider offline.
+
+    latency: "none", "fixed" (latency_ms), "lognormal" (median latency_ms,
+        shape latency_sigma) or "trace" (resampled from latency_trace / trace_path).
+        This is the time to first token.
+    tokens_per_second: streaming pace after the first token (0 = instant).
+    output_tokens: median completion length (0 = short demo snippet).
+    error_rate: probability that a call fails like a provider error.
+    price_as: price usage as this model from PRICING_REGISTRY (default free).
+    seed: makes latency, length, text and failures reproducible per
+        (agent, query, context).
+    """
+
+    latency: str = "none"
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.5
+    latency_trace: Tuple[float, ...] = ()
+    trace_path: str = ""
+    tokens_per_second: float = 0.0
+    output_tokens: int = 0
+    output_sigma: float = 0.35
+    error_rate: float = 0.0
+    price_as: str = ""
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MockProfile":
+        known = {name for name in cls.__dataclass_fields__}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown mock profile fields: {sorted(unknown)}")
+        values = dict(data)
+        if values.get("trace_path") and not values.get("latency_trace"):
+            values["latency_trace"] = _load_latency_trace(values["trace_path"])
+        if "latency_trace" in values:
+            values["latency_trace"] = tuple(float(v) for v in values["latency_trace"])
+        profile = cls(**values)
+        if profile.latency not in ("none", "fixed", "lognormal", "trace"):
+            raise ValueError(f"Unknown mock latency model '{profile.latency}'.")
+        if profile.latency == "trace" and not profile.latency_trace:
+            raise ValueError("Mock latency 'trace' needs latency_trace or trace_path.")
+        return profile
+
+    @classmethod
+    def parse(cls, spec: str) -> "MockProfile":
+        """Parse a JSON object, or the path of a JSON file holding one."""
+        text = (spec or "").strip()
+        if not text:
+            return cls()
+        if not text.startswith("{"):
+            with open(text, "r", encoding="utf-8") as handle:
+                text = handle.read()
+        return cls.from_dict(json.loads(text))
+
+
+_DEFAULT_MOCK_PROFILE: Optional[MockProfile] = None
+
+
+def set_default_mock_profile(profile: Optional[MockProfile]) -> None:
+    """Override the profile used for mock agents (None falls back to $SYNAPSE_MOCK_PROFILE)."""
+    global _DEFAULT_MOCK_PROFILE
+    _DEFAULT_MOCK_PROFILE = profile
+
+
+@lru_cache(maxsize=8)
+def _mock_profile_from_env(spec: str) -> MockProfile:
+    return MockProfile.parse(spec)
+
+
+def default_mock_profile() -> MockProfile:
+    if _DEFAULT_MOCK_PROFILE is not None:
+        return _DEFAULT_MOCK_PROFILE
+    return _mock_profile_from_env(os.getenv(MOCK_PROFILE_ENV, ""))
+
 
 class MockAgent(Agent):
-    """Low-cost simulation agent for UI demos and local testing."""
+    """Low-cost simulation agent for UI demos, local testing and offline load tests."""
 
-    def __init__(self, name: str, behavior: str):
-        system_prompt = (
+    def __init__(
+        self,
+        name: str,
+        behavior: str,
+        profile: Optional[MockProfile] = None,
+        system_prompt: str = "",
+    ):
+        system_prompt = system_prompt or (
             f"You are a mock agent named {name}. Keep replies concise and follow a {behavior} reasoning style."
         )
         super().__init__(name=name, description="Mock agent", system_prompt=system_prompt, model=None)
         self.behavior = behavior
-
-    def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
-        response_templates = {
-            "skeptical": [
-                "The strongest risk is hidden assumptions. The claim should be tested against edge cases before adoption.",
-                "I do not accept the conclusion yet. We need stronger causal evidence and clearer constraints.",
-            ],
-            "optimistic": [
-                "The opportunity is meaningful if execution is disciplined. Early pilots can de-risk rollout.",
-                "Benefits are plausible, especially with phased implementation and measurable milestones.",
-            ],
-            "fact-checking": [
-                "Key claims need citations with dates and methodology. Confidence should remain moderate until verified.",
-                "Several statements are directionally right but under-sourced. Add references and confidence bounds.",
-            ],
-            "adversarial": [
-                "Counterpoint: the consensus ignores failure modes under resource constraints.",
-                "Alternative view: current reasoning may overfit best-case assumptions and ignore long-tail outcomes.",
-            ],
-            "judge": [
-                "Synthesis: combine the cautious evidence filter with pragmatic implementation steps.",
-                "Final verdict: balanced strategy wins - pursue upside while explicitly controlling downside risk.",
-            ],
-        }
-        snippet = random.choice(response_templates.get(self.behavior, response_templates["skeptical"]))
-        final_content = (
-            f"[{self.name}] Assessment:\n"
-            f"{snippet}\n"
+        self.profile = profile or MockProfile()
+
+    def _rng(self, query: str, context: Optional[str]) -> random.Random:
+        if self.profile.seed is None:
+            return random.Random()
+        # String seeds hash deterministically across processes, unlike hash().
+        return random.Random(f"{self.profile.seed}|{self.name}|{self.behavior}|{query}|{context or ''}")
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        profile = self.profile
+        if profile.latency == "fixed":
+            return max(profile.latency_ms, 0.0) / 1000.0
+        if profile.latency == "lognormal" and profile.latency_ms > 0:
+            return rng.lognormvariate(math.log(profile.latency_ms), profile.latency_sigma) / 1000.0
+        if profile.latency == "trace" and profile.latency_trace:
+            return max(rng.choice(profile.latency_trace), 0.0) / 1000.0
+        return 0.0
+
+    def _compose(self, rng: random.Random) -> str:
+        templates = MOCK_RESPONSE_TEMPLATES.get(self.behavior, MOCK_RESPONSE_TEMPLATES["skeptical"])
+        lines = [f"[{self.name}] Assessment:", rng.choice(templates)]
+        if self.profile.output_tokens > 0:
+            target = rng.lognormvariate(math.log(self.profile.output_tokens), self.profile.output_sigma)
+            pool = [sentence for options in MOCK_RESPONSE_TEMPLATES.values() for sentence in options]
+            # ~4 characters per token, matching the fallback estimate used for real providers
+            while sum(len(line) + 1 for line in lines) < target * 4:
+                lines.append(rng.choice(pool))
+        return "\n".join(lines) + "\n"
+
+    def _plan(self, query: str, context: Optional[str]) -> Tuple[float, str, Optional[str], AgentResponse]:
+        """Decide (first-token delay, content, injected error, final response) for one call."""
+        rng = self._rng(query, context)
+        delay = self._first_token_delay(rng)
+        failure = None
+        if self.profile.error_rate > 0 and rng.random() < self.profile.error_rate:
+            failure = rng.choice(["HTTP 500 internal error", "HTTP 429 rate limited", "upstream timeout"])
+        content = self._compose(rng)
+
+        input_tokens = max(len(self.system_prompt) + len(query) + len(context or ""), 4) // 4
+        output_tokens = max(len(content) // 4, 1)
+        cost = estimate_cost(self.profile.price_as, input_tokens, output_tokens) if self.profile.price_as else 0.0
+        response = AgentResponse(
+            content=content,
+            confidence=0.62,
+            token_usage={"input": input_tokens, "output": output_tokens, "total": input_tokens + output_tokens},
+            cost=cost,
+            model_name="mock-agent",
         )
+        return delay, content, failure, response
+
+    def _failure_response(self, failure: str) -> AgentResponse:
         return AgentResponse(
-            content=final_content,
-            confidence=0.62,
-            token_usage={"input": 120, "output": 80, "total": 200},
-            cost=0.0,
+            content=f"Error: Mock provider injected failure ({failure}).",
+            confidence=0.0,
             model_name="mock-agent",
         )
 
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        # The name is part of the key because it appears in the generated text.
+        return ("MockAgent", self.name, self.behavior, self.profile, self.system_prompt, query, context or "")
+
+    def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
+        delay, content, failure, response = self._plan(query, context)
+        if failure:
+            time.sleep(delay)
+            return self._failure_response(failure)
+        tps = self.profile.tokens_per_second
+        time.sleep(delay + (response.token_usage["output"] / tps if tps > 0 else 0.0))
+        return response
+
+    def generate_response_stream(
+        self, query: str, context: Optional[str] = None
+    ) -> Iterator[Union[str, AgentResponse]]:
+        delay, content, failure, response = self._plan(query, context)
+        time.sleep(delay)
+        if failure:
+            yield self._failure_response(failure)
+            return
+        tps = self.profile.tokens_per_second
+        for word in re.findall(r"\S+\s*", content):
+            if tps > 0:
+                time.sleep(max(len(word) // 4, 1) / tps)
+            yield word
+        yield response
+
 
 def _mock_behavior_for_model_id(model_id: str) -> str:
     normalized = (model_id or "").lower()
@@ -566,7 +940,23 @@ def build_agent_from_spec(
             temperature=temperature,
         )
 
+    if spec.provider == "local":
+        # Any OpenAI-compatible server (vLLM, llama.cpp, tests/openai_standin.py); most ignore the key.
+        return OpenAIAgent(
+            name=agent_name,
+            model_name=spec.model_id,
+            api_key=resolve_provider_key("local", api_keys) or "local",
+            base_url=os.getenv(LOCAL_BASE_URL_ENV, "").strip() or DEFAULT_LOCAL_BASE_URL,
+            system_prompt=system_prompt,
+            temperature=temperature,
+        )
+
     if spec.provider == "mock":
-        return MockAgent(name=agent_name, behavior=_mock_behavior_for_model_id(spec.model_id))
+        return MockAgent(
+            name=agent_name,
+            behavior=_mock_behavior_for_model_id(spec.model_id),
+            profile=default_mock_profile(),
+            system_prompt=system_prompt,
+        )
 
     raise ValueError(f"Unsupported provider: {spec.provider}")
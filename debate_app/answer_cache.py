@@ -0,0 +1,253 @@
+"""
+Final-answer cache for repeated and reworded questions.
+
+Entries are keyed on the normalised query plus the roster configuration
+(debaters, judge, verifier, stress tester, rounds, temperature, budget,
+consensus threshold, adaptive round control, tiered escalation), so a hit only
+ever serves a synthesis produced by the same setup. The key also covers a hash
+of the request's API keys, so one account's answers are never served to
+another; requests without keys share the server's own account.
+Lookups try the exact normalised-query hash first, then near-duplicates: each
+query's character 4-gram shingles get a MinHash signature, signatures are
+banded into an LSH index, and candidates sharing a band are confirmed by exact
+shingle Jaccard against the similarity threshold. Queries that differ in any
+number (years, quantities) never match.
+
+Lexical similarity cannot tell "Austria" from "Australia", so the default
+threshold is deliberately high. Tune it with SYNAPSE_ANSWER_CACHE_THRESHOLD
+(0-1, 1 = exact only); SYNAPSE_ANSWER_CACHE_TTL sets the lifetime in seconds
+(0 disables the cache) and SYNAPSE_ANSWER_CACHE_SIZE the entry cap.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Set, Tuple
+
+DEFAULT_TTL_SECONDS = float(os.getenv("SYNAPSE_ANSWER_CACHE_TTL", "86400") or 0)
+DEFAULT_THRESHOLD = float(os.getenv("SYNAPSE_ANSWER_CACHE_THRESHOLD", "0.9") or 0.9)
+DEFAULT_MAX_ENTRIES = int(os.getenv("SYNAPSE_ANSWER_CACHE_SIZE", "1000") or 1000)
+ROSTER_FIELDS = (
+    "debaters", "judge", "fact_checker", "adversarial", "rounds", "temp",
+    "budget", "consensus_threshold",
+    "adaptive_rounds", "min_gain_per_dollar",
+    "tiered", "escalation_threshold", "triage_model", "triage_verifier",
+)
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 Jaccard usually share a band
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATION_RNG = random.Random(20240611)
+_PERMUTATIONS = [
+    (_PERMUTATION_RNG.randrange(1, _MERSENNE_PRIME), _PERMUTATION_RNG.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def normalize(query: str) -> str:
+    """Lower-case, punctuation-free, single-spaced form of a query ("what's" -> "whats")."""
+    text = re.sub(r"[^\w\s]", " ", (query or "").lower().replace("'", "").replace("\u2019", ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    if len(text) <= size:
+        return frozenset([text])
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def minhash(items: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [zlib.crc32(item.encode("utf-8")) for item in items]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def numbers_in(text: str) -> Tuple[str, ...]:
+    return tuple(re.findall(r"\d+", text))
+
+
+def jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    union = left | right
+    return len(left & right) / len(union) if union else 1.0
+
+
+def account_identity(keys: Optional[Dict[str, str]]) -> str:
+    """Hash of the request's API keys ("" for the server's own keys); the keys themselves are never stored."""
+    supplied = sorted((provider, key) for provider, key in (keys or {}).items() if key)
+    if not supplied:
+        return ""
+    return hashlib.sha256(json.dumps(supplied).encode("utf-8")).hexdigest()[:16]
+
+
+def roster_signature(options: Dict[str, Any]) -> str:
+    """Stable hash of the parts of a run request that shape its answer, scoped to the calling account."""
+    config = {field: options.get(field) for field in ROSTER_FIELDS}
+    config["account"] = account_identity(options.get("keys"))
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def is_cacheable(payload: Dict[str, Any]) -> bool:
+    """Only runs that reached a successful synthesis, or resolved at triage, are worth serving again."""
+    if payload.get("tier") == 1:
+        return bool(payload.get("final_answer"))
+    judge = payload.get("judge") or {}
+    return bool(judge) and not judge.get("is_error")
+
+
+@dataclass
+class _Entry:
+    key: str
+    roster: str
+    query: str
+    shingles: FrozenSet[str]
+    numbers: Tuple[str, ...]
+    band_keys: Tuple[Tuple[str, int, int], ...]
+    encoded: str
+    created_at: float
+
+
+class AnswerCache:
+    """In-process LRU of final payloads with exact and MinHash/LSH lookup."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.ttl = float(ttl)
+        self.threshold = float(threshold)
+        self.max_entries = max(1, int(max_entries))
+        self.hits = {"exact": 0, "near": 0}
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bands: Dict[Tuple[str, int, int], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _describe(self, options: Dict[str, Any]):
+        text = normalize(options.get("query", ""))
+        roster = roster_signature(options)
+        key = hashlib.sha1(f"{roster}|{text}".encode("utf-8")).hexdigest()
+        return text, roster, key
+
+    @staticmethod
+    def _band_keys(roster: str, signature: Tuple[int, ...]) -> Tuple[Tuple[str, int, int], ...]:
+        rows = NUM_PERM // BANDS
+        return tuple((roster, band, hash(signature[band * rows:(band + 1) * rows])) for band in range(BANDS))
+
+    def get(self, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The cached payload for a run request (parsed options), marked `cached`, or None."""
+        if not self.enabled:
+            return None
+        text, roster, key = self._describe(options)
+        query_shingles = shingles(text)
+        band_keys = self._band_keys(roster, minhash(query_shingles)) if self.threshold < 1.0 else ()
+        now = time.time()
+        with self._lock:
+            entry, similarity = self._entries.get(key), 1.0
+            if entry is not None and now - entry.created_at > self.ttl:
+                self._remove(entry)
+                entry = None
+            if entry is None and band_keys:
+                entry, similarity = self._nearest(text, query_shingles, band_keys, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry.key)
+            match = "exact" if entry.key == key else "near"
+            self.hits[match] += 1
+
+        payload = json.loads(entry.encoded)
+        payload["cached"] = {
+            "match": match,
+            "similarity": round(similarity, 4),
+            "cached_query": payload.get("query", ""),
+            "source_run_id": payload.get("run_id"),
+            "age_s": round(now - entry.created_at, 1),
+            "saved_cost": payload.get("total_cost", 0.0),
+        }
+        payload["query"] = options.get("query", payload.get("query", ""))
+        payload["total_cost"] = 0.0
+        return payload
+
+    def _nearest(self, text: str, query_shingles: FrozenSet[str], band_keys, now: float) -> Tuple[Optional[_Entry], float]:
+        """Best live entry sharing an LSH band whose shingle Jaccard clears the threshold."""
+        numbers = numbers_in(text)
+        candidates: Set[str] = set()
+        for band_key in band_keys:
+            candidates |= self._bands.get(band_key, set())
+        best, best_similarity = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            if now - entry.created_at > self.ttl or entry.numbers != numbers:
+                continue
+            similarity = jaccard(query_shingles, entry.shingles)
+            if similarity >= self.threshold and similarity > best_similarity:
+                best, best_similarity = entry, similarity
+        return best, best_similarity
+
+    def put(self, options: Dict[str, Any], payload: Dict[str, Any]) -> bool:
+        """Cache a finished run's payload; returns False when it is not cacheable."""
+        if not self.enabled or not is_cacheable(payload):
+            return False
+        text, roster, key = self._describe(options)
+        entry_shingles = shingles(text)
+        entry = _Entry(
+            key=key,
+            roster=roster,
+            query=text,
+            shingles=entry_shingles,
+            numbers=numbers_in(text),
+            band_keys=self._band_keys(roster, minhash(entry_shingles)),
+            encoded=json.dumps(payload, default=str),
+            created_at=time.time(),
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(self._entries[key])
+            self._entries[key] = entry
+            for band_key in entry.band_keys:
+                self._bands.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries.values())))
+        return True
+
+    def _remove(self, entry: _Entry) -> None:
+        self._entries.pop(entry.key, None)
+        for band_key in entry.band_keys:
+            bucket = self._bands.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry.key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "ttl_s": self.ttl,
+            "threshold": self.threshold,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+        }
+
+
+CACHE = AnswerCache()
@@ -0,0 +1,435 @@
+"""
+Batch debates for offline evaluation.
+
+Runs every query of a JSONL file (see `benchmark.load_queries`) through the
+full debate with one shared roster. Debates are scheduled `concurrency` at a
+time on their own agent pool, provider calls pass through per-provider rate
+limits (requests per minute and calls in flight), and each result is appended
+to the output JSONL as soon as its debate finishes.
+
+With `--batch-api`, OpenAI, Anthropic and local calls go through the providers'
+asynchronous batch APIs (see `agents.batch_api`) at the discounted batch price.
+Each round then waits for its batch to finish, which can take hours, so use
+it for nightly runs only.
+
+The output file is the checkpoint: rerunning with the same `--out` skips every
+id already written with status "ok" and retries the rest, so an interrupted
+nightly batch resumes where it stopped. A `.summary.json` file is written next
+to the output when the batch ends.
+
+Usage:
+    python -m debate_app.batch eval.jsonl --out output/batches/nightly.jsonl \\
+        --debaters "OpenAI GPT-4o mini" "Anthropic Claude 3 Haiku" --judge "OpenAI GPT-4o" \\
+        --concurrency 8 --rpm openai=500 anthropic=50 --provider-concurrency anthropic=4
+    python -m debate_app.batch eval.jsonl --batch-api --concurrency 32
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Union
+
+from . import run_store
+from .agents.batch_api import ProviderBatches
+from .agents.providers import MockProfile, normalize_provider, set_default_mock_profile
+from .benchmark import DEFAULT_ROSTER, latency_summary, load_queries
+from .core.base import Agent, AgentResponse
+from .orchestrator import build_roster, build_triage, parse_run_options, run_collaboration
+
+BATCH_DIR = os.path.join("output", "batches")
+
+
+# ─── Provider rate limits ───────────────────────────────────────────────────
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class ProviderLimiter:
+    """Per-provider requests-per-minute buckets and in-flight call caps."""
+
+    def __init__(self, rpm: Optional[Dict[str, float]] = None, concurrency: Optional[Dict[str, int]] = None):
+        self._buckets = {normalize_provider(p): TokenBucket(r / 60.0) for p, r in (rpm or {}).items() if r > 0}
+        self._slots = {normalize_provider(p): threading.BoundedSemaphore(n) for p, n in (concurrency or {}).items() if n > 0}
+        self._lock = threading.Lock()
+        self.waited_s: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, provider: str) -> Iterator[None]:
+        """Hold one call slot for `provider`, waiting for its cap and rate limit."""
+        provider = normalize_provider(provider)
+        semaphore = self._slots.get(provider)
+        bucket = self._buckets.get(provider)
+        started = time.monotonic()
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            if bucket is not None:
+                bucket.take()
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                with self._lock:
+                    self.waited_s[provider] = self.waited_s.get(provider, 0.0) + waited
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+
+class RateLimitedAgent(Agent):
+    """Delegates to `agent` while holding a `ProviderLimiter` slot for its provider."""
+
+    def __init__(self, agent: Agent, provider: str, limiter: ProviderLimiter):
+        super().__init__(agent.name, getattr(agent, "description", ""), getattr(agent, "system_prompt", ""), getattr(agent, "model", None))
+        self.agent = agent
+        self.provider = provider
+        self.limiter = limiter
+
+    def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
+        with self.limiter.slot(self.provider):
+            return self.agent.generate_response(query, context)
+
+    def generate_response_stream(self, query: str, context: Optional[str] = None) -> Iterator[Union[str, AgentResponse]]:
+        with self.limiter.slot(self.provider):
+            yield from self.agent.generate_response_stream(query, context)
+
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        # Followers never reach the provider, so they need no limiter slot.
+        return self.agent.coalesce_key(query, context)
+
+
+def parse_provider_values(pairs: Sequence[str], cast=float) -> Dict[str, Any]:
+    """["openai=500", "anthropic=50"] -> {"openai": 500.0, "anthropic": 50.0}."""
+    values: Dict[str, Any] = {}
+    for pair in pairs or ():
+        provider, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected provider=value, got '{pair}'.")
+        values[provider.strip()] = cast(value)
+    return values
+
+
+# ─── Checkpointed output ────────────────────────────────────────────────────
+
+def completed_ids(out_path: str) -> Set[str]:
+    """
+    Ids already written with status "ok". A torn last line from an interrupted
+    run is cut off so appended rows start on a fresh line.
+    """
+    if not os.path.exists(out_path):
+        return set()
+    with open(out_path, "rb+") as handle:
+        data = handle.read()
+        if data and not data.endswith(b"\n"):
+            handle.truncate(data.rfind(b"\n") + 1)
+            data = data[: data.rfind(b"\n") + 1]
+    done: Set[str] = set()
+    for line in data.decode("utf-8").splitlines():
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        if row.get("status") == "ok":
+            done.add(str(row.get("id")))
+    return done
+
+
+# ─── Runner ─────────────────────────────────────────────────────────────────
+
+class BatchRunner:
+    """Runs a query set with bounded concurrency and appends one JSONL row per finished item."""
+
+    def __init__(
+        self,
+        items: Sequence[Dict[str, Any]],
+        options: Dict[str, Any],
+        out_path: str,
+        concurrency: int = 2,
+        agent_workers: int = 8,
+        limiter: Optional[ProviderLimiter] = None,
+        max_cost: Optional[float] = None,
+        include_payload: bool = False,
+        provider_batches: Optional[ProviderBatches] = None,
+    ):
+        self.items = list(items)
+        self.options = options
+        self.out_path = out_path
+        self.concurrency = max(1, int(concurrency))
+        self.agent_workers = max(1, int(agent_workers))
+        self.limiter = limiter or ProviderLimiter()
+        self.max_cost = max_cost
+        self.include_payload = include_payload
+        self.provider_batches = provider_batches
+        self.total = len(self.items)
+        self.skipped = 0
+        self.ok = 0
+        self.failed = 0
+        self.cost = 0.0
+        self.latencies: List[float] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stop_reason: Optional[str] = None
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop scheduling new items; debates already running finish and are written."""
+        self._cancel.set()
+
+    def _wrap(self, agent: Agent, spec) -> Agent:
+        """Route `agent` through the provider batch API when enabled and supported, else the rate limiter."""
+        if self.provider_batches is not None:
+            batched = self.provider_batches.wrap(agent, spec)
+            if batched is not None:
+                return batched
+        return RateLimitedAgent(agent, spec.provider, self.limiter)
+
+    def _run_item(self, item: Dict[str, Any], agents: ThreadPoolExecutor) -> Dict[str, Any]:
+        started = time.perf_counter()
+        row: Dict[str, Any] = {"id": item["id"], "query": item["query"]}
+        if item.get("expected") is not None:
+            row["expected"] = item["expected"]
+        try:
+            options = dict(self.options, query=item["query"])
+            roster, judge_spec, judge, warnings = build_roster(options)
+            roster = [(role, spec, name, self._wrap(agent, spec)) for role, spec, name, agent in roster]
+            judge = self._wrap(judge, judge_spec)
+            triage = build_triage(options, roster, judge_spec, warnings)
+            if triage:
+                triage = [(role, spec, name, self._wrap(agent, spec)) for role, spec, name, agent in triage]
+            payload = run_collaboration(
+                options["query"], roster, judge_spec, judge,
+                rounds=options["rounds"],
+                budget=options["budget"],
+                consensus_threshold=options["consensus_threshold"],
+                adaptive_rounds=options.get("adaptive_rounds", False),
+                min_gain_per_dollar=options.get("min_gain_per_dollar"),
+                triage=triage,
+                escalation_threshold=options.get("escalation_threshold"),
+                executor=agents,
+                warnings=warnings,
+            )
+        except Exception as exc:
+            row.update(status="error", error=f"{type(exc).__name__}: {exc}", latency_s=round(time.perf_counter() - started, 3))
+            return row
+        judge_record = payload.get("judge") or {}
+        answered = (judge_record and not judge_record.get("is_error")) or payload.get("tier") == 1
+        row.update(
+            status="ok" if answered else "error",
+            run_id=run_store.save(payload),
+            final_answer=payload["final_answer"],
+            total_cost=payload["total_cost"],
+            rounds_completed=payload["rounds_completed"],
+            stopped_reason=payload["stopped_reason"],
+            confidence=judge_record.get("confidence"),
+            warnings=payload["warnings"],
+            latency_s=round(time.perf_counter() - started, 3),
+        )
+        if payload.get("tier"):
+            row["tier"] = payload["tier"]
+        if row["status"] == "error":
+            row["error"] = payload["warnings"][-1] if payload["warnings"] else payload["stopped_reason"]
+        if self.include_payload:
+            row["payload"] = payload
+        return row
+
+    def _record(self, row: Dict[str, Any], handle) -> None:
+        handle.write(json.dumps(row, default=str) + "\n")
+        handle.flush()
+        self.cost += float(row.get("total_cost") or 0.0)
+        if row["status"] == "ok":
+            self.ok += 1
+            self.latencies.append(row["latency_s"])
+        else:
+            self.failed += 1
+
+    def run(self) -> Dict[str, Any]:
+        """Run every pending item, then write and return the summary."""
+        self.started_at = time.time()
+        directory = os.path.dirname(self.out_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        done = completed_ids(self.out_path)
+        pending = [item for item in self.items if item["id"] not in done]
+        self.skipped = self.total - len(pending)
+        queue = iter(pending)
+        in_flight: Dict[Future, Dict[str, Any]] = {}
+        agent_workers = self.agent_workers
+        if self.provider_batches is not None:
+            # Batched calls park a thread each until their batch ends; give every
+            # running debate's round a thread so all of them land in the same batch.
+            agent_workers = max(agent_workers, self.concurrency * (len(self.options.get("debaters") or []) + 2))
+
+        with ThreadPoolExecutor(max_workers=agent_workers, thread_name_prefix="batch-agent-") as agents, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch-run-") as runner, \
+                open(self.out_path, "a", encoding="utf-8") as handle:
+            while True:
+                while len(in_flight) < self.concurrency and not self._should_stop():
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    in_flight[runner.submit(self._run_item, item, agents)] = item
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    in_flight.pop(future)
+                    self._record(future.result(), handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if self.provider_batches is not None:
+            self.provider_batches.close()
+
+        self.finished_at = time.time()
+        summary = self.status()
+        with open(summary_path(self.out_path), "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+        return summary
+
+    def _should_stop(self) -> bool:
+        if self._cancel.is_set():
+            self.stop_reason = self.stop_reason or "Cancelled."
+            return True
+        if self.max_cost is not None and self.cost >= self.max_cost:
+            self.stop_reason = f"Batch cost cap ${self.max_cost:.2f} reached."
+            return True
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        wall = end - self.started_at if self.started_at else 0.0
+        processed = self.ok + self.failed
+        return {
+            "out": self.out_path,
+            "total": self.total,
+            "skipped": self.skipped,
+            "ok": self.ok,
+            "failed": self.failed,
+            "remaining": self.total - self.skipped - processed,
+            "complete": self.finished_at is not None,
+            "stop_reason": self.stop_reason,
+            "cost_usd": round(self.cost, 6),
+            "wall_s": round(wall, 3),
+            "throughput_per_min": round(processed / wall * 60.0, 2) if wall else 0.0,
+            "latency_s": latency_summary(self.latencies),
+            "rate_limit_wait_s": {p: round(s, 3) for p, s in self.limiter.waited_s.items()},
+            "provider_batches": self.provider_batches.stats() if self.provider_batches is not None else None,
+        }
+
+
+def summary_path(out_path: str) -> str:
+    root, _ = os.path.splitext(out_path)
+    return f"{root}.summary.json"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a JSONL query set through SynapseForge debates.")
+    parser.add_argument("queries", help="JSONL file with one query per line")
+    parser.add_argument("--out", default=None, help="Output JSONL (also the resume checkpoint)")
+    parser.add_argument("--debaters", nargs="+", default=DEFAULT_ROSTER["debaters"])
+    parser.add_argument("--judge", default=DEFAULT_ROSTER["judge"])
+    parser.add_argument("--fact-checker", default="")
+    parser.add_argument("--adversarial", default="")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=0.75, help="Per-debate budget cap")
+    parser.add_argument("--temp", type=float, default=0.2)
+    parser.add_argument("--consensus-threshold", type=float, default=0.55)
+    parser.add_argument("--adaptive-rounds", action="store_true",
+                        help="Treat --rounds as a ceiling and stop once another round is not worth its cost")
+    parser.add_argument("--min-gain-per-dollar", type=float, default=None,
+                        help="Adaptive stop threshold in consensus points per dollar")
+    parser.add_argument("--tiered", action="store_true",
+                        help="Answer with a cheap triage tier first; run the full roster only when it escalates")
+    parser.add_argument("--escalation-threshold", type=float, default=None,
+                        help="Verifier confidence (0-1) below which triage escalates")
+    parser.add_argument("--concurrency", type=int, default=2, help="Debates running at once")
+    parser.add_argument("--agent-workers", type=int, default=8, help="Threads for provider calls")
+    parser.add_argument("--rpm", nargs="*", default=[], help="Requests per minute per provider, e.g. openai=500")
+    parser.add_argument("--provider-concurrency", nargs="*", default=[], help="Calls in flight per provider, e.g. anthropic=4")
+    parser.add_argument("--max-cost", type=float, default=None, help="Stop scheduling once the batch has spent this much")
+    parser.add_argument("--limit", type=int, default=0, help="Only run the first N queries")
+    parser.add_argument("--full-payload", action="store_true", help="Include each run payload in its output row")
+    parser.add_argument("--batch-api", action="store_true",
+                        help="Send OpenAI/Anthropic/local calls through the providers' batch APIs (discounted, slow)")
+    parser.add_argument("--batch-window", type=float, default=5.0, help="Seconds to gather calls into one provider batch")
+    parser.add_argument("--batch-poll", type=float, default=30.0, help="Seconds between provider batch status polls")
+    parser.add_argument("--mock-profile", default="", help="MockProfile JSON or JSON file for mock agents")
+    args = parser.parse_args(argv)
+
+    if args.mock_profile:
+        set_default_mock_profile(MockProfile.parse(args.mock_profile))
+    items = load_queries(args.queries)
+    if args.limit:
+        items = items[: args.limit]
+    options = parse_run_options({
+        "query": "batch",
+        "debaters": args.debaters,
+        "judge": args.judge,
+        "fact_checker": args.fact_checker or None,
+        "adversarial": args.adversarial or None,
+        "rounds": args.rounds,
+        "budget": args.budget,
+        "temp": args.temp,
+        "consensus_threshold": args.consensus_threshold,
+        "adaptive_rounds": args.adaptive_rounds,
+        "min_gain_per_dollar": args.min_gain_per_dollar,
+        "tiered": args.tiered,
+        "escalation_threshold": args.escalation_threshold,
+    })
+    out_path = args.out or os.path.join(BATCH_DIR, os.path.splitext(os.path.basename(args.queries))[0] + ".jsonl")
+    runner = BatchRunner(
+        items, options, out_path,
+        concurrency=args.concurrency,
+        agent_workers=args.agent_workers,
+        limiter=ProviderLimiter(parse_provider_values(args.rpm), parse_provider_values(args.provider_concurrency, int)),
+        max_cost=args.max_cost,
+        include_payload=args.full_payload,
+        provider_batches=ProviderBatches(window_s=args.batch_window, poll_interval_s=args.batch_poll) if args.batch_api else None,
+    )
+    try:
+        summary = runner.run()
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {runner.ok + runner.failed} items; rerun with --out {out_path} to resume.")
+        return 130
+    if run_store.STORE is not None:
+        run_store.STORE.flush()
+
+    print(f"Batch {out_path}: {summary['ok']} ok, {summary['failed']} failed, {summary['skipped']} already done"
+          f" of {summary['total']} in {summary['wall_s']}s ({summary['throughput_per_min']}/min)")
+    print(f"  Cost ${summary['cost_usd']:.4f} | latency p50/p95 {summary['latency_s']['p50']}/{summary['latency_s']['p95']}s"
+          f" | rate-limit waits {summary['rate_limit_wait_s']}")
+    if summary["provider_batches"]:
+        print(f"  Provider batches: {summary['provider_batches']}")
+    if summary["stop_reason"]:
+        print(f"  Stopped: {summary['stop_reason']}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
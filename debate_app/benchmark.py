@@ -0,0 +1,335 @@
+"""
+SynapseForge A/B benchmark harness — single agent vs full collaborative debate.
+
+Reads a JSONL query set, runs a single-agent baseline and the full debate for each
+query concurrently, and writes one `BenchmarkResult` row per query plus a summary
+with latency percentiles, tokens, cost and win/tie/loss counts.
+
+Usage:
+    python -m debate_app.benchmark queries.jsonl --out output/benchmarks/baseline
+    python -m debate_app.benchmark requests.jsonl --debaters "OpenAI GPT-4o mini" \\
+        --judge "OpenAI GPT-4o" --single "OpenAI GPT-4o mini" --concurrency 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .agents.providers import MockProfile, build_agent_from_spec, set_default_mock_profile
+from .core.prompts import DEBATER_SYSTEM_PROMPT
+from .orchestrator import is_error_content, parse_run_options, resolve_spec, run_synthesis
+from .v3_core import BenchmarkResult, QueryClassifier
+
+DEFAULT_ROSTER = {
+    "debaters": ["Mock Skeptic", "Mock Optimist"],
+    "judge": "Mock Judge",
+    "fact_checker": "Mock Fact Checker",
+    "adversarial": "Mock Challenger",
+}
+
+# Confidence gap below which the debate and the baseline count as a tie.
+CONFIDENCE_TIE_BAND = 0.05
+
+_HALLUCINATION_MARKERS = re.compile(r"INCORRECT|❌")
+
+
+# ─── Statistics ─────────────────────────────────────────────────────────────
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0-100); 0.0 for no values."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100.0
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return float(ordered[low])
+    return float(ordered[low] + (ordered[high] - ordered[low]) * (rank - low))
+
+
+def latency_summary(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p90": round(percentile(values, 90), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "mean": round(sum(values) / len(values), 4) if values else 0.0,
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+
+# ─── Query sets ─────────────────────────────────────────────────────────────
+
+def parse_query_row(row: Any, default_id: Union[int, str]) -> Dict[str, Any]:
+    """
+    One query-set item from a row: a plain string, or an object with `query`
+    (or `question`/`prompt`, or a `title`/`body` pair as in requests.jsonl);
+    `id`/`request_id` and an optional `expected` answer are carried through.
+    Raises ValueError when no query text is found.
+    """
+    if isinstance(row, str):
+        row = {"query": row}
+    query = row.get("query") or row.get("question") or row.get("prompt")
+    if not query:
+        query = "\n\n".join(part for part in (row.get("title"), row.get("body")) if part)
+    if not query:
+        raise ValueError("no query/question/prompt/title field.")
+    return {
+        "id": str(row.get("id") or row.get("request_id") or default_id),
+        "query": str(query).strip(),
+        "expected": row.get("expected"),
+    }
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """Load a JSONL query set, one `parse_query_row` item per non-empty line."""
+    items: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(parse_query_row(json.loads(line), line_number))
+            except ValueError as exc:
+                raise ValueError(f"{path}:{line_number}: {exc}") from exc
+    return items
+
+
+# ─── Runners ────────────────────────────────────────────────────────────────
+
+def run_single_agent(query: str, label: str, keys: Dict[str, str], temp: float) -> Dict[str, Any]:
+    """Baseline: one contributor answers once, with no rounds and no judge."""
+    spec = resolve_spec(label, [])
+    if spec is None:
+        raise ValueError(f"Unknown single-agent model: {label}")
+    agent = build_agent_from_spec(spec, DEBATER_SYSTEM_PROMPT, keys, "Single Agent", temp)
+    started = time.perf_counter()
+    response = agent.generate_response(query=query, context="")
+    return {
+        "answer": response.content,
+        "confidence": response.confidence,
+        "cost": response.cost,
+        "tokens": response.token_usage.get("total", 0),
+        "latency_s": time.perf_counter() - started,
+        "is_error": is_error_content(response.content),
+    }
+
+
+def run_debate(options: Dict[str, Any], executor: ThreadPoolExecutor) -> Dict[str, Any]:
+    started = time.perf_counter()
+    payload = run_synthesis(options, executor)
+    latency = time.perf_counter() - started
+
+    triage = payload.get("triage") or {}
+    records = list(triage.get("responses", [])) + [r for rnd in payload["rounds"] for r in rnd["responses"]]
+    judge = payload.get("judge")
+    if judge:
+        records.append(judge)
+
+    consensus_round = 0
+    if payload["stopped_reason"].startswith("Stopped early"):
+        consensus_round = payload["rounds_completed"]
+
+    if payload.get("tier") == 1:
+        # Resolved by triage: no judge, the verifier's confidence stands in for it.
+        is_error = not payload.get("final_answer")
+        confidence = triage.get("verifier_confidence")
+        if confidence is None:
+            confidence = next((r["confidence"] for r in records if r["role"] == "triage" and not r["is_error"]), 0.0)
+    else:
+        is_error = judge is None or judge["is_error"]
+        confidence = judge["confidence"] if judge else 0.0
+
+    verifier_text = " ".join(r["content"] for r in records if r["role"] in ("fact_checker", "triage_verifier"))
+    return {
+        "payload": payload,
+        "answer": payload["final_answer"],
+        "confidence": confidence,
+        "cost": payload["total_cost"],
+        "tokens": sum(r["tokens_total"] for r in records),
+        "latency_s": latency,
+        "consensus_round": consensus_round,
+        "hallucination_flags": len(_HALLUCINATION_MARKERS.findall(verifier_text)),
+        "is_error": is_error,
+    }
+
+
+def _factual_match(answer: str, expected: Optional[str]) -> Optional[bool]:
+    if not expected:
+        return None
+    return str(expected).strip().lower() in (answer or "").lower()
+
+
+def compare_runs(single: Dict[str, Any], debate: Dict[str, Any], expected: Optional[str]) -> str:
+    """
+    better|equal|worse for the debate relative to the baseline: failures first,
+    then expected-answer matches, then judge vs baseline confidence.
+    """
+    if single["is_error"] != debate["is_error"]:
+        return "worse" if debate["is_error"] else "better"
+    single_match = _factual_match(single["answer"], expected)
+    debate_match = _factual_match(debate["answer"], expected)
+    if single_match is not None and single_match != debate_match:
+        return "better" if debate_match else "worse"
+    gap = debate["confidence"] - single["confidence"]
+    if abs(gap) <= CONFIDENCE_TIE_BAND:
+        return "equal"
+    return "better" if gap > 0 else "worse"
+
+
+def benchmark_query(
+    item: Dict[str, Any],
+    options: Dict[str, Any],
+    single_label: str,
+    executor: ThreadPoolExecutor,
+) -> Tuple[BenchmarkResult, Dict[str, Any]]:
+    """Run both modes for one query concurrently and fold them into a BenchmarkResult."""
+    run_options = dict(options, query=item["query"])
+    baseline = executor.submit(run_single_agent, item["query"], single_label, options["keys"], options["temp"])
+    debate = run_debate(run_options, executor)
+    single = baseline.result()
+
+    result = BenchmarkResult(
+        query=item["query"],
+        query_type=QueryClassifier.classify(item["query"]),
+        single_agent_answer=single["answer"],
+        synapse_answer=debate["answer"],
+        factual_match=_factual_match(debate["answer"], item.get("expected")),
+        hallucination_flags=debate["hallucination_flags"],
+        consensus_round=debate["consensus_round"],
+        final_credence=debate["confidence"],
+        cost_usd=debate["cost"],
+        performance_vs_single=compare_runs(single, debate, item.get("expected")),
+        single_agent_cost_usd=single["cost"],
+        single_agent_latency_s=single["latency_s"],
+        synapse_latency_s=debate["latency_s"],
+        single_agent_tokens=single["tokens"],
+        synapse_tokens=debate["tokens"],
+    )
+    return result, debate["payload"]
+
+
+def summarize(results: Sequence[BenchmarkResult], config: Dict[str, Any]) -> Dict[str, Any]:
+    debate_cost = sum(r.cost_usd for r in results)
+    single_cost = sum(r.single_agent_cost_usd for r in results)
+    outcomes = {k: sum(1 for r in results if r.performance_vs_single == k) for k in ("better", "equal", "worse")}
+    consensus_rounds = [r.consensus_round for r in results if r.consensus_round]
+    return {
+        "queries": len(results),
+        "config": config,
+        "latency_s": {
+            "single_agent": latency_summary([r.single_agent_latency_s for r in results]),
+            "synapse": latency_summary([r.synapse_latency_s for r in results]),
+        },
+        "tokens": {
+            "single_agent_total": sum(r.single_agent_tokens for r in results),
+            "synapse_total": sum(r.synapse_tokens for r in results),
+        },
+        "cost_usd": {
+            "single_agent_total": round(single_cost, 6),
+            "synapse_total": round(debate_cost, 6),
+            "synapse_per_query": round(debate_cost / len(results), 6) if results else 0.0,
+        },
+        "outcomes_vs_single": outcomes,
+        "wins_per_dollar": round(outcomes["better"] / debate_cost, 3) if debate_cost > 0 else None,
+        "consensus_rate": round(len(consensus_rounds) / len(results), 3) if results else 0.0,
+        "mean_consensus_round": round(sum(consensus_rounds) / len(consensus_rounds), 2) if consensus_rounds else None,
+        "hallucination_flags": sum(r.hallucination_flags for r in results),
+    }
+
+
+def run_benchmark(
+    queries: Sequence[Dict[str, Any]],
+    options: Dict[str, Any],
+    single_label: str,
+    out_dir: str,
+    concurrency: int = 2,
+    agent_workers: int = 10,
+) -> Dict[str, Any]:
+    """
+    Benchmark every query and write `results.jsonl` and `summary.json` into `out_dir`.
+    Query-level work and agent calls use separate pools so debates cannot starve
+    their own agent calls.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results: List[BenchmarkResult] = []
+    results_path = os.path.join(out_dir, "results.jsonl")
+
+    with ThreadPoolExecutor(max_workers=agent_workers, thread_name_prefix="bench-agent-") as agents, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="bench-query-") as runner, \
+            open(results_path, "w", encoding="utf-8") as handle:
+        futures = [(item, runner.submit(benchmark_query, item, options, single_label, agents)) for item in queries]
+        for item, future in futures:
+            result, _ = future.result()
+            results.append(result)
+            handle.write(json.dumps({"id": item["id"], **result.to_dict()}) + "\n")
+
+    config = {k: v for k, v in options.items() if k not in ("keys", "query")}
+    config["single_agent"] = single_label
+    summary = summarize(results, config)
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as handle:
+        json.dump(summary, handle, indent=2)
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark single-agent vs SynapseForge debate on a JSONL query set.")
+    parser.add_argument("queries", help="JSONL file with one query per line")
+    parser.add_argument("--out", default=os.path.join("output", "benchmarks", time.strftime("%Y%m%d-%H%M%S")))
+    parser.add_argument("--debaters", nargs="+", default=DEFAULT_ROSTER["debaters"])
+    parser.add_argument("--judge", default=DEFAULT_ROSTER["judge"])
+    parser.add_argument("--fact-checker", default=DEFAULT_ROSTER["fact_checker"])
+    parser.add_argument("--adversarial", default=DEFAULT_ROSTER["adversarial"])
+    parser.add_argument("--single", default=None, help="Baseline model label (default: first debater)")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=0.75)
+    parser.add_argument("--temp", type=float, default=0.2)
+    parser.add_argument("--consensus-threshold", type=float, default=0.55)
+    parser.add_argument("--concurrency", type=int, default=2, help="Queries benchmarked at once")
+    parser.add_argument("--agent-workers", type=int, default=10, help="Threads for provider calls")
+    parser.add_argument("--limit", type=int, default=0, help="Only run the first N queries")
+    parser.add_argument("--mock-profile", default="", help="MockProfile JSON or JSON file for mock agents")
+    args = parser.parse_args(argv)
+
+    if args.mock_profile:
+        set_default_mock_profile(MockProfile.parse(args.mock_profile))
+
+    queries = load_queries(args.queries)
+    if args.limit:
+        queries = queries[: args.limit]
+    options = parse_run_options({
+        "query": "benchmark",
+        "debaters": args.debaters,
+        "judge": args.judge,
+        "fact_checker": None if args.fact_checker in ("", "None") else args.fact_checker,
+        "adversarial": None if args.adversarial in ("", "None") else args.adversarial,
+        "rounds": args.rounds,
+        "budget": args.budget,
+        "temp": args.temp,
+        "consensus_threshold": args.consensus_threshold,
+    })
+    single_label = args.single or args.debaters[0]
+
+    summary = run_benchmark(queries, options, single_label, args.out, args.concurrency, args.agent_workers)
+
+    latency = summary["latency_s"]
+    print(f"Benchmarked {summary['queries']} queries -> {args.out}")
+    print(f"  Latency p50/p95 (s): single {latency['single_agent']['p50']}/{latency['single_agent']['p95']}"
+          f" | synapse {latency['synapse']['p50']}/{latency['synapse']['p95']}")
+    print(f"  Cost: single ${summary['cost_usd']['single_agent_total']:.4f}"
+          f" | synapse ${summary['cost_usd']['synapse_total']:.4f}")
+    print(f"  Tokens: single {summary['tokens']['single_agent_total']}"
+          f" | synapse {summary['tokens']['synapse_total']}")
+    print(f"  vs single: {summary['outcomes_vs_single']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
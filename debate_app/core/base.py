@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Union
 from dataclasses import dataclass, field
 import time
 import random
@@ -10,6 +10,7 @@ class AgentResponse:
     token_usage: Dict[str, int] = field(default_factory=lambda: {"input": 0, "output": 0, "total": 0})
     cost: float = 0.0
     model_name: str = "unknown"
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 class Agent:
     def __init__(self, name: str, description: str, system_prompt: str, model: Any):
@@ -27,6 +28,29 @@ class Agent:
         """
         raise NotImplementedError("Subclasses must implement generate_response")
 
+    def generate_response_stream(
+        self, query: str, context: Optional[str] = None
+    ) -> Iterator[Union[str, AgentResponse]]:
+        """
+        Streams a response from the agent.
+        Yields text deltas as they arrive, then exactly one final AgentResponse
+        carrying the full content and usage stats. Agents without native
+        streaming yield their whole completion as a single delta.
+        """
+        response = self.generate_response(query, context)
+        if response.content:
+            yield response.content
+        yield response
+
+    def coalesce_key(self, query: str, context: Optional[str] = None) -> Optional[tuple]:
+        """
+        Hashable identity of the upstream request for (query, context), or None.
+        Concurrent calls with equal keys may share one upstream request, so the key
+        must cover everything that shapes the completion (model, system prompt,
+        messages, temperature, credentials). The default opts out.
+        """
+        return None
+
 class DebateManager:
     def __init__(self, agents: List[Agent], judge_agent: Agent = None, rounds: int = 3, cost_limit: float = 0.5):
         self.agents = agents
@@ -1,29 +1,52 @@
 PRICING_REGISTRY = {
+    # Multipliers on the input price: "batch" for the asynchronous batch APIs,
+    # "cache_read" for prompt tokens served from the provider's prompt cache and
+    # "cache_write" for tokens written to it (Anthropic charges extra for those).
+
     # OpenAI
-    "gpt-4o": {"input": 5.00, "output": 15.00},
-    "gpt-4o-2024-05-13": {"input": 5.00, "output": 15.00},
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+    "gpt-4o": {"input": 5.00, "output": 15.00, "batch": 0.5, "cache_read": 0.5},
+    "gpt-4o-2024-05-13": {"input": 5.00, "output": 15.00, "batch": 0.5, "cache_read": 0.5},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "batch": 0.5, "cache_read": 0.5},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50, "batch": 0.5},
     
-    # Anthropic
-    "claude-3-opus-20240229": {"input": 15.00, "output": 75.00},
-    "claude-3-sonnet-20240229": {"input": 3.00, "output": 15.00},
-    "claude-3-haiku-20240307": {"input": 0.25, "output": 1.25},
+    # Anthropic (Message Batches API, cache_control breakpoints)
+    "claude-3-opus-20240229": {"input": 15.00, "output": 75.00, "batch": 0.5, "cache_read": 0.1, "cache_write": 1.25},
+    "claude-3-sonnet-20240229": {"input": 3.00, "output": 15.00, "batch": 0.5},
+    "claude-3-haiku-20240307": {"input": 0.25, "output": 1.25, "batch": 0.5, "cache_read": 0.1, "cache_write": 1.25},
     
     # Google
-    "gemini-1.5-pro": {"input": 3.50, "output": 10.50}, # Approx per million tokens
-    "gemini-1.5-flash": {"input": 0.35, "output": 1.05},
+    "gemini-1.5-pro": {"input": 3.50, "output": 10.50, "cache_read": 0.25}, # Approx per million tokens
+    "gemini-1.5-flash": {"input": 0.35, "output": 1.05, "cache_read": 0.25},
     "gemini-pro": {"input": 0.50, "output": 1.50}, # Legacy pricing approx
 }
 
-def estimate_cost(model_name: str, input_tokens: int, output_tokens: int) -> float:
+def estimate_cost(
+    model_name: str,
+    input_tokens: int,
+    output_tokens: int,
+    batch: bool = False,
+    cached_input_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
     """
     Returns estimated cost in USD based on model pricing per 1M tokens.
+    `input_tokens` counts every prompt token; the `cached_input_tokens` and
+    `cache_write_tokens` shares of it are priced at the model's cache
+    multipliers. With `batch`, applies the model's batch-API discount (none if
+    it has no batch price).
     """
     pricing = PRICING_REGISTRY.get(model_name)
     if not pricing:
         return 0.0
         
-    cost_in = (input_tokens / 1_000_000) * pricing["input"]
+    cached = min(max(cached_input_tokens, 0), input_tokens)
+    written = min(max(cache_write_tokens, 0), input_tokens - cached)
+    billed_in = (
+        (input_tokens - cached - written)
+        + cached * pricing.get("cache_read", 1.0)
+        + written * pricing.get("cache_write", 1.0)
+    )
+    cost_in = (billed_in / 1_000_000) * pricing["input"]
     cost_out = (output_tokens / 1_000_000) * pricing["output"]
-    return round(cost_in + cost_out, 6)
+    multiplier = pricing.get("batch", 1.0) if batch else 1.0
+    return round((cost_in + cost_out) * multiplier, 6)
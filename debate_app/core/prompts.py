@@ -1,5 +1,7 @@
 # System Prompts for SynapseForge – Collaborative AI Synthesis Engine
 
+from .templates import PromptTemplate
+
 DEBATER_SYSTEM_PROMPT = """
 You are a Specialist Agent in SynapseForge, a multi-model collaborative intelligence platform.
 
@@ -151,11 +153,11 @@ OUTPUT FORMAT:
 SYNAPSEFORGE — Collaborative Synthesis
 ══════════════════════════════════════════════════
 
-QUESTION: {original_question}
+QUESTION: {the original question, restated}
 
 FUSION QUALITY: {0-100}/100
 CONFIDENCE: {0-100}%
-MODELS CONTRIBUTING: {n}
+MODELS CONTRIBUTING: {number of contributing models}
 CONSENSUS LEVEL: {Strong/Moderate/Developing}
 
 ══════════════════════════════════════════════════
@@ -211,3 +213,9 @@ SYNTHESIS PRINCIPLES:
 - Show HOW multi-model collaboration improved the result
 - Be clear, actionable, and comprehensive
 """
+
+# Compiled at import. Only the declared fields are placeholders; other braces
+# ({percentage}, {0-100}, {Agent A, Agent B}) are format hints for the model.
+# The debater and judge prompts have no fields and are sent as they are.
+FACT_CHECKER_TEMPLATE = PromptTemplate(FACT_CHECKER_SYSTEM_PROMPT, ("round_number",), name="fact_checker")
+ADVERSARIAL_TEMPLATE = PromptTemplate(ADVERSARIAL_SYSTEM_PROMPT, ("round_number",), name="adversarial")
@@ -0,0 +1,80 @@
+"""
+Prompt templates compiled once into literal and placeholder segments.
+
+The prompts mix real placeholders such as `{round_number}` with braces meant for
+the model: JSON examples, and format hints like `{0-100}` or `{description}`.
+A `PromptTemplate` declares its real placeholders, and the template checks at
+construction (module import, for the prompts.py templates) that each one occurs
+in the text. The template then splits the text at those placeholders, so
+rendering is a single join. Substituted values are never rescanned, so a query
+that contains `{round_number}` stays literal.
+
+Renders are memoised per template. The inputs (query, round labels) repeat for
+every roster built for the same request.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+RENDER_CACHE_SIZE = 256
+
+
+class PromptTemplate:
+    """A prompt split at its declared `{field}` placeholders."""
+
+    def __init__(self, text: str, fields: Iterable[str] = (), name: str = ""):
+        self.text = text
+        self.name = name
+        self.fields: Tuple[str, ...] = tuple(dict.fromkeys(fields))
+        missing = [f for f in self.fields if "{" + f + "}" not in text]
+        if missing:
+            raise ValueError(f"Prompt template {name or '<unnamed>'} has no placeholder for: {', '.join(missing)}")
+        if self.fields:
+            pattern = "|".join(re.escape("{" + f + "}") for f in self.fields)
+            parts = re.split(f"({pattern})", text)
+            # Odd positions are placeholders ("{field}" -> "field"), even positions literal text.
+            self.segments: Tuple[str, ...] = tuple(
+                part[1:-1] if i % 2 else part for i, part in enumerate(parts)
+            )
+        else:
+            self.segments = (text,)
+        self._render = lru_cache(maxsize=RENDER_CACHE_SIZE)(self._join)
+
+    def render(self, values: Optional[Mapping[str, object]] = None, **kwargs: object) -> str:
+        """
+        Fill the placeholders in one pass. Placeholders without a value are kept
+        verbatim; a value for an undeclared field raises KeyError.
+        """
+        merged: Dict[str, object] = dict(values or {}, **kwargs)
+        unknown = [k for k in merged if k not in self.fields]
+        if unknown:
+            raise KeyError(f"Prompt template {self.name or '<unnamed>'} has no field: {', '.join(unknown)}")
+        if not merged:
+            return self.text
+        return self._render(tuple(str(merged[f]) if f in merged else None for f in self.fields))
+
+    def _join(self, filled: Tuple[Optional[str], ...]) -> str:
+        by_field = dict(zip(self.fields, filled))
+        return "".join(
+            (by_field[part] if by_field[part] is not None else "{" + part + "}") if i % 2 else part
+            for i, part in enumerate(self.segments)
+        )
+
+    def cache_info(self):
+        return self._render.cache_info()
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.name or '<unnamed>'}, fields={self.fields})"
+
+
+@lru_cache(maxsize=64)
+def _compile_adhoc(text: str, keys: Tuple[str, ...]) -> PromptTemplate:
+    return PromptTemplate(text, [k for k in keys if "{" + k + "}" in text])
+
+
+def fill_prompt(template: str, replacements: Dict[str, object]) -> str:
+    """Replace `{key}` placeholders in `template`; keys it does not contain are ignored."""
+    compiled = _compile_adhoc(template, tuple(sorted(replacements)))
+    return compiled.render({k: v for k, v in replacements.items() if k in compiled.fields})
@@ -0,0 +1,146 @@
+"""
+Tiered escalation: cheap triage first, the full debate only when it is needed.
+
+With `"tiered": true` a run starts with a triage tier instead of the full
+roster. The cheapest contributor model answers the query TRIAGE_SAMPLES times
+in parallel, then the cheapest verifier checks those answers. The query is
+resolved at tier 1 when both checks pass:
+
+- Verifier confidence reaches `escalation_threshold`. It is the TEAM
+  RELIABILITY SCORE the verifier reports. When the report has none, each open
+  issue it raises (see `round_control.count_issues`) costs ISSUE_PENALTY.
+- Self-consistency reaches the run's `consensus_threshold`, the same agreement
+  bar the debate uses. It is the consensus score between the samples.
+
+Otherwise the run escalates to tier 2: the full roster debates and the judge
+synthesises as usual, on the budget the triage left. The payload's `tier` says
+which tier resolved the query, and `triage` holds the triage records and the
+assessment.
+
+Triage models default to the cheapest catalog models of the roster's providers
+(`planner.cheapest_model`). `triage_model` and `triage_verifier` override them.
+SYNAPSE_TIERED=1 turns the mode on by default, and SYNAPSE_ESCALATION_THRESHOLD
+sets the default threshold.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from . import planner
+from .agents.providers import MODEL_CATALOG, ModelSpec, build_agent_from_spec
+from .core.base import Agent
+from .core.prompts import DEBATER_SYSTEM_PROMPT, FACT_CHECKER_TEMPLATE
+from .round_control import count_issues
+
+TIERED_ENV = "SYNAPSE_TIERED"
+THRESHOLD_ENV = "SYNAPSE_ESCALATION_THRESHOLD"
+DEFAULT_ESCALATION_THRESHOLD = float(os.getenv(THRESHOLD_ENV, "0.7") or 0.7)
+TRIAGE_SAMPLES = 2
+TRIAGE_TEMPERATURE = 0.7  # floor, so the samples can disagree
+ISSUE_PENALTY = 0.15
+TRIAGE_ROLE = "triage"
+TRIAGE_VERIFIER_ROLE = "triage_verifier"
+
+RELIABILITY_PATTERN = re.compile(r"RELIABILITY SCORE\W*(\d{1,3}(?:\.\d+)?)\s*%", re.IGNORECASE)
+
+_LOOKUP: Dict[str, ModelSpec] = {spec.label: spec for spec in MODEL_CATALOG}
+
+
+def tiered_default() -> bool:
+    return os.getenv(TIERED_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def verifier_confidence(content: str) -> Tuple[float, int]:
+    """(confidence in [0, 1], open issues) from a verifier report."""
+    issues = count_issues([{"role": "fact_checker", "content": content}])["fact_checker"]
+    match = RELIABILITY_PATTERN.search(content)
+    if match:
+        return min(float(match.group(1)) / 100.0, 1.0), issues
+    return max(1.0 - ISSUE_PENALTY * issues, 0.0), issues
+
+
+def _providers(options: Dict[str, Any], specs: Sequence[ModelSpec]) -> List[str]:
+    return list(options.get("providers") or []) or sorted({spec.provider for spec in specs})
+
+
+def pick_models(
+    options: Dict[str, Any], specs: Sequence[ModelSpec], warnings: List[str],
+) -> Tuple[Optional[ModelSpec], Optional[ModelSpec]]:
+    """(contributor, verifier) for triage: requested labels, else the cheapest of the roster's providers."""
+    providers = _providers(options, specs)
+    picked = []
+    for option, role in (("triage_model", "debater"), ("triage_verifier", "fact_checker")):
+        label = options.get(option) or ""
+        spec = _LOOKUP.get(label) if label else None
+        if label and spec is None:
+            warnings.append(f"Unknown {option.replace('_', ' ')}: {label}; using the cheapest available.")
+        picked.append(spec or planner.cheapest_model(role, options["keys"], providers))
+    return picked[0], picked[1]
+
+
+def build_triage(
+    options: Dict[str, Any], specs: Sequence[ModelSpec], warnings: List[str],
+) -> List[Tuple[str, ModelSpec, str, Agent]]:
+    """Roster entries of the triage tier, or [] when there is no model to triage with."""
+    contributor, verifier = pick_models(options, specs, warnings)
+    if contributor is None:
+        warnings.append("Tiered mode: no contributor model for triage; running the full roster.")
+        return []
+    keys, temp = options["keys"], options["temp"]
+    entries = [
+        (TRIAGE_ROLE, contributor, f"Triage {i}",
+         build_agent_from_spec(contributor, DEBATER_SYSTEM_PROMPT, keys, f"Triage {i}", max(temp, TRIAGE_TEMPERATURE)))
+        for i in range(1, TRIAGE_SAMPLES + 1)
+    ]
+    if verifier is None:
+        warnings.append("Tiered mode: no verifier model for triage; only self-consistency is checked.")
+    else:
+        system_prompt = FACT_CHECKER_TEMPLATE.render(round_number="{round}")
+        entries.append((TRIAGE_VERIFIER_ROLE, verifier, "Triage Verifier",
+                        build_agent_from_spec(verifier, system_prompt, keys, "Triage Verifier", temp)))
+    return entries
+
+
+def assess(
+    samples: Sequence[Dict[str, Any]],
+    verifier: Optional[Dict[str, Any]],
+    self_consistency: float,
+    consensus_threshold: float,
+    escalation_threshold: float,
+) -> Dict[str, Any]:
+    """Whether the triage answer stands or the query escalates, with the inputs of that decision."""
+    confidence = issues = None
+    if verifier is not None and not verifier.get("is_error"):
+        confidence, issues = verifier_confidence(str(verifier.get("content", "")))
+    answered = [r for r in samples if not r.get("is_error")]
+
+    if not answered:
+        escalate, reason = True, "triage answers failed"
+    elif verifier is not None and confidence is None:
+        escalate, reason = True, "triage verifier failed"
+    elif confidence is not None and confidence < escalation_threshold:
+        escalate, reason = True, f"verifier confidence {confidence:.0%} below {escalation_threshold:.0%}"
+    elif len(answered) > 1 and self_consistency < consensus_threshold:
+        escalate, reason = True, f"self-consistency {self_consistency:.0%} below {consensus_threshold:.0%}"
+    else:
+        escalate, reason = False, "verifier confidence and self-consistency passed"
+
+    return {
+        "escalate": escalate,
+        "reason": reason,
+        "self_consistency": round(self_consistency, 4),
+        "verifier_confidence": None if confidence is None else round(confidence, 4),
+        "verifier_issues": issues,
+        "escalation_threshold": escalation_threshold,
+    }
+
+
+def pick_answer(samples: Sequence[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The triage answer served at tier 1: the first sample that did not fail."""
+    return next((r for r in samples if not r.get("is_error")), None)
+
+
+def settings(escalation_threshold: float) -> Dict[str, Any]:
+    return {"tiered": True, "escalation_threshold": escalation_threshold}
@@ -0,0 +1,318 @@
+"""
+Process-wide Prometheus metrics for SynapseForge.
+
+A small dependency-free implementation of counters, gauges and histograms
+rendered in the Prometheus text exposition format (version 0.0.4), served by
+`/metrics` in server.py. The orchestrator records every finished run through
+`record_run`; server.py wires executor gauges to live callbacks.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+SCORING_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the (unlabelled) value from `function` at scrape time."""
+        self._function = function
+
+    def value(self, **labels: Any) -> float:
+        if self._function is not None:
+            return float(self._function())
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets)) + (math.inf,)
+        # label values -> [per-bucket counts..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return int(series[-1]) if series else 0
+
+    def mean(self, **labels: Any) -> Optional[float]:
+        """Average observed value for these labels, or None before the first observation."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[-2] / series[-1] if series and series[-1] else None
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines: List[str] = []
+        for key, series in items:
+            cumulative = 0.0
+            for index, bound in enumerate(self.buckets):
+                cumulative += series[index]
+                le = 'le="' + ("+Inf" if math.isinf(bound) else _format_value(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PROVIDER_LATENCY = REGISTRY.register(Histogram(
+    "synapse_provider_latency_seconds", "Provider call latency.", ("provider", "model"), LATENCY_BUCKETS,
+))
+PROVIDER_TTFT = REGISTRY.register(Histogram(
+    "synapse_provider_ttft_seconds", "Time to first streamed token.", ("provider", "model"), LATENCY_BUCKETS,
+))
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "synapse_executor_queue_wait_seconds", "Time agent calls waited for a worker thread.", (), SCORING_BUCKETS + (5.0, 10.0),
+))
+ROUND_DURATION = REGISTRY.register(Histogram(
+    "synapse_round_duration_seconds", "Wall time of one debate round.", (), LATENCY_BUCKETS,
+))
+JUDGE_DURATION = REGISTRY.register(Histogram(
+    "synapse_judge_duration_seconds", "Wall time of the judge synthesis.", (), LATENCY_BUCKETS,
+))
+SCORING_DURATION = REGISTRY.register(Histogram(
+    "synapse_scoring_duration_seconds", "Consensus and SAM-AI scoring time.", ("kind",), SCORING_BUCKETS,
+))
+TOKENS_PER_CALL = REGISTRY.register(Histogram(
+    "synapse_tokens_per_call", "Tokens per provider call.", ("provider", "model", "direction"), TOKEN_BUCKETS,
+))
+COST = REGISTRY.register(Counter(
+    "synapse_cost_usd_total", "Estimated provider spend in USD.", ("provider", "model"),
+))
+AGENT_ERRORS = REGISTRY.register(Counter(
+    "synapse_agent_errors_total", "Failed agent calls by error class.", ("provider", "error_class"),
+))
+CACHE_HITS = REGISTRY.register(Counter(
+    "synapse_cache_hits_total", "Cache hits by cache.", ("cache",),
+))
+BUDGET_STOPS = REGISTRY.register(Counter(
+    "synapse_budget_stops_total", "Runs cut short by their budget cap.",
+))
+RUNS = REGISTRY.register(Counter(
+    "synapse_runs_total", "Finished runs by outcome.", ("outcome",),
+))
+TIER_RESOLUTIONS = REGISTRY.register(Counter(
+    "synapse_tier_resolutions_total", "Tiered runs by the tier that resolved them.", ("tier",),
+))
+ACTIVE_DEBATES = REGISTRY.register(Gauge(
+    "synapse_active_debates", "Debates currently running.",
+))
+EXECUTOR_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "synapse_executor_queue_depth", "Agent calls waiting for a worker thread.",
+))
+EXECUTOR_BUSY = REGISTRY.register(Gauge(
+    "synapse_executor_busy_threads", "Agent worker threads currently running a call.",
+))
+
+
+def classify_error(content: str) -> str:
+    """Coarse error class for an `Error: ...` response."""
+    text = (content or "").lower()
+    if "429" in text or "rate limit" in text or "rate_limit" in text:
+        return "rate_limit"
+    if "timeout" in text or "timed out" in text:
+        return "timeout"
+    if "api key" in text or "401" in text or "403" in text or "authentication" in text:
+        return "auth"
+    if "unavailable" in text or "connection" in text:
+        return "unavailable"
+    if "500" in text or "502" in text or "503" in text or "internal" in text:
+        return "server"
+    return "other"
+
+
+def record_call(record: Dict[str, Any]) -> None:
+    """Record one response record built by `orchestrator.build_record`."""
+    provider, model = record.get("provider", "unknown"), record.get("model", "unknown")
+    timings = record.get("timings") or {}
+    if record.get("is_error"):
+        # Errors are counted, not timed: an instant "missing key" reply would skew latency.
+        AGENT_ERRORS.inc(provider=provider, error_class=classify_error(str(record.get("content", ""))))
+        return
+    if timings.get("provider_ms") is not None:
+        PROVIDER_LATENCY.observe(timings["provider_ms"] / 1000.0, provider=provider, model=model)
+    if timings.get("ttft_ms") is not None:
+        PROVIDER_TTFT.observe(timings["ttft_ms"] / 1000.0, provider=provider, model=model)
+    if timings.get("queue_ms") is not None:
+        QUEUE_WAIT.observe(timings["queue_ms"] / 1000.0)
+    if timings.get("truth_ms") is not None:
+        SCORING_DURATION.observe(timings["truth_ms"] / 1000.0, kind="truth")
+    TOKENS_PER_CALL.observe(record.get("tokens_input", 0), provider=provider, model=model, direction="input")
+    TOKENS_PER_CALL.observe(record.get("tokens_output", 0), provider=provider, model=model, direction="output")
+    if record.get("tokens_cached"):
+        TOKENS_PER_CALL.observe(record["tokens_cached"], provider=provider, model=model, direction="cached_input")
+    if record.get("cost"):
+        COST.inc(record["cost"], provider=provider, model=model)
+
+
+def record_run(payload: Dict[str, Any], budget_stopped: bool = False) -> None:
+    """Record every call, round and the judge of a finished `run_collaboration` payload."""
+    for record in (payload.get("triage") or {}).get("responses", []):
+        record_call(record)
+    if payload.get("tier"):
+        TIER_RESOLUTIONS.inc(tier=str(payload["tier"]))
+    for log in payload.get("rounds", []):
+        for record in log.get("responses", []):
+            record_call(record)
+        timings = log.get("timings") or {}
+        if "wall_ms" in timings:
+            ROUND_DURATION.observe(timings["wall_ms"] / 1000.0)
+        if "consensus_ms" in timings:
+            SCORING_DURATION.observe(timings["consensus_ms"] / 1000.0, kind="consensus")
+    if payload.get("judge"):
+        record_call(payload["judge"])
+        JUDGE_DURATION.observe((payload.get("timings") or {}).get("judge_ms", 0.0) / 1000.0)
+    if budget_stopped:
+        BUDGET_STOPS.inc()
+    answered = payload.get("judge") or payload.get("tier") == 1
+    outcome = "budget_stopped" if budget_stopped else ("completed" if answered else "failed")
+    RUNS.inc(outcome=outcome)
+
+
+def render() -> str:
+    return REGISTRY.render()
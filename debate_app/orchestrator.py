@@ -0,0 +1,727 @@
+"""
+Collaborative synthesis orchestration shared by the Flask server and offline tools.
+
+`build_roster` turns a run request into agents, and `run_collaboration` drives the
+parallel rounds and the final synthesis. When a `StreamingDebateManager` is passed,
+agents are called through `generate_response_stream` so token deltas reach the
+client as they arrive; consensus and truth scoring still run on finalised text only.
+"""
+from __future__ import annotations
+
+import re
+import time
+from concurrent.futures import Executor, as_completed
+from itertools import combinations
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .agents import coalescing
+from .agents.providers import (
+    MODEL_CATALOG,
+    PROVIDER_LABELS,
+    ModelSpec,
+    build_agent_from_spec,
+    build_custom_model_spec,
+)
+from .core.base import Agent, AgentResponse
+from .core.prompts import (
+    ADVERSARIAL_TEMPLATE,
+    DEBATER_SYSTEM_PROMPT,
+    FACT_CHECKER_TEMPLATE,
+    JUDGE_SYSTEM_PROMPT,
+)
+from .core.templates import fill_prompt  # noqa: F401  (re-exported for server.py and the benchmarks)
+from . import escalation, metrics, planner, profiling, round_control, tracing
+from .streaming import StreamingDebateManager
+
+MODEL_LOOKUP: Dict[str, ModelSpec] = {spec.label: spec for spec in MODEL_CATALOG}
+
+MAX_CONTEXT_CHARS = 18000
+
+RosterEntry = Tuple[str, ModelSpec, str, Agent]
+TruthScorer = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+# ─── Helpers ────────────────────────────────────────────────────────────────
+
+def consensus_score(texts: Sequence[str]) -> float:
+    token_sets = [
+        set(re.findall(r"[a-zA-Z]{4,}", text.lower())[:120])
+        for text in texts if text
+    ]
+    if len(token_sets) < 2:
+        return 0.0
+    scores: List[float] = []
+    for left, right in combinations(token_sets, 2):
+        union = left | right
+        if union:
+            scores.append(len(left & right) / len(union))
+    return float(sum(scores) / len(scores)) if scores else 0.0
+
+
+def trim_text(value: str, limit: int = 650) -> str:
+    text = (value or "").strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + " ..."
+
+
+def extend_context(context: str, round_number: int, responses: Sequence[Dict[str, Any]]) -> str:
+    """Append a round's responses to the rolling transcript, keeping the newest MAX_CONTEXT_CHARS."""
+    context_block = "\n".join(f"{r['agent']} ({r['role']}): {r['content']}" for r in responses)
+    context = (context + f"\n\nRound {round_number}\n" + context_block).strip()
+    if len(context) > MAX_CONTEXT_CHARS:
+        context = context[-MAX_CONTEXT_CHARS:]
+    return context
+
+
+def elapsed_ms(since: float, until: Optional[float] = None) -> float:
+    """Milliseconds between two `time.perf_counter()` readings (until defaults to now)."""
+    return round(((until if until is not None else time.perf_counter()) - since) * 1000.0, 1)
+
+
+def is_error_content(content: object) -> bool:
+    return str(content).strip().lower().startswith("error:")
+
+
+# ─── Roster construction ────────────────────────────────────────────────────
+
+def parse_run_options(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate and clamp a run request body. Raises ValueError for a missing query."""
+    query = (data.get("query") or "").strip()
+    if not query:
+        raise ValueError("Query is required.")
+    return {
+        "query": query,
+        "debaters": list(data.get("debaters") or []),
+        "judge": data.get("judge", ""),
+        "fact_checker": data.get("fact_checker", ""),
+        "adversarial": data.get("adversarial", ""),
+        "rounds": max(1, min(int(data.get("rounds", 3)), 8)),
+        "budget": max(0.01, float(data.get("budget", 0.75))),
+        "temp": max(0.0, min(float(data.get("temp", 0.2)), 1.0)),
+        "consensus_threshold": max(0.1, min(float(data.get("consensus_threshold", 0.55)), 0.99)),
+        "keys": data.get("keys", {}) or {},
+        "auto_roster": bool(data.get("auto_roster")),
+        "providers": list(data.get("providers") or []),
+        "adaptive_rounds": bool(data.get("adaptive_rounds", round_control.adaptive_default())),
+        "min_gain_per_dollar": (
+            max(0.0, float(data["min_gain_per_dollar"])) if data.get("min_gain_per_dollar") is not None else None
+        ),
+        "tiered": bool(data.get("tiered", escalation.tiered_default())),
+        "escalation_threshold": (
+            max(0.0, min(float(data["escalation_threshold"]), 1.0)) if data.get("escalation_threshold") is not None else None
+        ),
+        "triage_model": data.get("triage_model", ""),
+        "triage_verifier": data.get("triage_verifier", ""),
+    }
+
+
+def resolve_spec(item: object, warnings: List[str]) -> Optional[ModelSpec]:
+    if not item:
+        return None
+    if isinstance(item, dict):
+        try:
+            return build_custom_model_spec(
+                provider=item.get("provider", "openai"),
+                model_id=item.get("model_id", ""),
+                label=item.get("label") or f"Custom {item.get('model_id', '')}",
+            )
+        except Exception as e:
+            warnings.append(str(e))
+            return None
+    return MODEL_LOOKUP.get(str(item))
+
+
+def apply_roster_plan(options: Dict[str, Any], warnings: List[str]) -> Dict[str, Any]:
+    """
+    Replace the requested models with a planned roster (`auto_roster` mode).
+    The plan is written back into `options` so the answer cache and run records
+    see the concrete models; an explicitly requested judge is kept.
+    """
+    judge_spec = resolve_spec(options["judge"], warnings) if options["judge"] else None
+    plan = planner.plan_roster(
+        options["query"], options["rounds"], options["budget"], options["keys"],
+        providers=options.get("providers") or (), judge=judge_spec, max_context_chars=MAX_CONTEXT_CHARS,
+    )
+    options.update(
+        debaters=list(plan.debaters),
+        fact_checker=plan.fact_checker,
+        adversarial=plan.adversarial,
+        judge=options["judge"] or plan.judge,
+        plan=plan.to_dict(),
+    )
+    warnings.extend(plan.warnings)
+    return options["plan"]
+
+
+def build_roster(options: Dict[str, Any]) -> Tuple[List[RosterEntry], ModelSpec, Agent, List[str]]:
+    """
+    Build the contributor/verifier/stress-tester roster and the judge for a run.
+    Returns (roster, judge_spec, judge, warnings). Raises ValueError when the
+    judge is unknown or no contributor could be built. With `auto_roster`, the
+    models are planned first (see `apply_roster_plan`).
+    """
+    keys = options["keys"]
+    temp = options["temp"]
+    roster: List[RosterEntry] = []
+    warnings: List[str] = []
+    if options.get("auto_roster"):
+        apply_roster_plan(options, warnings)
+
+    for i, item in enumerate(options["debaters"], start=1):
+        spec = resolve_spec(item, warnings)
+        if not spec:
+            warnings.append(f"Unknown or invalid contributor model: {item}")
+            continue
+        agent = build_agent_from_spec(spec, DEBATER_SYSTEM_PROMPT, keys, f"Contributor {i}", temp)
+        roster.append(("debater", spec, f"Contributor {i}", agent))
+
+    fact_spec = resolve_spec(options["fact_checker"], warnings)
+    if fact_spec:
+        agent = build_agent_from_spec(
+            fact_spec,
+            FACT_CHECKER_TEMPLATE.render(round_number="{round}"),
+            keys, "Verifier", temp,
+        )
+        roster.append(("fact_checker", fact_spec, "Verifier", agent))
+
+    adv_spec = resolve_spec(options["adversarial"], warnings)
+    if adv_spec:
+        agent = build_agent_from_spec(
+            adv_spec,
+            ADVERSARIAL_TEMPLATE.render(round_number="{round}"),
+            keys, "Stress Tester", temp,
+        )
+        roster.append(("adversarial", adv_spec, "Stress Tester", agent))
+
+    judge_spec = resolve_spec(options["judge"], warnings)
+    if not judge_spec:
+        raise ValueError(f"Unknown judge model: {options['judge']}")
+
+    # The judge's system prompt stays free of run data so providers can cache it;
+    # the question and roster size travel in the synthesis request instead.
+    judge = build_agent_from_spec(judge_spec, JUDGE_SYSTEM_PROMPT, keys, "Synthesizer", max(temp - 0.05, 0.0))
+
+    if not roster:
+        raise ValueError("At least one contributor model is required.")
+
+    return roster, judge_spec, judge, warnings
+
+
+def build_triage(
+    options: Dict[str, Any], roster: List[RosterEntry], judge_spec: ModelSpec, warnings: List[str],
+) -> Optional[List[RosterEntry]]:
+    """The triage tier for a `tiered` run (see `escalation`), or None when the run is not tiered."""
+    if not options.get("tiered"):
+        return None
+    specs = [spec for _, spec, _, _ in roster] + [judge_spec]
+    return escalation.build_triage(options, specs, warnings) or None
+
+
+# ─── Agent calls ────────────────────────────────────────────────────────────
+
+def call_agent(
+    agent: Agent,
+    query: str,
+    context: str,
+    stream: Optional[StreamingDebateManager] = None,
+    round_number: int = 0,
+    name: str = "",
+    role: str = "",
+) -> AgentResponse:
+    """Call an agent, forwarding streamed deltas to `stream` when one is attached."""
+    return timed_call_agent(None, agent, query, context, stream, round_number, name, role)[0]
+
+
+def timed_call_agent(
+    submitted_at: Optional[float],
+    agent: Agent,
+    query: str,
+    context: str,
+    stream: Optional[StreamingDebateManager] = None,
+    round_number: int = 0,
+    name: str = "",
+    role: str = "",
+    coalesce: bool = True,
+) -> Tuple[AgentResponse, Dict[str, Any]]:
+    """
+    `call_agent` plus monotonic timings in ms: `queue_ms` since `submitted_at`
+    (the executor submit), `provider_ms` for the call itself and, when
+    streaming, `ttft_ms` to the first delta. Identical calls already in flight
+    are joined rather than repeated unless `coalesce` is False.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, Any] = {
+        "queue_ms": elapsed_ms(submitted_at, started) if submitted_at is not None else 0.0,
+        "provider_ms": 0.0,
+        "ttft_ms": None,
+    }
+    with profiling.thread_scope(), tracing.span("agent_call", agent=name, role=role, round=round_number) as call_span:
+        final = None
+        for item in coalescing.generate(agent, query, context, streaming=stream is not None, coalesce=coalesce):
+            if isinstance(item, AgentResponse):
+                final = item
+            elif item and stream is not None:
+                if timings["ttft_ms"] is None:
+                    timings["ttft_ms"] = elapsed_ms(started)
+                stream.emit_agent_delta(round_number, name, role, item)
+        if final is None:
+            final = AgentResponse(content="Error: stream ended without a final response.", confidence=0.0)
+        timings["provider_ms"] = elapsed_ms(started)
+        call_span.set_attributes(
+            model=final.model_name,
+            tokens=final.token_usage.get("total", 0),
+            cost=final.cost,
+            error=is_error_content(final.content),
+            coalesced="coalesced" in final.metadata,
+            **timings,
+        )
+    return final, timings
+
+
+def build_record(
+    result: AgentResponse,
+    spec: ModelSpec,
+    name: str,
+    role: str,
+    round_number: Optional[int] = None,
+    timings: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    record: Dict[str, Any] = {}
+    if round_number is not None:
+        record["round"] = round_number
+    record.update({
+        "agent": name,
+        "role": role,
+        "provider": PROVIDER_LABELS.get(spec.provider, spec.provider),
+        "model": spec.model_id,
+        "confidence": result.confidence,
+        "cost": result.cost,
+        "tokens_input": result.token_usage.get("input", 0),
+        "tokens_output": result.token_usage.get("output", 0),
+        "tokens_total": result.token_usage.get("total", 0),
+        "tokens_cached": result.token_usage.get("cached_input", 0),
+        "content": result.content,
+        "is_error": is_error_content(result.content),
+        "timings": dict(timings or {}),
+    })
+    if "coalesced" in result.metadata:
+        record["coalesced"] = dict(result.metadata["coalesced"])
+    return record
+
+
+# ─── Orchestration ──────────────────────────────────────────────────────────
+
+def run_collaboration(
+    query: str,
+    roster: List[RosterEntry],
+    judge_spec: ModelSpec,
+    judge: Agent,
+    rounds: int,
+    budget: float,
+    consensus_threshold: float,
+    executor: Executor,
+    warnings: Optional[List[str]] = None,
+    stream: Optional[StreamingDebateManager] = None,
+    score_truth: Optional[TruthScorer] = None,
+    record_metrics: bool = True,
+    coalesce: bool = True,
+    adaptive_rounds: bool = False,
+    min_gain_per_dollar: Optional[float] = None,
+    triage: Optional[List[RosterEntry]] = None,
+    escalation_threshold: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Run collaborative rounds in parallel on `executor`, then the judge synthesis.
+    Returns the run payload served by `/api/run`. Replays pass
+    `record_metrics=False` so they stay out of the provider metrics;
+    `coalesce=False` keeps every provider call to this run's own. With
+    `adaptive_rounds`, `rounds` is an upper bound and a `RoundController`
+    decides after each round whether another is worth its cost. With a
+    `triage` tier (see `build_triage`), the debate only runs when triage
+    escalates.
+    """
+    metrics.ACTIVE_DEBATES.inc()
+    try:
+        with tracing.span("run", query=trim_text(query, 120), rounds=rounds, agents=len(roster)) as run_span:
+            if triage:
+                payload = _run_tiered(
+                    query, triage, roster, judge_spec, judge, rounds, budget, consensus_threshold,
+                    executor, warnings, stream, score_truth, coalesce, adaptive_rounds, min_gain_per_dollar,
+                    escalation.DEFAULT_ESCALATION_THRESHOLD if escalation_threshold is None else float(escalation_threshold),
+                )
+            else:
+                payload = _run_collaboration(
+                    query, roster, judge_spec, judge, rounds, budget, consensus_threshold,
+                    executor, warnings, stream, score_truth, coalesce,
+                    round_control.controller_for(adaptive_rounds, rounds, budget, consensus_threshold, min_gain_per_dollar),
+                )
+            run_span.set_attributes(
+                rounds_completed=payload["rounds_completed"],
+                total_cost=payload["total_cost"],
+                stopped_reason=payload["stopped_reason"],
+            )
+            if run_span.trace_id:
+                payload["trace_id"] = run_span.trace_id
+    finally:
+        metrics.ACTIVE_DEBATES.dec()
+    if record_metrics:
+        metrics.record_run(payload, budget_stopped=payload["total_cost"] >= budget)
+    return payload
+
+
+def _run_triage(
+    query: str,
+    triage: List[RosterEntry],
+    consensus_threshold: float,
+    escalation_threshold: float,
+    executor: Executor,
+    stream: Optional[StreamingDebateManager],
+    coalesce: bool = True,
+) -> Dict[str, Any]:
+    """
+    Tier 1: the triage samples in parallel, then the verifier over them.
+    Returns the records, their cost and timings, and the `escalation.assess` decision.
+    """
+    started = time.perf_counter()
+    samples = [entry for entry in triage if entry[0] == escalation.TRIAGE_ROLE]
+    verifiers = [entry for entry in triage if entry[0] == escalation.TRIAGE_VERIFIER_ROLE]
+    with tracing.span("triage", samples=len(samples), verifier=bool(verifiers)) as triage_span:
+        # Samples never coalesce: identical requests would share one completion.
+        futures = {
+            executor.submit(
+                tracing.wrap(timed_call_agent),
+                time.perf_counter(), agent, query, "", stream, 0, name, role, False,
+            ): (role, spec, name)
+            for role, spec, name, agent in samples
+        }
+        records: List[Dict[str, Any]] = []
+        for future in as_completed(futures):
+            role, spec, name = futures[future]
+            try:
+                result, timings = future.result(timeout=coalescing.CALL_TIMEOUT_S)
+            except Exception as e:
+                result = AgentResponse(content=f"Error: Agent {name} failed - {str(e)}", confidence=0.0, model_name=spec.model_id)
+                timings = {"queue_ms": None, "provider_ms": elapsed_ms(started), "ttft_ms": None}
+            records.append(build_record(result, spec, name, role, timings=timings))
+            if stream:
+                stream.emit_agent_response(0, name, role, result.content, result.cost, result.confidence)
+        records.sort(key=lambda r: r["agent"])
+        answers = [r["content"] for r in records if not r["is_error"]]
+        self_consistency = consensus_score(answers)
+
+        verifier_record = None
+        if verifiers and answers:
+            role, spec, name, agent = verifiers[0]
+            result, timings = timed_call_agent(
+                None, agent, query, extend_context("", 1, records), stream, 0, name, role, coalesce,
+            )
+            verifier_record = build_record(result, spec, name, role, timings=timings)
+            records.append(verifier_record)
+            if stream:
+                stream.emit_agent_response(0, name, role, result.content, result.cost, result.confidence)
+
+        decision = escalation.assess(
+            [r for r in records if r["role"] == escalation.TRIAGE_ROLE],
+            verifier_record, self_consistency, consensus_threshold, escalation_threshold,
+        )
+        cost = sum(r["cost"] for r in records)
+        triage_span.set_attributes(escalate=decision["escalate"], reason=decision["reason"], cost=round(cost, 6))
+    return {
+        "responses": records,
+        "cost": round(cost, 6),
+        **decision,
+        "timings": {"wall_ms": elapsed_ms(started)},
+    }
+
+
+def _run_tiered(
+    query: str,
+    triage: List[RosterEntry],
+    roster: List[RosterEntry],
+    judge_spec: ModelSpec,
+    judge: Agent,
+    rounds: int,
+    budget: float,
+    consensus_threshold: float,
+    executor: Executor,
+    warnings: Optional[List[str]],
+    stream: Optional[StreamingDebateManager],
+    score_truth: Optional[TruthScorer],
+    coalesce: bool,
+    adaptive_rounds: bool,
+    min_gain_per_dollar: Optional[float],
+    escalation_threshold: float,
+) -> Dict[str, Any]:
+    """Triage first; escalate to `_run_collaboration` on the remaining budget only when triage fails."""
+    warnings = warnings if warnings is not None else []
+    run_started = time.perf_counter()
+    result = _run_triage(query, triage, consensus_threshold, escalation_threshold, executor, stream, coalesce)
+    if not result["escalate"]:
+        answer = escalation.pick_answer(result["responses"])
+        if stream:
+            stream.emit_synthesis_complete(answer["content"], result["cost"])
+        payload = {
+            "query": query,
+            "rounds_requested": rounds,
+            "rounds_completed": 0,
+            "rounds": [],
+            "judge": None,
+            "total_cost": result["cost"],
+            "stopped_reason": f"Resolved at tier 1: {result['reason']}.",
+            "final_answer": answer["content"],
+            "warnings": warnings,
+            "settings": {"budget": budget, "consensus_threshold": consensus_threshold},
+            "timings": summarize_timings([], 0.0, elapsed_ms(run_started)),
+        }
+    else:
+        remaining = max(budget - result["cost"], 0.0)
+        payload = _run_collaboration(
+            query, roster, judge_spec, judge, rounds, remaining, consensus_threshold,
+            executor, warnings, stream, score_truth, coalesce,
+            round_control.controller_for(adaptive_rounds, rounds, remaining, consensus_threshold, min_gain_per_dollar),
+        )
+        payload["total_cost"] = round(payload["total_cost"] + result["cost"], 6)
+        payload["settings"]["budget"] = budget
+        payload["timings"]["total_ms"] = elapsed_ms(run_started)
+    payload["tier"] = 2 if result["escalate"] else 1
+    payload["triage"] = result
+    payload["settings"].update(escalation.settings(escalation_threshold))
+    return payload
+
+
+def _run_collaboration(
+    query: str,
+    roster: List[RosterEntry],
+    judge_spec: ModelSpec,
+    judge: Agent,
+    rounds: int,
+    budget: float,
+    consensus_threshold: float,
+    executor: Executor,
+    warnings: Optional[List[str]],
+    stream: Optional[StreamingDebateManager],
+    score_truth: Optional[TruthScorer],
+    coalesce: bool = True,
+    controller: Optional[round_control.RoundController] = None,
+) -> Dict[str, Any]:
+    warnings = warnings if warnings is not None else []
+    run_started = time.perf_counter()
+    logs: List[Dict] = []
+    context = ""
+    total_cost = 0.0
+    stop_reason = "Configured rounds completed."
+    fatal_failure = False
+
+    for round_number in range(1, rounds + 1):
+        if total_cost >= budget:
+            stop_reason = f"Stopped before round {round_number}: budget reached."
+            break
+
+        with tracing.span("round", round=round_number) as round_span:
+            if stream:
+                stream.emit_round_start(round_number)
+            round_started = time.perf_counter()
+            responses: List[Dict] = []
+            truth_ms = 0.0
+
+            # PARALLEL EXECUTION: Submit all agents to the executor
+            futures = {}
+            for role, spec, name, agent in roster:
+                if total_cost >= budget:
+                    stop_reason = f"Budget reached in round {round_number}."
+                    break
+                future = executor.submit(
+                    tracing.wrap(timed_call_agent),
+                    time.perf_counter(), agent, query, context, stream, round_number, name, role, coalesce,
+                )
+                futures[future] = (role, spec, name, agent)
+
+            # Collect results as they complete (non-blocking)
+            for future in as_completed(futures):
+                if total_cost >= budget:
+                    break
+
+                role, spec, name, agent = futures[future]
+                try:
+                    result, timings = future.result(timeout=coalescing.CALL_TIMEOUT_S)
+                except Exception as e:
+                    result_content = f"Error: Agent {name} failed - {str(e)}"
+                    result = AgentResponse(content=result_content, confidence=0.0, model_name=spec.model_id)
+                    timings = {"queue_ms": None, "provider_ms": elapsed_ms(round_started), "ttft_ms": None}
+
+                record = build_record(result, spec, name, role, round_number, timings)
+
+                # Compute SAM-AI truth level for each debater response
+                if score_truth and role == "debater" and not record["is_error"]:
+                    scoring_started = time.perf_counter()
+                    with tracing.span("truth_scoring", agent=name, round=round_number):
+                        truth = score_truth(record)
+                    record["timings"]["truth_ms"] = elapsed_ms(scoring_started)
+                    truth_ms += record["timings"]["truth_ms"]
+                    if truth:
+                        record["truth_level"] = truth
+
+                responses.append(record)
+                total_cost += result.cost
+                if stream:
+                    stream.emit_agent_response(round_number, name, role, result.content, result.cost, result.confidence)
+                if record["is_error"]:
+                    warnings.append(f"{name} failed in round {round_number}: {trim_text(str(result.content), 180)}")
+
+            if not responses:
+                break
+
+            round_cost = sum(r["cost"] for r in responses)
+
+            if all(r["is_error"] for r in responses):
+                stop_reason = f"Stopped at round {round_number}: all agents returned errors."
+                logs.append({
+                    "round": round_number,
+                    "responses": responses,
+                    "round_cost": round_cost,
+                    "consensus": 0.0,
+                    "timings": {"wall_ms": elapsed_ms(round_started), "truth_ms": truth_ms, "consensus_ms": 0.0, "context_ms": 0.0},
+                })
+                if stream:
+                    stream.emit_round_complete(round_number, 0.0, round_cost)
+                fatal_failure = True
+                break
+
+            debater_texts = [r["content"] for r in responses if r["role"] == "debater"]
+            scoring_started = time.perf_counter()
+            with tracing.span("consensus_scoring", texts=len(debater_texts)):
+                round_consensus = consensus_score(debater_texts)
+            consensus_ms = elapsed_ms(scoring_started)
+            round_span.set_attributes(consensus=round(round_consensus, 4), cost=round(round_cost, 6))
+
+            context_started = time.perf_counter()
+            context = extend_context(context, round_number, responses)
+            round_timings = {
+                "wall_ms": elapsed_ms(round_started),
+                "truth_ms": round(truth_ms, 1),
+                "consensus_ms": consensus_ms,
+                "context_ms": elapsed_ms(context_started),
+            }
+            logs.append({
+                "round": round_number,
+                "responses": responses,
+                "round_cost": round_cost,
+                "consensus": round_consensus,
+                "timings": round_timings,
+            })
+            if stream:
+                stream.emit_round_complete(round_number, round_consensus, round_cost)
+
+            if controller is not None:
+                decision = controller.decide(logs, total_cost)
+                logs[-1]["control"] = decision
+                round_span.set_attributes(control=decision["reason"])
+                if decision["stop"] and round_number < rounds:
+                    if decision["reason"] == "consensus threshold":
+                        stop_reason = f"Stopped early at round {round_number}: consensus {round_consensus:.0%}."
+                    else:
+                        stop_reason = f"Stopped adaptively at round {round_number}: {decision['reason']}."
+                    break
+            elif round_number >= 2 and round_consensus >= consensus_threshold:
+                stop_reason = f"Stopped early at round {round_number}: consensus {round_consensus:.0%}."
+                break
+
+    # ─── Judge synthesis ───
+    judge_record = None
+    judge_ms = 0.0
+    final_answer = "No final synthesis generated."
+
+    if total_cost < budget and not fatal_failure:
+        if stream:
+            stream.emit_synthesis_start()
+        judge_query = (
+            f"Original question: {query}\nModels contributing: {len(roster)}\n\n"
+            f"Collaborative transcript:\n{context}\n\n"
+            "Deliver one final synthesized answer with rationale, uncertainties, and practical next actions."
+        )
+        judge_started = time.perf_counter()
+        with tracing.span("judge", model=judge_spec.model_id):
+            verdict, judge_timings = timed_call_agent(
+                None, judge, judge_query, "", stream, 0, "Synthesizer", "judge", coalesce,
+            )
+        judge_ms = elapsed_ms(judge_started)
+        total_cost += verdict.cost
+        judge_record = build_record(verdict, judge_spec, "Synthesizer", "judge", timings=judge_timings)
+        final_answer = verdict.content
+        if judge_record["is_error"]:
+            warnings.append(f"Synthesizer failed: {trim_text(str(verdict.content), 180)}")
+        if stream:
+            stream.emit_synthesis_complete(final_answer, total_cost)
+    else:
+        if fatal_failure:
+            final_answer = "Synthesis stopped because all agents returned errors. Check your API keys."
+        else:
+            stop_reason = f"Stopped after rounds: budget cap ${budget:.2f} exhausted."
+
+    return {
+        "query": query,
+        "rounds_requested": rounds,
+        "rounds_completed": len(logs),
+        "rounds": logs,
+        "judge": judge_record,
+        "total_cost": round(total_cost, 6),
+        "stopped_reason": stop_reason,
+        "final_answer": final_answer,
+        "warnings": warnings,
+        "settings": {
+            "budget": budget,
+            "consensus_threshold": consensus_threshold,
+            **(controller.settings() if controller is not None else {}),
+        },
+        "timings": summarize_timings(logs, judge_ms, elapsed_ms(run_started)),
+    }
+
+
+def summarize_timings(logs: List[Dict[str, Any]], judge_ms: float, total_ms: float) -> Dict[str, Any]:
+    """Run-level `timings`: where the wall time went, plus the slowest provider call."""
+    rounds = [log.get("timings") or {} for log in logs]
+    calls = [r for log in logs for r in log["responses"] if r.get("timings")]
+    slowest = max(calls, key=lambda r: r["timings"].get("provider_ms") or 0.0, default=None)
+    ttfts = [r["timings"]["ttft_ms"] for r in calls if r["timings"].get("ttft_ms") is not None]
+    return {
+        "total_ms": total_ms,
+        "rounds_ms": round(sum(t.get("wall_ms", 0.0) for t in rounds), 1),
+        "judge_ms": judge_ms,
+        "truth_ms": round(sum(t.get("truth_ms", 0.0) for t in rounds), 1),
+        "consensus_ms": round(sum(t.get("consensus_ms", 0.0) for t in rounds), 1),
+        "context_ms": round(sum(t.get("context_ms", 0.0) for t in rounds), 1),
+        "queue_ms": round(sum(r["timings"].get("queue_ms") or 0.0 for r in calls), 1),
+        "provider_ms": round(sum(r["timings"].get("provider_ms") or 0.0 for r in calls), 1),
+        "first_token_ms": min(ttfts) if ttfts else None,
+        "slowest_call": {
+            "agent": slowest["agent"],
+            "round": slowest.get("round"),
+            "provider_ms": slowest["timings"]["provider_ms"],
+        } if slowest else None,
+    }
+
+
+def run_synthesis(
+    options: Dict[str, Any],
+    executor: Executor,
+    stream: Optional[StreamingDebateManager] = None,
+    score_truth: Optional[TruthScorer] = None,
+) -> Dict[str, Any]:
+    """Build the roster for `options` (see `parse_run_options`) and run it."""
+    roster, judge_spec, judge, warnings = build_roster(options)
+    return run_collaboration(
+        options["query"],
+        roster,
+        judge_spec,
+        judge,
+        rounds=options["rounds"],
+        budget=options["budget"],
+        consensus_threshold=options["consensus_threshold"],
+        adaptive_rounds=options.get("adaptive_rounds", False),
+        min_gain_per_dollar=options.get("min_gain_per_dollar"),
+        triage=build_triage(options, roster, judge_spec, warnings),
+        escalation_threshold=options.get("escalation_threshold"),
+        executor=executor,
+        warnings=warnings,
+        stream=stream,
+        score_truth=score_truth,
+    )
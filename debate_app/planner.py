@@ -0,0 +1,241 @@
+"""
+Automatic roster planning from the query type, model latency and price.
+
+With `"auto_roster": true` a run request does not need to name its models.
+`plan_roster` classifies the query with `QueryClassifier` and takes the role
+counts it recommends. Factual and creative queries get no stress tester, for
+example, which saves one agent call per round. It then picks models from
+`MODEL_CATALOG` by their `role_hints`.
+
+Candidates come from providers with a key in the request or the environment.
+Local counts when LOCAL_OPENAI_BASE_URL is set. Mocks are used only when
+nothing else is configured, or when `providers` asks for them.
+
+Agents in a round run in parallel, so a round takes as long as its slowest
+call. The planner tries each candidate latency as a ceiling and takes the
+cheapest eligible models under it. It keeps the fastest plan whose expected
+cost fits the budget, then the cheaper one on ties. If no plan fits, it keeps
+the cheapest plan and adds a warning.
+
+Latency is the observed mean of synapse_provider_latency_seconds once a model
+has MIN_OBSERVATIONS calls, and a per-provider prior before that. Prices come
+from PRICING_REGISTRY. Commercial models missing from it are priced as
+UNLISTED_PRICE_AS rather than as free.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import metrics
+from .agents.providers import (
+    LOCAL_BASE_URL_ENV,
+    MODEL_CATALOG,
+    PROVIDER_LABELS,
+    ModelSpec,
+    normalize_provider,
+    resolve_provider_key,
+)
+from .core.pricing import PRICING_REGISTRY, estimate_cost
+from .v3_core import QueryClassifier
+
+MIN_OBSERVATIONS = 3
+PRIOR_LATENCY_S = {
+    "mock": 0.2,
+    "local": 1.0,
+    "openai": 5.0,
+    "google": 5.0,
+    "anthropic": 6.0,
+    "grok": 6.0,
+    "openrouter": 7.0,
+}
+DEFAULT_PRIOR_LATENCY_S = 6.0
+FAST_MODEL_HINTS = ("mini", "flash", "haiku", "3.5")
+FAST_MODEL_FACTOR = 0.5
+PROMPT_TOKENS = 700  # system prompt plus question
+OUTPUT_TOKENS = 450
+CHARS_PER_TOKEN = 4
+UNLISTED_PRICE_AS = "gpt-4o"
+# The roster has a single verifier slot and a single stress-tester slot.
+ROLE_SLOTS = (("verifiers", "fact_checker"), ("stress_testers", "adversarial"))
+
+
+@dataclass
+class ModelEstimate:
+    spec: ModelSpec
+    latency_s: float
+    output_tokens: float
+    observed: bool
+
+    @property
+    def label(self) -> str:
+        return self.spec.label
+
+
+@dataclass
+class RosterPlan:
+    query_type: str
+    roles: Dict[str, int]
+    debaters: List[str]
+    fact_checker: str
+    adversarial: str
+    judge: str
+    expected_latency_s: float
+    expected_cost: float
+    budget: float
+    within_budget: bool
+    models: List[Dict[str, Any]] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _configured(provider: str, keys: Optional[Dict[str, str]]) -> bool:
+    if provider == "mock":
+        return False
+    if provider == "local":
+        return bool(os.getenv(LOCAL_BASE_URL_ENV, "").strip())
+    return bool(resolve_provider_key(provider, keys))
+
+
+def candidate_specs(keys: Optional[Dict[str, str]] = None, providers: Iterable[str] = ()) -> List[ModelSpec]:
+    """Catalog models the planner may use: `providers` if given, else configured providers, else mocks."""
+    allowed = {normalize_provider(p) for p in providers or ()}
+    if allowed:
+        return [spec for spec in MODEL_CATALOG if spec.provider in allowed]
+    configured = [spec for spec in MODEL_CATALOG if _configured(spec.provider, keys)]
+    return configured or [spec for spec in MODEL_CATALOG if spec.provider == "mock"]
+
+
+def estimate_model(spec: ModelSpec) -> ModelEstimate:
+    """Expected latency and output length of one call, observed when there is enough history."""
+    labels = {"provider": PROVIDER_LABELS.get(spec.provider, spec.provider), "model": spec.model_id}
+    observed = metrics.PROVIDER_LATENCY.count(**labels) >= MIN_OBSERVATIONS
+    if observed:
+        latency = metrics.PROVIDER_LATENCY.mean(**labels)
+    else:
+        latency = PRIOR_LATENCY_S.get(spec.provider, DEFAULT_PRIOR_LATENCY_S)
+        if any(hint in spec.model_id.lower() for hint in FAST_MODEL_HINTS):
+            latency *= FAST_MODEL_FACTOR
+    output = OUTPUT_TOKENS
+    if metrics.TOKENS_PER_CALL.count(direction="output", **labels) >= MIN_OBSERVATIONS:
+        output = metrics.TOKENS_PER_CALL.mean(direction="output", **labels)
+    return ModelEstimate(spec=spec, latency_s=float(latency), output_tokens=float(output), observed=observed)
+
+
+def _call_cost(estimate: ModelEstimate, input_tokens: float) -> float:
+    model = estimate.spec.model_id
+    if model not in PRICING_REGISTRY and estimate.spec.provider not in ("mock", "local"):
+        model = UNLISTED_PRICE_AS
+    return estimate_cost(model, int(input_tokens), int(estimate.output_tokens))
+
+
+def cheapest_model(role: str, keys: Optional[Dict[str, str]] = None, providers: Iterable[str] = ()) -> Optional[ModelSpec]:
+    """The cheapest, then fastest, candidate for a single `role` call, or None when there is none."""
+    pool = [estimate_model(spec) for spec in candidate_specs(keys, providers) if role in spec.role_hints]
+    if not pool:
+        return None
+    return min(pool, key=lambda e: (_call_cost(e, PROMPT_TOKENS), e.latency_s, e.label)).spec
+
+
+def _cheapest(pool: Sequence[ModelEstimate], costs: Dict[str, float], ceiling: float, count: int) -> List[ModelEstimate]:
+    eligible = sorted((e for e in pool if e.latency_s <= ceiling), key=lambda e: (costs[e.label], e.latency_s, e.label))
+    return eligible[:count]
+
+
+def plan_roster(
+    query: str,
+    rounds: int,
+    budget: float,
+    keys: Optional[Dict[str, str]] = None,
+    providers: Iterable[str] = (),
+    judge: Optional[ModelSpec] = None,
+    max_context_chars: int = 18000,
+) -> RosterPlan:
+    """Pick contributor, verifier, stress-tester and (unless given) judge models for `query`."""
+    query_type = QueryClassifier.classify(query)
+    roles = QueryClassifier.get_roles_for_type(query_type)
+    warnings: List[str] = []
+    specs = candidate_specs(keys, providers)
+    pools = {
+        role: [estimate_model(spec) for spec in specs if role in spec.role_hints]
+        for role in ("debater", "fact_checker", "adversarial", "judge")
+    }
+    if not pools["debater"]:
+        raise ValueError("Auto roster found no contributor models for the configured providers.")
+
+    wanted = {"debater": roles["contributors"]}
+    for count_key, role in ROLE_SLOTS:
+        wanted[role] = min(roles[count_key], 1)
+        if roles[count_key] > 1:
+            warnings.append(f"Auto roster: {query_type.value} queries suggest {roles[count_key]} {count_key}; the roster runs one.")
+        if wanted[role] and not pools[role]:
+            warnings.append(f"Auto roster: no {role} model available; running without one.")
+            wanted[role] = 0
+    if wanted["debater"] > len(pools["debater"]):
+        warnings.append(f"Auto roster: only {len(pools['debater'])} distinct contributor models available; reusing some.")
+
+    # Each round's prompt carries the transcript so far; the judge sees all of it.
+    agents = sum(wanted.values())
+    context_cap = max_context_chars / CHARS_PER_TOKEN
+    round_inputs = [PROMPT_TOKENS + min((r - 1) * agents * OUTPUT_TOKENS, context_cap) for r in range(1, rounds + 1)]
+    judge_input = PROMPT_TOKENS + min(rounds * agents * OUTPUT_TOKENS, context_cap)
+    run_costs = {e.label: sum(_call_cost(e, tokens) for tokens in round_inputs)
+                 for role in ("debater", "fact_checker", "adversarial") for e in pools[role]}
+    judge_pool = [estimate_model(judge)] if judge is not None else pools["judge"]
+    if not judge_pool:
+        raise ValueError("Auto roster found no judge model for the configured providers.")
+    judge_costs = {e.label: _call_cost(e, judge_input) for e in judge_pool}
+
+    best: Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]] = None
+    ceilings = sorted({e.latency_s for role in ("debater", "fact_checker", "adversarial") for e in pools[role]})
+    for ceiling in ceilings:
+        debaters = _cheapest(pools["debater"], run_costs, ceiling, wanted["debater"])
+        if len(debaters) < min(wanted["debater"], len(pools["debater"])):
+            continue
+        picks = {"debater": [debaters[i % len(debaters)] for i in range(wanted["debater"])]}
+        for _, role in ROLE_SLOTS:
+            picks[role] = _cheapest(pools[role], run_costs, ceiling, wanted[role])
+        if any(len(picks[role]) < wanted[role] for _, role in ROLE_SLOTS):
+            continue
+        chosen = [e for role in picks for e in picks[role]]
+        round_latency = max(e.latency_s for e in chosen)
+        round_cost = sum(run_costs[e.label] for e in chosen)
+        for judge_estimate in judge_pool:
+            cost = round_cost + judge_costs[judge_estimate.label]
+            latency = rounds * round_latency + judge_estimate.latency_s
+            within = cost <= budget
+            # Fastest plan within budget; failing that, the cheapest one.
+            key = (0, latency, cost) if within else (1, cost, latency)
+            if best is None or key < best[0]:
+                best = (key, {"picks": picks, "judge": judge_estimate, "latency": latency, "cost": cost, "within": within})
+
+    if best is None:
+        raise ValueError("Auto roster could not fill the roster for the configured providers.")
+    choice = best[1]
+    if not choice["within"]:
+        warnings.append(f"Auto roster: cheapest roster is expected to cost ${choice['cost']:.4f}, over the ${budget:.2f} budget.")
+    picks = choice["picks"]
+    models = [
+        {"role": role, "label": e.label, "latency_s": round(e.latency_s, 3), "observed": e.observed, "cost": round(run_costs[e.label], 6)}
+        for role in picks for e in picks[role]
+    ]
+    judge_estimate = choice["judge"]
+    models.append({"role": "judge", "label": judge_estimate.label, "latency_s": round(judge_estimate.latency_s, 3),
+                   "observed": judge_estimate.observed, "cost": round(judge_costs[judge_estimate.label], 6)})
+    return RosterPlan(
+        query_type=query_type.value,
+        roles={"contributors": wanted["debater"], "verifiers": wanted["fact_checker"], "stress_testers": wanted["adversarial"]},
+        debaters=[e.label for e in picks["debater"]],
+        fact_checker=picks["fact_checker"][0].label if picks["fact_checker"] else "",
+        adversarial=picks["adversarial"][0].label if picks["adversarial"] else "",
+        judge=judge_estimate.label,
+        expected_latency_s=round(choice["latency"], 3),
+        expected_cost=round(choice["cost"], 6),
+        budget=budget,
+        within_budget=choice["within"],
+        models=models,
+        warnings=warnings,
+    )
@@ -0,0 +1,217 @@
+"""
+Opt-in sampling profiler for real requests.
+
+While a request is profiled, a sampler thread reads `sys._current_frames()`
+every few milliseconds for the threads doing that request's work: the
+request thread plus executor threads running its agent calls (they join via
+`thread_scope()`, which finds the profiler through contextvars copied by
+`tracing.wrap`). Nothing is traced per call, so overhead stays in the low
+percent range and other requests are untouched.
+
+Each profile is saved under output/profiles/ as collapsed stacks
+(`<run_id>.collapsed`, for flamegraph.pl / speedscope) and as a speedscope
+JSON file (`<run_id>.speedscope.json`, one lane per thread).
+
+Enable per request with `"profile": true` in the body or `?profile=1`, or
+sample a share of all traffic with SYNAPSE_PROFILE_RATE (0-1).
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PROFILE_DIR = os.getenv("SYNAPSE_PROFILE_DIR", os.path.join("output", "profiles"))
+PROFILE_RATE = float(os.getenv("SYNAPSE_PROFILE_RATE", "0") or 0)
+PROFILE_INTERVAL_MS = float(os.getenv("SYNAPSE_PROFILE_INTERVAL_MS", "5") or 5)
+MAX_STACK_DEPTH = 128
+
+Frame = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads on a background thread."""
+
+    def __init__(self, name: str, interval: float = PROFILE_INTERVAL_MS / 1000.0):
+        self.name = name
+        self.interval = interval
+        self.samples: Counter = Counter()  # (thread name, stack root-first) -> count
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def add_thread(self, thread: Optional[threading.Thread] = None) -> None:
+        thread = thread or threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+
+    def remove_thread(self, thread: Optional[threading.Thread] = None) -> None:
+        thread = thread or threading.current_thread()
+        with self._lock:
+            self._threads.pop(thread.ident, None)
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.name[:8]}", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._sampler:
+            self._sampler.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        with self._lock:
+            threads = dict(self._threads)
+        if not threads:
+            return
+        frames = sys._current_frames()
+        for ident, thread_name in threads.items():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack: List[Frame] = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[(thread_name, tuple(stack))] += 1
+        self.sample_count += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: `thread;outer;...;inner count` per line."""
+        lines = []
+        for (thread_name, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+            frames = [thread_name] + [f"{name} ({_short_path(path)}:{line})" for name, path, line in stack]
+            lines.append(";".join(frame.replace(";", ":") for frame in frames) + f" {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self) -> Dict[str, Any]:
+        """speedscope.app file with one sampled profile per thread."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        by_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        for (thread_name, stack), count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": _short_path(frame[1]), "line": frame[2]})
+                indices.append(frame_index[frame])
+            samples, weights = by_thread.setdefault(thread_name, ([], []))
+            samples.append(indices)
+            weights.append(round(count * self.interval, 6))
+        profiles = [
+            {
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }
+            for thread_name, (samples, weights) in sorted(by_thread.items())
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"SynapseForge {self.name}",
+            "exporter": "synapseforge.profiling",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def save(self, directory: str = PROFILE_DIR) -> Dict[str, str]:
+        os.makedirs(directory, exist_ok=True)
+        paths = profile_paths(self.name, directory)
+        with open(paths["collapsed"], "w", encoding="utf-8") as handle:
+            handle.write(self.collapsed())
+        with open(paths["speedscope"], "w", encoding="utf-8") as handle:
+            json.dump(self.speedscope(), handle)
+        return paths
+
+
+def _short_path(path: str) -> str:
+    """Trim site-packages / repo prefixes so frame names stay readable."""
+    for marker in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    try:
+        return os.path.relpath(path)
+    except ValueError:
+        return path
+
+
+def profile_paths(run_id: str, directory: str = PROFILE_DIR) -> Dict[str, str]:
+    return {
+        "collapsed": os.path.join(directory, f"{run_id}.collapsed"),
+        "speedscope": os.path.join(directory, f"{run_id}.speedscope.json"),
+    }
+
+
+_ACTIVE_PROFILER: contextvars.ContextVar[Optional[SamplingProfiler]] = contextvars.ContextVar(
+    "synapse_profiler", default=None
+)
+
+
+def should_profile(flag: Any = None) -> bool:
+    """True when the request asked for it, or when it falls in the sampled share."""
+    if isinstance(flag, str):
+        flag = flag.strip().lower() in ("1", "true", "yes", "on")
+    if flag:
+        return True
+    return PROFILE_RATE > 0 and random.random() < PROFILE_RATE
+
+
+@contextmanager
+def profile(run_id: str, enabled: bool = True, directory: Optional[str] = None) -> Iterator[Optional[SamplingProfiler]]:
+    """Profile the current thread (and executor work it submits) for the block; save on exit."""
+    if not enabled:
+        yield None
+        return
+    profiler = SamplingProfiler(run_id)
+    profiler.add_thread()
+    token = _ACTIVE_PROFILER.set(profiler)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _ACTIVE_PROFILER.reset(token)
+        try:
+            profiler.save(directory or PROFILE_DIR)
+        except OSError as exc:
+            print(f"[WARN] Could not save profile {run_id}: {exc}")
+
+
+@contextmanager
+def thread_scope() -> Iterator[None]:
+    """Include the current thread in the active profile (if any) while the block runs."""
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        yield
+        return
+    profiler.add_thread()
+    try:
+        yield
+    finally:
+        profiler.remove_thread()
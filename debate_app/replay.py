@@ -0,0 +1,258 @@
+"""
+Deterministic replay of recorded debates.
+
+`replay_run` rebuilds a stored run's roster with `ReplayAgent`s that answer
+from the recorded responses (after the recorded provider latency, or
+immediately), then runs the real orchestration: SAM-AI truth scoring,
+consensus, context building and the judge prompt all execute as they would in
+production. With zero latency the run's wall time is the CPU cost of the
+orchestration itself, so two commits can be compared on the same production
+transcript without spending on providers.
+
+The replayed payload is checked against the original (rounds, stop reason,
+consensus, cost, final answer); any difference is listed in `mismatches`.
+
+    python -m debate_app.replay <run_id> --latency zero --repeat 5
+    python -m debate_app.replay synapse_run.json --latency original
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .agents.providers import MODEL_CATALOG, PROVIDER_LABELS, ModelSpec
+from .core.base import Agent, AgentResponse
+from .orchestrator import RosterEntry, TruthScorer, parse_run_options, run_collaboration
+
+REPLAY_LATENCIES = ("original", "zero")
+ROLE_ORDER = ("debater", "fact_checker", "adversarial")
+_PROVIDER_KEYS = {label: key for key, label in PROVIDER_LABELS.items()}
+
+
+class ReplayAgent(Agent):
+    """Serves one agent's recorded responses in call order."""
+
+    def __init__(self, name: str, records: List[Dict[str, Any]], latency: str = "zero"):
+        if latency not in REPLAY_LATENCIES:
+            raise ValueError(f"Unknown replay latency '{latency}'. Use one of {REPLAY_LATENCIES}.")
+        super().__init__(name=name, description="Recorded responses", system_prompt="", model=None)
+        self.latency = latency
+        self._records: Deque[Dict[str, Any]] = deque(records)
+
+    def _next(self) -> Optional[Dict[str, Any]]:
+        return self._records.popleft() if self._records else None
+
+    def generate_response(self, query: str, context: Optional[str] = None) -> AgentResponse:
+        record = self._next()
+        if record is None:
+            return AgentResponse(content=f"Error: no recorded response left for {self.name}.", confidence=0.0)
+        if self.latency == "original":
+            time.sleep(((record.get("timings") or {}).get("provider_ms") or 0.0) / 1000.0)
+        tokens_input = int(record.get("tokens_input") or 0)
+        tokens_output = int(record.get("tokens_output") or 0)
+        return AgentResponse(
+            content=str(record.get("content", "")),
+            confidence=float(record.get("confidence") or 0.0),
+            token_usage={
+                "input": tokens_input,
+                "output": tokens_output,
+                "total": int(record.get("tokens_total") or tokens_input + tokens_output),
+            },
+            cost=float(record.get("cost") or 0.0),
+            model_name=str(record.get("model", "unknown")),
+        )
+
+
+def _spec_for(record: Dict[str, Any]) -> ModelSpec:
+    """The catalog spec a record was produced by, or an equivalent ad-hoc one."""
+    model_id = str(record.get("model", "unknown"))
+    provider = _PROVIDER_KEYS.get(str(record.get("provider", "")), str(record.get("provider", "mock")).lower())
+    for spec in MODEL_CATALOG:
+        if spec.model_id == model_id and spec.provider == provider:
+            return spec
+    return ModelSpec(label=f"Replay {model_id}", provider=provider, model_id=model_id)
+
+
+def _roster_key(role: str, name: str) -> Tuple[int, int, str]:
+    number = re.search(r"(\d+)$", name)
+    rank = ROLE_ORDER.index(role) if role in ROLE_ORDER else len(ROLE_ORDER)
+    return rank, int(number.group(1)) if number else 0, name
+
+
+def replay_roster(payload: Dict[str, Any], latency: str = "zero") -> Tuple[List[RosterEntry], ModelSpec, Agent]:
+    """(roster, judge_spec, judge) serving the recorded responses of `payload`."""
+    per_agent: Dict[str, List[Dict[str, Any]]] = {}
+    roles: Dict[str, str] = {}
+    for log in sorted(payload.get("rounds", []), key=lambda log: log.get("round", 0)):
+        for record in log.get("responses", []):
+            per_agent.setdefault(record["agent"], []).append(record)
+            roles.setdefault(record["agent"], record.get("role", "debater"))
+    if not per_agent and not (payload.get("triage") or {}).get("responses"):
+        raise ValueError("The run has no recorded responses to replay.")
+
+    roster: List[RosterEntry] = [
+        (roles[name], _spec_for(records[0]), name, ReplayAgent(name, records, latency))
+        for name, records in sorted(per_agent.items(), key=lambda item: _roster_key(roles[item[0]], item[0]))
+    ]
+    judge_record = payload.get("judge") or {}
+    judge_spec = _spec_for(judge_record) if judge_record else (roster[0][1] if roster else _spec_for({}))
+    judge = ReplayAgent("Synthesizer", [judge_record] if judge_record else [], latency)
+    return roster, judge_spec, judge
+
+
+def replay_triage(payload: Dict[str, Any], latency: str = "zero") -> Optional[List[RosterEntry]]:
+    """The triage tier of a tiered run, serving its recorded responses, or None."""
+    records = (payload.get("triage") or {}).get("responses") or []
+    if not records:
+        return None
+    return [
+        (record.get("role", "triage"), _spec_for(record), record["agent"], ReplayAgent(record["agent"], [record], latency))
+        for record in records
+    ]
+
+
+def compare_runs(original: Dict[str, Any], replayed: Dict[str, Any]) -> List[str]:
+    """Human-readable differences between a recorded run and its replay."""
+    mismatches: List[str] = []
+    for key in ("rounds_completed", "stopped_reason", "final_answer", "tier"):
+        if original.get(key) != replayed.get(key):
+            mismatches.append(f"{key}: {str(original.get(key))[:80]!r} -> {str(replayed.get(key))[:80]!r}")
+    if abs(float(original.get("total_cost") or 0.0) - float(replayed.get("total_cost") or 0.0)) > 1e-9:
+        mismatches.append(f"total_cost: {original.get('total_cost')} -> {replayed.get('total_cost')}")
+    replayed_rounds = {log.get("round"): log for log in replayed.get("rounds", [])}
+    for log in original.get("rounds", []):
+        other = replayed_rounds.get(log.get("round"))
+        if other is None:
+            continue
+        if abs(float(log.get("consensus") or 0.0) - float(other.get("consensus") or 0.0)) > 1e-9:
+            mismatches.append(f"round {log['round']} consensus: {log.get('consensus')} -> {other.get('consensus')}")
+        agents = sorted(r["agent"] for r in log.get("responses", []))
+        if agents != sorted(r["agent"] for r in other.get("responses", [])):
+            mismatches.append(f"round {log['round']} agents differ")
+    return mismatches
+
+
+def replay_run(
+    payload: Dict[str, Any],
+    latency: str = "zero",
+    executor: Optional[Executor] = None,
+    score_truth: Optional[TruthScorer] = None,
+) -> Dict[str, Any]:
+    """
+    Re-run the orchestration of a recorded `payload` against its recorded
+    responses. Returns the replayed payload, its timings, the process CPU time
+    spent (`cpu_ms`, all threads) and the `mismatches` against the original.
+    """
+    roster, judge_spec, judge = replay_roster(payload, latency)
+    triage = replay_triage(payload, latency)
+    defaults = parse_run_options({"query": payload.get("query") or "replay"})
+    settings = {
+        "budget": defaults["budget"],
+        "consensus_threshold": defaults["consensus_threshold"],
+        **(payload.get("settings") or {}),
+    }
+    rounds = int(payload.get("rounds_requested") or payload.get("rounds_completed") or len(payload.get("rounds", [])))
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(len(roster), len(triage or ()), 1), thread_name_prefix="replay-")
+    cpu_started = time.process_time()
+    try:
+        replayed = run_collaboration(
+            payload.get("query", ""), roster, judge_spec, judge,
+            rounds=rounds,
+            budget=float(settings["budget"]),
+            consensus_threshold=float(settings["consensus_threshold"]),
+            executor=executor,
+            adaptive_rounds=bool(settings.get("adaptive_rounds")),
+            min_gain_per_dollar=settings.get("min_gain_per_dollar"),
+            triage=triage if settings.get("tiered") else None,
+            escalation_threshold=settings.get("escalation_threshold"),
+            warnings=[],
+            score_truth=score_truth,
+            record_metrics=False,
+        )
+    finally:
+        cpu_ms = round((time.process_time() - cpu_started) * 1000.0, 1)
+        if own_executor:
+            executor.shutdown(wait=True)
+    return {
+        "source_run_id": payload.get("run_id"),
+        "latency": latency,
+        "cpu_ms": cpu_ms,
+        "timings": replayed["timings"],
+        "mismatches": compare_runs(payload, replayed),
+        "payload": replayed,
+    }
+
+
+def _sam_ai_truth_scorer() -> Optional[TruthScorer]:
+    """compute_truth_level adapted to a response record, when SAM-AI is installed."""
+    try:
+        from integration.sam_bridge import compute_truth_level
+    except Exception:
+        return None
+
+    def score(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return compute_truth_level(str(record.get("content", "")), float(record.get("confidence", 0.5)))
+        except Exception as exc:
+            return {"error": str(exc), "truth_score": 0, "reliability_rating": "UNKNOWN"}
+
+    return score
+
+
+def load_payload(source: str, store_path: Optional[str] = None) -> Dict[str, Any]:
+    """A run payload from a JSON file, or by run id from the run store."""
+    if os.path.exists(source):
+        with open(source, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    from . import run_store
+
+    store = run_store.RunStore(store_path) if store_path else run_store.STORE
+    payload = store.get_run(source) if store is not None else None
+    if payload is None:
+        raise ValueError(f"No stored run or payload file named '{source}'.")
+    return payload
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded debate against its recorded responses.")
+    parser.add_argument("run", help="Run id in the run store, or a payload JSON file")
+    parser.add_argument("--store", default=None, help="Run store path (default: $SYNAPSE_RUN_STORE)")
+    parser.add_argument("--latency", choices=REPLAY_LATENCIES, default="zero")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay this many times and report each")
+    parser.add_argument("--no-sam-ai", action="store_true", help="Skip SAM-AI truth scoring")
+    parser.add_argument("--out", default=None, help="Write the last replay report as JSON")
+    args = parser.parse_args(argv)
+
+    payload = load_payload(args.run, args.store)
+    score_truth = None if args.no_sam_ai else _sam_ai_truth_scorer()
+    print(f"Replaying {payload.get('run_id') or args.run}: {payload.get('query', '')[:70]!r} "
+          f"({payload.get('rounds_completed')} rounds, latency={args.latency}, "
+          f"SAM-AI {'on' if score_truth else 'off'})")
+    report: Dict[str, Any] = {}
+    for attempt in range(1, max(1, args.repeat) + 1):
+        report = replay_run(payload, latency=args.latency, score_truth=score_truth)
+        timings = report["timings"]
+        print(
+            f"  #{attempt}: total {timings['total_ms']:.1f} ms, cpu {report['cpu_ms']:.1f} ms | "
+            f"truth {timings['truth_ms']:.1f} consensus {timings['consensus_ms']:.1f} "
+            f"context {timings['context_ms']:.1f} judge {timings['judge_ms']:.1f} ms"
+        )
+    for mismatch in report["mismatches"]:
+        print(f"  MISMATCH {mismatch}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, default=str)
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""
+Adaptive round control: stop a debate once another round is not worth its cost.
+
+With a fixed `rounds`, the only early exit is consensus reaching the threshold
+after round 2. `RoundController` decides after every round whether to run
+another one. It estimates the expected gain of the next round in consensus
+points from three inputs:
+
+- The consensus trajectory. The last increase, damped by how fast increases
+  have been shrinking, predicts the next one.
+- Open issues the verifier and stress tester still raise (contradictions,
+  missing sources, counterpoints, edge cases). A share of them, based on how
+  fast they have been resolved so far, is expected to be fixed by another round.
+- The remaining budget. The next round is expected to cost what the last one
+  did, grown by the longer transcript, and the judge's synthesis must still fit.
+
+The debate stops when the expected gain is below `min_gain`, or below
+`min_gain_per_dollar` per dollar for paid models. It also stops when consensus
+reaches the threshold or the budget cannot cover another round plus the judge.
+Every decision, with its inputs, is returned for the round's `control` entry in
+the run payload. `rounds` stays the upper bound. Round 1 always continues (if
+`rounds` allows), because there is no trajectory yet.
+
+Enable per request with `"adaptive_rounds": true`, or by default with
+SYNAPSE_ADAPTIVE_ROUNDS=1. SYNAPSE_MIN_GAIN_PER_DOLLAR sets the default
+threshold.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, Optional, Sequence
+
+ADAPTIVE_ENV = "SYNAPSE_ADAPTIVE_ROUNDS"
+MIN_GAIN_PER_DOLLAR_ENV = "SYNAPSE_MIN_GAIN_PER_DOLLAR"
+DEFAULT_MIN_GAIN_PER_DOLLAR = float(os.getenv(MIN_GAIN_PER_DOLLAR_ENV, "0.5") or 0.5)
+MIN_GAIN = 0.01  # consensus points; the floor for free (mock/local) rounds
+DEFAULT_DECAY = 0.5  # share of the last consensus increase expected again with only one increase seen
+ISSUE_VALUE = 0.02  # consensus-point equivalent of resolving one open issue
+MAX_COUNTED_ISSUES = 5
+DEFAULT_RESOLUTION_RATE = 0.5
+MAX_COST_GROWTH = 2.0
+JUDGE_COST_FACTOR = 2.0  # the judge reads the whole transcript: about two average calls
+
+# Phrases that mark an unresolved problem in verifier and stress-tester replies.
+ISSUE_PATTERNS = {
+    "fact_checker": re.compile(
+        r"❌|\bincorrect\b|\bcontradict(?:s|ed|ion)?\b|\bneeds? (?:a )?(?:source|citation)s?\b|"
+        r"\bunder-sourced\b|\bunsupported\b|\bneed citations\b",
+        re.IGNORECASE,
+    ),
+    "adversarial": re.compile(
+        r"\bcounter(?:point|example)s?\b|\bfailure modes?\b|\bedge cases?\b|\bblind spots?\b|"
+        r"\bdoes not hold\b|\"holds_up\":\s*false",
+        re.IGNORECASE,
+    ),
+}
+
+
+def adaptive_default() -> bool:
+    return os.getenv(ADAPTIVE_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def count_issues(responses: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+    """Open-issue markers raised by the verifier and stress tester in one round's records."""
+    counts = {role: 0 for role in ISSUE_PATTERNS}
+    for record in responses:
+        pattern = ISSUE_PATTERNS.get(record.get("role", ""))
+        if pattern is not None and not record.get("is_error"):
+            counts[record["role"]] += len(pattern.findall(str(record.get("content", ""))))
+    return counts
+
+
+class RoundController:
+    """Decides after each round whether the next one is worth running."""
+
+    def __init__(
+        self,
+        max_rounds: int,
+        budget: float,
+        consensus_threshold: float,
+        min_gain_per_dollar: float = DEFAULT_MIN_GAIN_PER_DOLLAR,
+        min_gain: float = MIN_GAIN,
+    ):
+        self.max_rounds = max_rounds
+        self.budget = budget
+        self.consensus_threshold = consensus_threshold
+        self.min_gain_per_dollar = min_gain_per_dollar
+        self.min_gain = min_gain
+
+    def decide(self, logs: Sequence[Dict[str, Any]], total_cost: float) -> Dict[str, Any]:
+        """Decision after the last round in `logs` (round logs of `run_collaboration`)."""
+        current = logs[-1]
+        round_number = current["round"]
+        consensus = [float(log.get("consensus") or 0.0) for log in logs]
+        issues = count_issues(current.get("responses", []))
+        open_issues = min(sum(issues.values()), MAX_COUNTED_ISSUES)
+
+        # Consensus trajectory: the next increase as the last one, damped.
+        delta = consensus[-1] - consensus[-2] if len(consensus) > 1 else None
+        previous_delta = consensus[-2] - consensus[-3] if len(consensus) > 2 else None
+        if delta is None:
+            decay = None
+            consensus_gain = None
+        else:
+            if previous_delta is not None and previous_delta > 0 and delta > 0:
+                decay = min(delta / previous_delta, 1.0)
+            else:
+                decay = DEFAULT_DECAY
+            consensus_gain = max(delta, 0.0) * decay
+
+        # Issues: the share of open issues another round is expected to resolve.
+        previous_issues = None
+        if len(logs) > 1:
+            previous_issues = min(sum(count_issues(logs[-2].get("responses", [])).values()), MAX_COUNTED_ISSUES)
+        if previous_issues:
+            resolution_rate = min(max((previous_issues - open_issues) / previous_issues, 0.1), 1.0)
+        else:
+            resolution_rate = DEFAULT_RESOLUTION_RATE
+        issue_gain = ISSUE_VALUE * open_issues * resolution_rate
+
+        # Cost: the last round again, grown with the transcript, plus the judge.
+        round_cost = float(current.get("round_cost") or 0.0)
+        previous_cost = float(logs[-2].get("round_cost") or 0.0) if len(logs) > 1 else 0.0
+        growth = min(max(round_cost / previous_cost, 1.0), MAX_COST_GROWTH) if previous_cost > 0 else 1.0
+        next_cost = round_cost * growth
+        calls = max(1, len(current.get("responses", [])))
+        judge_reserve = round_cost / calls * JUDGE_COST_FACTOR
+        remaining = self.budget - total_cost
+
+        expected_gain = None if consensus_gain is None else consensus_gain + issue_gain
+        gain_per_dollar = None
+        if expected_gain is not None and next_cost > 0:
+            gain_per_dollar = expected_gain / next_cost
+
+        if round_number >= self.max_rounds:
+            stop, reason = True, "round limit"
+        elif round_number >= 2 and consensus[-1] >= self.consensus_threshold:
+            stop, reason = True, "consensus threshold"
+        elif next_cost + judge_reserve > remaining:
+            stop, reason = True, "budget"
+        elif expected_gain is None:
+            stop, reason = False, "no trajectory yet"
+        elif expected_gain < self.min_gain:
+            stop, reason = True, "expected gain below minimum"
+        elif gain_per_dollar is not None and gain_per_dollar < self.min_gain_per_dollar:
+            stop, reason = True, "expected gain per dollar below threshold"
+        else:
+            stop, reason = False, "worth another round"
+
+        return {
+            "stop": stop,
+            "reason": reason,
+            "consensus": round(consensus[-1], 4),
+            "consensus_delta": None if delta is None else round(delta, 4),
+            "decay": None if decay is None else round(decay, 4),
+            "verifier_issues": issues["fact_checker"],
+            "stress_issues": issues["adversarial"],
+            "issue_resolution_rate": round(resolution_rate, 4),
+            "expected_gain": None if expected_gain is None else round(expected_gain, 4),
+            "expected_round_cost": round(next_cost, 6),
+            "judge_reserve": round(judge_reserve, 6),
+            "remaining_budget": round(remaining, 6),
+            "gain_per_dollar": None if gain_per_dollar is None else round(gain_per_dollar, 4),
+        }
+
+    def settings(self) -> Dict[str, Any]:
+        return {"adaptive_rounds": True, "min_gain_per_dollar": self.min_gain_per_dollar}
+
+
+def controller_for(
+    adaptive: bool,
+    max_rounds: int,
+    budget: float,
+    consensus_threshold: float,
+    min_gain_per_dollar: Optional[float] = None,
+) -> Optional[RoundController]:
+    if not adaptive:
+        return None
+    return RoundController(
+        max_rounds, budget, consensus_threshold,
+        DEFAULT_MIN_GAIN_PER_DOLLAR if min_gain_per_dollar is None else float(min_gain_per_dollar),
+    )
@@ -0,0 +1,341 @@
+"""
+Persistent run history for SynapseForge.
+
+Finished run payloads are written to SQLite (WAL mode, so readers never block
+the writer) as three tables: `runs`, `rounds` and `responses`, indexed on the
+normalised query hash, model, timestamp and cost. The full payload is kept as
+JSON on the run row, so `get_run` returns exactly what `/api/run` answered.
+
+`save()` only snapshots the payload as JSON and enqueues it: a single writer
+thread drains the queue and commits whatever has accumulated in one
+transaction, so request threads never wait on disk. Set SYNAPSE_RUN_STORE to
+the database path (default output/runs.sqlite3), or to an empty string to
+disable persistence.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+RUN_STORE_ENV = "SYNAPSE_RUN_STORE"
+DEFAULT_RUN_STORE = os.path.join("output", "runs.sqlite3")
+WRITE_BATCH_SIZE = 64
+MAX_PENDING_WRITES = 1000
+MAX_PAGE_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    query TEXT NOT NULL,
+    query_hash TEXT NOT NULL,
+    judge_model TEXT,
+    models TEXT NOT NULL,
+    rounds_requested INTEGER,
+    rounds_completed INTEGER,
+    total_cost REAL NOT NULL DEFAULT 0,
+    total_ms REAL,
+    stopped_reason TEXT,
+    final_answer TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    round INTEGER NOT NULL,
+    round_cost REAL,
+    consensus REAL,
+    wall_ms REAL,
+    PRIMARY KEY (run_id, round)
+);
+CREATE TABLE IF NOT EXISTS responses (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    round INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    role TEXT,
+    provider TEXT,
+    model TEXT,
+    cost REAL,
+    tokens_input INTEGER,
+    tokens_output INTEGER,
+    provider_ms REAL,
+    is_error INTEGER NOT NULL DEFAULT 0,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_query_hash ON runs(query_hash);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_total_cost ON runs(total_cost);
+CREATE INDEX IF NOT EXISTS idx_runs_judge_model ON runs(judge_model);
+CREATE INDEX IF NOT EXISTS idx_responses_run ON responses(run_id, round);
+CREATE INDEX IF NOT EXISTS idx_responses_model ON responses(model);
+"""
+
+SUMMARY_COLUMNS = (
+    "run_id", "created_at", "query", "query_hash", "judge_model", "models",
+    "rounds_requested", "rounds_completed", "total_cost", "total_ms", "stopped_reason",
+)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used for hashing."""
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    return connection
+
+
+def _run_rows(run_id: str, encoded: str, created_at: float):
+    """(runs row, rounds rows, responses rows) for one JSON-encoded payload."""
+    payload = json.loads(encoded)
+    judge = payload.get("judge") or {}
+    records = [(log.get("round", 0), record) for log in payload.get("rounds", []) for record in log.get("responses", [])]
+    # Tiered runs: the triage calls are round 0, like the judge, told apart by role.
+    records.extend((0, record) for record in (payload.get("triage") or {}).get("responses", []))
+    if judge:
+        records.append((0, judge))
+    models = sorted({record.get("model", "") for _, record in records if record.get("model")})
+    run_row = (
+        run_id,
+        created_at,
+        payload.get("query", ""),
+        query_hash(payload.get("query", "")),
+        judge.get("model"),
+        json.dumps(models),
+        payload.get("rounds_requested"),
+        payload.get("rounds_completed"),
+        float(payload.get("total_cost") or 0.0),
+        (payload.get("timings") or {}).get("total_ms"),
+        payload.get("stopped_reason"),
+        payload.get("final_answer"),
+        encoded,
+    )
+    round_rows = [
+        (run_id, log.get("round", 0), log.get("round_cost"), log.get("consensus"), (log.get("timings") or {}).get("wall_ms"))
+        for log in payload.get("rounds", [])
+    ]
+    response_rows = [
+        (
+            run_id,
+            round_number,
+            record.get("agent", ""),
+            record.get("role"),
+            record.get("provider"),
+            record.get("model"),
+            record.get("cost"),
+            record.get("tokens_input"),
+            record.get("tokens_output"),
+            (record.get("timings") or {}).get("provider_ms"),
+            int(bool(record.get("is_error"))),
+            record.get("content"),
+        )
+        for round_number, record in records
+    ]
+    return run_row, round_rows, response_rows
+
+
+class RunStore:
+    """SQLite-backed run history with an asynchronous, batching writer."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=MAX_PENDING_WRITES)
+        self._local = threading.local()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = _connect(path)
+        with connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+
+    def save(self, payload: Dict[str, Any], run_id: Optional[str] = None) -> str:
+        """Queue `payload` for persistence and return its run id. Never blocks."""
+        run_id = run_id or payload.get("run_id") or uuid.uuid4().hex
+        if self._closed:
+            return run_id
+        self._ensure_writer()
+        try:
+            # Encoded here so later edits to the caller's dict cannot race the writer.
+            self._queue.put_nowait((run_id, json.dumps(payload, default=str), time.time()))
+        except queue.Full:
+            self.dropped += 1
+            print(f"[WARN] Run store backlog full; run {run_id} was not persisted.")
+        return run_id
+
+    def flush(self) -> None:
+        """Block until every queued run has been committed."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+
+    def _ensure_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="run-store-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        connection = _connect(self.path)
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                while item is not None and len(batch) < WRITE_BATCH_SIZE:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                entries = [entry for entry in batch if entry is not None]
+                try:
+                    if entries:
+                        self._write_batch(connection, entries)
+                except sqlite3.Error as exc:
+                    print(f"[WARN] Could not persist {len(entries)} run(s): {exc}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if len(entries) < len(batch):
+                    return
+        finally:
+            connection.close()
+
+    def _write_batch(self, connection: sqlite3.Connection, entries: List[tuple]) -> None:
+        runs, rounds, responses = [], [], []
+        for run_id, encoded, created_at in entries:
+            run_row, round_rows, response_rows = _run_rows(run_id, encoded, created_at)
+            runs.append(run_row)
+            rounds.extend(round_rows)
+            responses.extend(response_rows)
+        with connection:
+            # Re-saving a run id replaces it (e.g. a replay that overwrites its source).
+            connection.executemany("DELETE FROM runs WHERE run_id = ?", [(row[0],) for row in runs])
+            connection.executemany(f"INSERT INTO runs VALUES ({', '.join('?' * 13)})", runs)
+            connection.executemany("INSERT INTO rounds VALUES (?, ?, ?, ?, ?)", rounds)
+            connection.executemany(f"INSERT INTO responses VALUES ({', '.join('?' * 12)})", responses)
+        self.written += len(entries)
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = _connect(self.path)
+            self._local.connection = connection
+        return connection
+
+    def list_runs(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        model: Optional[str] = None,
+        query: Optional[str] = None,
+        max_cost: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Newest-first run summaries, optionally filtered, with the total match count."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        clauses, params = [], []
+        if model:
+            clauses.append("(judge_model = ? OR run_id IN (SELECT run_id FROM responses WHERE model = ?))")
+            params.extend([model, model])
+        if query:
+            clauses.append("query_hash = ?")
+            params.append(query_hash(query))
+        if max_cost is not None:
+            clauses.append("total_cost <= ?")
+            params.append(float(max_cost))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        connection = self._reader()
+        total = connection.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM runs {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        runs = []
+        for row in rows:
+            summary = dict(row)
+            summary["models"] = json.loads(summary["models"])
+            runs.append(summary)
+        return {"runs": runs, "total": total, "limit": limit, "offset": offset}
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """The stored payload for `run_id`, or None."""
+        row = self._reader().execute(
+            "SELECT payload, created_at FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(row["payload"])
+        payload.setdefault("run_id", run_id)
+        payload["created_at"] = row["created_at"]
+        return payload
+
+    def find_by_query(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Newest runs whose normalised query matches `query` exactly."""
+        return self.list_runs(limit=limit, query=query)["runs"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+STORE: Optional[RunStore] = None
+
+
+def configure(path: Optional[str]) -> Optional[RunStore]:
+    """Point the process-wide store at `path` (None or "" disables it)."""
+    global STORE
+    if STORE is not None:
+        STORE.close()
+    STORE = RunStore(path) if path else None
+    return STORE
+
+
+def save(payload: Dict[str, Any], run_id: Optional[str] = None) -> Optional[str]:
+    """Queue a payload on the process-wide store, if one is configured."""
+    return STORE.save(payload, run_id) if STORE is not None else None
+
+
+try:
+    configure(os.getenv(RUN_STORE_ENV, DEFAULT_RUN_STORE).strip())
+except (OSError, sqlite3.Error) as _err:
+    print(f"[WARN] Run store disabled: {_err}")
+
+atexit.register(lambda: STORE.close() if STORE is not None else None)
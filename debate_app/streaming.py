@@ -2,15 +2,29 @@
 Real-time streaming and websocket support for SynapseForge.
 Enables real-time updates of agent responses during collaborative synthesis.
 """
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Deque, Iterator, Optional, Dict, Any, List, Tuple
+from collections import deque
 from dataclasses import dataclass, field
+import json
+import os
+import threading
 import time
 
+TERMINAL_EVENTS = ("run_complete", "run_error")
+
+# Slow-subscriber policies: "coalesce" merges queued token deltas per agent before
+# dropping anything; "drop_oldest" simply discards the oldest queued event.
+SUBSCRIBER_POLICIES = ("coalesce", "drop_oldest")
+
+# Every SPILL_INDEX_STRIDE-th spilled event gets a byte-offset checkpoint, so a
+# resume seeks close to the requested id without indexing every spilled event.
+SPILL_INDEX_STRIDE = 128
+
 
 @dataclass
 class StreamEvent:
     """Event streamed to client during synthesis."""
-    event_type: str  # "round_start", "agent_response", "round_complete", "synthesis_start", "synthesis_complete"
+    event_type: str  # "run_start", "round_start", "agent_delta", "agent_response", "round_complete", "synthesis_start", "synthesis_complete", "run_complete", "run_error"
     round_number: int = 0
     agent_name: str = ""
     agent_role: str = ""
@@ -18,9 +32,12 @@ class StreamEvent:
     cost: float = 0.0
     timestamp: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
+    event_id: int = 0  # Assigned by StreamingDebateManager.emit, increasing per manager
+    _encoded: Optional[str] = field(default=None, repr=False, compare=False)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
+            "event_id": self.event_id,
             "event_type": self.event_type,
             "round_number": self.round_number,
             "agent_name": self.agent_name,
@@ -30,30 +47,374 @@ class StreamEvent:
             "timestamp": self.timestamp,
             "metadata": self.metadata or {},
         }
+    
+    def to_json(self) -> str:
+        """JSON encoding of the event, computed once after it has been emitted."""
+        if self._encoded is None:
+            self._encoded = json.dumps(self.to_dict())
+        return self._encoded
+    
+    @classmethod
+    def from_json(cls, encoded: str) -> "StreamEvent":
+        data = json.loads(encoded)
+        return cls(
+            event_type=data.get("event_type", ""),
+            round_number=data.get("round_number", 0),
+            agent_name=data.get("agent_name", ""),
+            agent_role=data.get("agent_role", ""),
+            content=data.get("content", ""),
+            cost=data.get("cost", 0.0),
+            timestamp=data.get("timestamp", 0.0),
+            metadata=data.get("metadata") or {},
+            event_id=data.get("event_id", 0),
+            _encoded=encoded,
+        )
+
+
+def _compact_deltas(events: List[StreamEvent]) -> List[StreamEvent]:
+    """
+    Merge runs of consecutive `agent_delta` events so each (agent, round) keeps
+    one delta holding its concatenated text. A merged delta takes the position
+    and id of its newest member, which keeps ids increasing through the queue.
+    """
+    compacted: List[StreamEvent] = []
+    segment: List[StreamEvent] = []
+
+    def flush() -> None:
+        if len(segment) < 2:
+            compacted.extend(segment)
+            segment.clear()
+            return
+        parts: Dict[Tuple[str, int], List[str]] = {}
+        last: Dict[Tuple[str, int], StreamEvent] = {}
+        for event in segment:
+            key = (event.agent_name, event.round_number)
+            parts.setdefault(key, []).append(event.content)
+            last[key] = event
+        for key, newest in sorted(last.items(), key=lambda item: item[1].event_id):
+            if len(parts[key]) == 1:
+                compacted.append(newest)
+                continue
+            compacted.append(StreamEvent(
+                event_type="agent_delta",
+                round_number=newest.round_number,
+                agent_name=newest.agent_name,
+                agent_role=newest.agent_role,
+                content="".join(parts[key]),
+                timestamp=newest.timestamp,
+                metadata={"coalesced": len(parts[key])},
+                event_id=newest.event_id,
+            ))
+        segment.clear()
+
+    for event in events:
+        if event.event_type == "agent_delta":
+            segment.append(event)
+        else:
+            flush()
+            compacted.append(event)
+    flush()
+    return compacted
+
+
+class Subscription:
+    """
+    One consumer's bounded queue of stream events.
+    `offer` never blocks: when the queue is full, token deltas are coalesced
+    (or the oldest events dropped) so a slow consumer only degrades its own
+    view. Terminal events are never dropped.
+    """
+    
+    def __init__(self, max_queue: int = 256, policy: str = "coalesce"):
+        if policy not in SUBSCRIBER_POLICIES:
+            raise ValueError(f"Unknown subscriber policy '{policy}'. Use one of {SUBSCRIBER_POLICIES}.")
+        self.max_queue = max(2, int(max_queue))
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._backlog: Deque[StreamEvent] = deque()
+        self._queue: Deque[StreamEvent] = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+    
+    def offer(self, event: StreamEvent) -> None:
+        """Queue an event without blocking the publisher."""
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._queue) >= self.max_queue:
+                self._relieve_pressure()
+            self._queue.append(event)
+            self._cond.notify_all()
+    
+    def _relieve_pressure(self) -> None:
+        if self.policy == "coalesce":
+            before = len(self._queue)
+            self._queue = deque(_compact_deltas(list(self._queue)))
+            self.coalesced += before - len(self._queue)
+            if len(self._queue) < self.max_queue:
+                return
+        for index, queued in enumerate(self._queue):
+            if queued.event_type not in TERMINAL_EVENTS:
+                del self._queue[index]
+                self.dropped += 1
+                return
+    
+    def prime(self, backlog: List[StreamEvent]) -> None:
+        """Deliver `backlog` (replayed history) ahead of any live events."""
+        with self._cond:
+            self._backlog.extend(backlog)
+            self._cond.notify_all()
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[StreamEvent]:
+        """Next event, or None if the timeout expired or the subscription closed."""
+        with self._cond:
+            if self._busy:
+                self._busy = False
+                self._cond.notify_all()
+            if not self._cond.wait_for(lambda: self._backlog or self._queue or self.closed, timeout):
+                return None
+            if self._backlog:
+                event = self._backlog.popleft()
+            elif self._queue:
+                event = self._queue.popleft()
+            else:
+                return None
+            self._busy = True
+            return event
+    
+    def __iter__(self) -> Iterator[StreamEvent]:
+        """Yield events until a terminal event has been delivered or the subscription closes."""
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+            if event.event_type in TERMINAL_EVENTS:
+                return
+    
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._backlog) + len(self._queue)
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the consumer has taken every queued event and asked for the next one."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.closed or (not self._backlog and not self._queue and not self._busy),
+                timeout,
+            )
+    
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
 
 
 class StreamingDebateManager:
     """
     Manages real-time streaming of debate progress.
     Notifies listeners of agent responses, rounds completion, and synthesis progress.
+    
+    Events are kept in a bounded ring buffer; once it is full the oldest event is
+    dropped, or appended to `spill_path` (JSON lines) when one is configured, so
+    `get_events_since` can still replay the whole debate on reconnect.
+    
+    Any number of consumers can `subscribe`; each gets its own bounded queue, and
+    `emit` only appends to those queues, so orchestration never waits on a viewer.
     """
     
-    def __init__(self, callback: Optional[Callable[[StreamEvent], None]] = None):
+    def __init__(
+        self,
+        callback: Optional[Callable[[StreamEvent], None]] = None,
+        max_events: int = 2000,
+        spill_path: Optional[str] = None,
+    ):
         """
         Initialize streaming manager.
         
         Args:
-            callback: Function to call when an event occurs (e.g., websocket emit)
+            callback: Function to call when an event occurs (e.g., websocket emit).
+                It runs on a dedicated delivery thread, never inside `emit`.
+            max_events: Number of most recent events kept in memory
+            spill_path: Optional JSONL file receiving events evicted from memory
         """
         self.callback = callback
-        self.events: list[StreamEvent] = []
+        self.max_events = max(1, int(max_events))
+        self.spill_path = spill_path
+        self._buffer: Deque[StreamEvent] = deque()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._spill_handle = None
+        self._spill_first_id = 0
+        self._spill_offset = 0
+        self._spill_index: List[Tuple[int, int]] = []
+        self.finished = False
+        self.closed = False
+        self._subscribers: List[Subscription] = []
+        self._callback_subscription: Optional[Subscription] = None
+        self._callback_thread_running = False
+        if callback:
+            self._callback_subscription = self.subscribe(max_queue=4096)
+    
+    @property
+    def events(self) -> List[StreamEvent]:
+        """Snapshot of the events still held in memory, oldest first."""
+        with self._lock:
+            return list(self._buffer)
+    
+    @property
+    def last_event_id(self) -> int:
+        return self._next_id - 1
     
     def emit(self, event: StreamEvent) -> None:
-        """Emit a streaming event."""
-        event.timestamp = time.time()
-        self.events.append(event)
-        if self.callback:
-            self.callback(event)
+        """Emit a streaming event. Events emitted after `close` are dropped."""
+        with self._lock:
+            if self.closed:
+                return
+            event.timestamp = time.time()
+            event.event_id = self._next_id
+            self._next_id += 1
+            event.to_json()
+            if len(self._buffer) >= self.max_events:
+                self._evict(self._buffer.popleft())
+            self._buffer.append(event)
+            if event.event_type in TERMINAL_EVENTS:
+                self.finished = True
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+        if self._callback_subscription is not None:
+            with self._lock:
+                if not self._callback_thread_running:
+                    self._callback_thread_running = True
+                    threading.Thread(target=self._deliver_callbacks, name="stream-callback", daemon=True).start()
+    
+    def subscribe(
+        self,
+        since: Optional[int] = None,
+        max_queue: int = 256,
+        policy: str = "coalesce",
+    ) -> Subscription:
+        """
+        Register a consumer. With `since`, events after that id are replayed
+        first (see `get_events_since`) with no gap before live events.
+        """
+        subscription = Subscription(max_queue=max_queue, policy=policy)
+        with self._lock:
+            self._subscribers.append(subscription)
+            registered_at = self._next_id - 1
+            finished = self.finished
+        if since is not None:
+            subscription.prime([e for e in self.get_events_since(since) if e.event_id <= registered_at])
+        if finished:
+            # Nothing live will follow; end the subscription once the replay is consumed.
+            self.unsubscribe(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+    
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers) - (1 if self._callback_subscription else 0)
+    
+    def _deliver_callbacks(self) -> None:
+        """Call `callback` for queued events; exits when idle and is restarted by `emit`."""
+        subscription = self._callback_subscription
+        while True:
+            event = subscription.get(timeout=1.0)
+            if event is None:
+                with self._lock:
+                    if subscription.closed or not subscription.pending():
+                        self._callback_thread_running = False
+                        return
+                continue
+            try:
+                self.callback(event)
+            except Exception:
+                pass
+    
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the callback has been called for every emitted event."""
+        if self._callback_subscription is None:
+            return True
+        return self._callback_subscription.wait_idle(timeout)
+    
+    def _evict(self, event: StreamEvent) -> None:
+        if not self.spill_path or self.closed:
+            return
+        if self._spill_handle is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+            self._spill_handle = open(self.spill_path, "wb")
+            self._spill_first_id = event.event_id
+        if (event.event_id - self._spill_first_id) % SPILL_INDEX_STRIDE == 0:
+            self._spill_index.append((event.event_id, self._spill_offset))
+        line = (event.to_json() + "\n").encode("utf-8")
+        self._spill_handle.write(line)
+        self._spill_handle.flush()
+        self._spill_offset += len(line)
+    
+    def _read_spilled(
+        self, after_id: int, before_id: int, index: List[Tuple[int, int]], end_offset: int,
+    ) -> List[StreamEvent]:
+        """Read spilled events with after_id < event_id < before_id from the first `end_offset` bytes."""
+        start_offset = 0
+        for checkpoint_id, offset in index:
+            if checkpoint_id > after_id + 1:
+                break
+            start_offset = offset
+        events: List[StreamEvent] = []
+        with open(self.spill_path, "rb") as handle:
+            handle.seek(start_offset)
+            position = start_offset
+            for raw in handle:
+                position += len(raw)
+                if position > end_offset:
+                    break  # written after the snapshot, possibly still partial
+                event = StreamEvent.from_json(raw.decode("utf-8").rstrip("\n"))
+                if event.event_id >= before_id:
+                    break
+                if event.event_id > after_id:
+                    events.append(event)
+        return events
+    
+    def get_events_since(self, event_id: int = 0) -> List[StreamEvent]:
+        """
+        Return events with an id greater than `event_id`, oldest first.
+        Events evicted from memory come back from the spill file when one is
+        configured; otherwise they are gone and the result starts at the oldest
+        buffered event.
+        """
+        with self._lock:
+            buffered = list(self._buffer)
+            oldest = buffered[0].event_id if buffered else self._next_id
+            if event_id + 1 >= oldest or self._spill_handle is None:
+                return [event for event in buffered if event.event_id > event_id]
+            index = list(self._spill_index)
+            end_offset = self._spill_offset
+        # The spill file is append-only and its first `end_offset` bytes already
+        # hold every id below `oldest` as whole lines, so it can be read without
+        # blocking emitters.
+        return self._read_spilled(event_id, oldest, index, end_offset) + buffered
+    
+    def close(self, remove_spill: bool = False) -> None:
+        """Close every subscription and release the spill file, optionally deleting it. Later emits are dropped."""
+        with self._lock:
+            self.closed = True
+            subscribers, self._subscribers = self._subscribers, []
+            for subscription in subscribers:
+                subscription.close()
+            if self._spill_handle is not None:
+                self._spill_handle.close()
+                self._spill_handle = None
+            if remove_spill and self.spill_path and os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
     
     def emit_round_start(self, round_number: int) -> None:
         """Notify that a round is starting."""
@@ -62,6 +423,16 @@ class StreamingDebateManager:
             round_number=round_number,
         ))
     
+    def emit_agent_delta(self, round_number: int, agent_name: str, agent_role: str, delta: str) -> None:
+        """Notify that an agent produced a chunk of streamed text."""
+        self.emit(StreamEvent(
+            event_type="agent_delta",
+            round_number=round_number,
+            agent_name=agent_name,
+            agent_role=agent_role,
+            content=delta,
+        ))
+    
     def emit_agent_response(
         self,
         round_number: int,
@@ -102,6 +473,27 @@ class StreamingDebateManager:
             cost=total_cost,
         ))
     
+    def emit_run_complete(self, payload: Dict[str, Any]) -> None:
+        """Notify that the run finished, carrying the full result payload."""
+        self.emit(StreamEvent(
+            event_type="run_complete",
+            content=str(payload.get("final_answer", "")),
+            cost=float(payload.get("total_cost", 0.0)),
+            metadata={"payload": payload},
+        ))
+    
+    def emit_run_error(self, message: str) -> None:
+        """Notify that the run aborted with an unexpected error."""
+        self.emit(StreamEvent(event_type="run_error", content=message))
+    
+    def emit_run_start(self, run_id: str) -> None:
+        """Notify that a run was accepted, carrying the id used to resume it."""
+        self.emit(StreamEvent(event_type="run_start", metadata={"run_id": run_id}))
+    
     def get_all_events(self) -> list[Dict[str, Any]]:
-        """Return all recorded events."""
+        """Return all recorded events still in memory."""
         return [event.to_dict() for event in self.events]
+    
+    def get_encoded_events_since(self, event_id: int = 0) -> List[str]:
+        """Like `get_events_since`, but returns each event's cached JSON encoding."""
+        return [event.to_json() for event in self.get_events_since(event_id)]
@@ -0,0 +1,213 @@
+"""
+Optional tracing spans across the debate lifecycle.
+
+Spans follow the OpenTelemetry model (trace id, span id, parent, attributes)
+and propagate through `contextvars`, so work submitted to a thread pool via
+`wrap()` stays attached to the run that submitted it. When a root span ends,
+its trace is written to the trace directory as Chrome trace-event JSON: open it
+in https://ui.perfetto.dev or chrome://tracing for a flame-graph timeline per
+run, one lane per thread.
+
+Tracing is off unless SYNAPSE_TRACE_DIR is set or `configure()` is called;
+disabled spans cost one context-variable lookup.
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_DIR_ENV = "SYNAPSE_TRACE_DIR"
+
+
+class Span:
+    """One timed operation. Attributes may be added until the span ends."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "thread_id", "thread_name")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes)
+        thread = threading.current_thread()
+        self.thread_id = thread.ident or 0
+        self.thread_name = thread.name
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "thread": self.thread_name,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded while tracing is disabled."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_CURRENT_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("synapse_span", default=None)
+
+
+class Tracer:
+    """Collects spans per trace and exports each trace when its root span ends."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._open: Dict[str, List[Span]] = {}
+        self._wall_start: Dict[str, float] = {}
+        self.exported: List[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        parent = _CURRENT_SPAN.get()
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        if parent is None:
+            with self._lock:
+                self._wall_start[trace_id] = time.time()
+        token = _CURRENT_SPAN.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.set_attribute("error", f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            _CURRENT_SPAN.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        with self._lock:
+            self._open.setdefault(span.trace_id, []).append(span)
+            if span.parent_id is not None:
+                return
+            spans = self._open.pop(span.trace_id)
+            wall_start = self._wall_start.pop(span.trace_id, time.time())
+        self.export(span, spans, wall_start)
+
+    def export(self, root: Span, spans: List[Span], wall_start: float) -> Optional[str]:
+        """Write one trace as Chrome trace-event JSON; returns the file path."""
+        events: List[Dict[str, Any]] = []
+        threads: Dict[int, str] = {}
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            threads.setdefault(span.thread_id, span.thread_name)
+            events.append({
+                "name": span.name,
+                "cat": "synapse",
+                "ph": "X",
+                "ts": (span.start_ns - root.start_ns) / 1000.0,
+                "dur": ((span.end_ns or span.start_ns) - span.start_ns) / 1000.0,
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id},
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread_id,
+                "args": {"name": thread_name},
+            })
+        document = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "trace_id": root.trace_id,
+                "root": root.name,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(wall_start)),
+                "duration_ms": round(root.duration_ms, 3),
+                "spans": [span.to_dict() for span in spans],
+            },
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(wall_start))
+            path = os.path.join(self.directory, f"{stamp}-{root.name}-{root.trace_id[:12]}.json")
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(document, handle, default=str)
+        except OSError as exc:
+            print(f"[WARN] Could not export trace {root.trace_id}: {exc}")
+            return None
+        with self._lock:
+            self.exported.append(path)
+            del self.exported[:-100]
+        return path
+
+
+TRACER = Tracer(os.getenv(TRACE_DIR_ENV, "").strip() or None)
+
+
+def configure(directory: Optional[str]) -> Tracer:
+    """Enable tracing into `directory` (None disables it)."""
+    TRACER.directory = directory or None
+    return TRACER
+
+
+def enabled() -> bool:
+    return TRACER.enabled
+
+
+def span(name: str, **attributes: Any):
+    """Context manager opening a child of the current span (or a new trace)."""
+    return TRACER.span(name, **attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    current = _CURRENT_SPAN.get()
+    return current.trace_id if current else None
+
+
+def wrap(function: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind `function` to the caller's context, for `executor.submit(wrap(fn), ...)`.
+    Thread pools do not copy contextvars on their own. The copy is taken even
+    with tracing off, since the active profiler travels the same way.
+    """
+    context = contextvars.copy_context()
+
+    def _run_in_context(*args: Any, **kwargs: Any) -> Any:
+        return context.run(function, *args, **kwargs)
+
+    return _run_in_context
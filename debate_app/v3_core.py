@@ -2,10 +2,11 @@
 SynapseForge v3 — Research-Grade Collaborative AI Engine
 Advanced features: Query classification, credence propagation, context pruning, benchmarking.
 """
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, List, Optional, Any, Pattern, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import json
+import re
 
 
 class QueryType(Enum):
@@ -50,6 +51,42 @@ class CredenceUpdate:
         }
 
 
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation factored into a prefix trie ("wh(?:at|en|o)"), so each position branches on one character."""
+    tree: Dict[str, Any] = {}
+    for word in words:
+        node = tree
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [(r"\s+" if char == " " else re.escape(char)) + emit(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return emit(tree)
+
+
+def _compile_keywords(keywords: Dict["QueryType", List[str]]) -> Tuple[Pattern[str], Dict[str, Tuple["QueryType", ...]]]:
+    """
+    One compiled regex over every keyword, matched as whole words with an
+    optional plural/past/-ing ending ("causes", "designed"), plus a lookup from
+    the matched keyword to its query types. A keyword listed twice keeps counting
+    twice, as it did with the substring scan.
+    """
+    owners: Dict[str, List[QueryType]] = {}
+    for qtype, words in keywords.items():
+        for word in words:
+            owners.setdefault(word, []).append(qtype)
+    pattern = re.compile(rf"(?<!\w)({_trie_pattern(owners)})(?:s|es|d|ed|ing)?(?!\w)")
+    return pattern, {word: tuple(types) for word, types in owners.items()}
+
+
 class QueryClassifier:
     """Classifies queries to determine optimal agent roles."""
     
@@ -59,22 +96,40 @@ class QueryClassifier:
         QueryType.ETHICAL: ["should", "moral", "right", "wrong", "ethical", "value", "good", "bad"],
         QueryType.CREATIVE: ["create", "imagine", "design", "novel", "idea", "story", "generate"],
     }
+    _PATTERN, _KEYWORD_TYPES = _compile_keywords(KEYWORDS)
+    
+    @staticmethod
+    def score(query: str) -> Dict[QueryType, int]:
+        """Keyword hits per type (each keyword counted once per query), in one regex pass."""
+        scores = dict.fromkeys(QueryClassifier.KEYWORDS, 0)
+        lookup = QueryClassifier._KEYWORD_TYPES
+        for word in set(QueryClassifier._PATTERN.findall(query.lower())):
+            for qtype in lookup.get(word) or lookup[" ".join(word.split())]:
+                scores[qtype] += 1
+        return scores
     
     @staticmethod
     def classify(query: str) -> QueryType:
         """Classify query type based on keywords."""
-        query_lower = query.lower()
-        
-        # Count keyword matches
-        scores = {}
-        for qtype, keywords in QueryClassifier.KEYWORDS.items():
-            scores[qtype] = sum(1 for kw in keywords if kw in query_lower)
+        scores = QueryClassifier.score(query)
         
         # Return type with highest score, default to factual
         if max(scores.values()) == 0:
             return QueryType.FACTUAL
         return max(scores, key=scores.get)
     
+    @staticmethod
+    def classify_many(queries: Iterable[str]) -> List[QueryType]:
+        """Classify a batch of queries (e.g. a query log); repeated queries are classified once."""
+        seen: Dict[str, QueryType] = {}
+        results: List[QueryType] = []
+        for query in queries:
+            key = " ".join(query.lower().split())
+            if key not in seen:
+                seen[key] = QueryClassifier.classify(key)
+            results.append(seen[key])
+        return results
+    
     @staticmethod
     def get_roles_for_type(query_type: QueryType) -> Dict[str, int]:
         """Get recommended agent roles for query type."""
@@ -173,6 +228,11 @@ class BenchmarkResult:
     final_credence: float = 0.0
     cost_usd: float = 0.0
     performance_vs_single: str = "equal"  # better|equal|worse
+    single_agent_cost_usd: float = 0.0
+    single_agent_latency_s: float = 0.0
+    synapse_latency_s: float = 0.0
+    single_agent_tokens: int = 0
+    synapse_tokens: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -186,6 +246,11 @@ class BenchmarkResult:
             "final_credence": round(self.final_credence, 2),
             "cost_usd": round(self.cost_usd, 6),
             "performance_vs_single": self.performance_vs_single,
+            "single_agent_cost_usd": round(self.single_agent_cost_usd, 6),
+            "single_agent_latency_s": round(self.single_agent_latency_s, 4),
+            "synapse_latency_s": round(self.synapse_latency_s, 4),
+            "single_agent_tokens": self.single_agent_tokens,
+            "synapse_tokens": self.synapse_tokens,
         }
 
 
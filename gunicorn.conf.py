@@ -0,0 +1,75 @@
+"""
+Production server configuration for SynapseForge.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+One worker process per core (gthread workers). The app is imported once in the
+master and warmed up there, so workers fork with the catalog, the prompts and
+the provider SDKs already loaded. Each worker then starts its own agent pool.
+On shutdown or reload, a worker stops taking new runs (503 plus Retry-After)
+as soon as SIGTERM arrives and lets running debates finish before it exits,
+within the graceful timeout the master allows before it kills the worker.
+
+Sizing, per worker:
+- SYNAPSE_WEB_THREADS is the number of request threads. A synchronous
+  /api/run holds one thread for the whole debate, and so does each SSE
+  client. This is the number of debates one worker serves at a time.
+- SYNAPSE_AGENT_THREADS is the number of provider calls in flight. A round
+  calls every roster agent at once, so size it at about request threads x
+  roster size when debates overlap.
+
+Other settings: SYNAPSE_WEB_WORKERS (default: CPU count), SYNAPSE_BIND
+(default 0.0.0.0:5000) and SYNAPSE_DRAIN_TIMEOUT (default 120 s).
+"""
+import multiprocessing
+import os
+import signal
+import time
+
+bind = os.getenv("SYNAPSE_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("SYNAPSE_WEB_WORKERS", "0") or 0) or multiprocessing.cpu_count()
+worker_class = "gthread"
+threads = int(os.getenv("SYNAPSE_WEB_THREADS", "16") or 16)
+preload_app = True
+# gthread workers heartbeat from their main thread, so long debates do not trip this.
+timeout = 60
+graceful_timeout = int(os.getenv("SYNAPSE_DRAIN_TIMEOUT", "120") or 120)
+keepalive = 5
+accesslog = "-"
+
+
+def when_ready(arbiter):
+    from server import warm_up
+
+    arbiter.log.info("SynapseForge preloaded: %s", warm_up())
+
+
+def post_fork(arbiter, worker):
+    from server import reset_executor
+
+    reset_executor()
+
+
+def post_worker_init(worker):
+    """Refuse new runs from the moment SIGTERM arrives, not once the worker loop has wound down."""
+    from server import begin_drain
+
+    stop = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(sig, frame):
+        # The master kills the worker graceful_timeout after sending SIGTERM.
+        worker.drain_deadline = time.monotonic() + graceful_timeout
+        begin_drain()
+        stop(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+    signal.siginterrupt(signal.SIGTERM, False)
+
+
+def worker_exit(arbiter, worker):
+    from server import drain
+
+    deadline = getattr(worker, "drain_deadline", None)
+    remaining = graceful_timeout if deadline is None else max(deadline - time.monotonic(), 0.0)
+    if not drain(remaining):
+        worker.log.warning("Worker %s exited with debates still running after %ss.", worker.pid, graceful_timeout)
@@ -1,38 +1,59 @@
 """
 SynapseForge — Flask Backend Server (V2 + SAM-AI Integration)
 Serves the web UI and exposes:
-  /api/run       — Run multi-model collaborative synthesis
-  /api/analyze   — Run SAM-AI neuro-symbolic analysis on results
-  /api/health    — Health check
-  /api/models    — List available models
+  /api/run             — Run multi-model collaborative synthesis
+  /api/run/stream      — Same run, streamed token-by-token as Server-Sent Events
+  /api/run/<id>/stream — Watch a streamed run from another client
+  /api/run/<id>/events — Replay a streamed run's events for resume
+  /api/runs            — Paginated history of persisted runs
+  /api/runs/<id>       — One persisted run payload
+  /api/runs/<id>/replay — Re-run a persisted run against its recorded responses
+  /api/batch           — Start a batch of debates over a query set
+  /api/batch/<id>      — Batch progress; /results streams its JSONL rows
+  /api/analyze         — Run SAM-AI neuro-symbolic analysis on results
+  /api/health          — Health check
+  /api/models          — List available models
+  /metrics             — Prometheus metrics
+
+`python server.py` starts the Flask development server. In production run
+`gunicorn -c gunicorn.conf.py server:app`: one worker process per core, each
+with its own agent pool, draining in-flight debates on shutdown.
 """
 from __future__ import annotations
 
+import importlib
 import json
-import re
+import os
+import sys
 import time
 import traceback
-from itertools import combinations
-from typing import Dict, List, Optional, Sequence, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import threading
 
-from flask import Flask, jsonify, render_template, request
-
-from debate_app.agents.providers import (
-    MODEL_CATALOG,
-    PROVIDER_LABELS,
-    ModelSpec,
-    build_agent_from_spec,
-    provider_has_key,
-)
-from debate_app.core.base import AgentResponse
-from debate_app.core.prompts import (
-    ADVERSARIAL_SYSTEM_PROMPT,
-    DEBATER_SYSTEM_PROMPT,
-    FACT_CHECKER_SYSTEM_PROMPT,
-    JUDGE_SYSTEM_PROMPT,
+from flask import Flask, Response, jsonify, make_response, render_template, request, stream_with_context
+
+from debate_app import answer_cache, batch, metrics, profiling, replay, run_store, tracing
+from debate_app.agents import coalescing
+from debate_app.agents.batch_api import ProviderBatches
+from debate_app.agents.providers import MODEL_CATALOG, provider_has_key
+from debate_app.benchmark import parse_query_row
+from debate_app.core.prompts import ADVERSARIAL_TEMPLATE, FACT_CHECKER_TEMPLATE
+# consensus_score / fill_prompt / trim_text / MODEL_LOOKUP stay importable from here
+from debate_app.orchestrator import (  # noqa: F401
+    MODEL_LOOKUP,
+    build_roster,
+    build_triage,
+    consensus_score,
+    elapsed_ms,
+    fill_prompt,
+    parse_run_options,
+    run_collaboration,
+    trim_text,
 )
+from debate_app.streaming import TERMINAL_EVENTS, StreamEvent, StreamingDebateManager, Subscription
+from debate_app.v3_core import QueryClassifier
 
 # ── SAM-AI Integration ─────────────────────────────────────────────────────
 SAM_AI_AVAILABLE = False
@@ -45,40 +66,74 @@ except Exception as _err:
     print(f"[WARN] SAM-AI not available: {_SAM_AI_ERROR}")
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
-# Thread pool for parallel agent execution (supports up to 10 concurrent models)
-EXECUTOR = ThreadPoolExecutor(max_workers=10, thread_name_prefix="agent-")
-
-MODEL_LOOKUP: Dict[str, ModelSpec] = {spec.label: spec for spec in MODEL_CATALOG}
-
-
-# ─── Helpers ────────────────────────────────────────────────────────────────
+# Thread pool for parallel agent execution, one per process (see reset_executor)
+AGENT_THREADS = max(1, int(os.getenv("SYNAPSE_AGENT_THREADS", "10") or 10))
 
-def fill_prompt(template: str, replacements: Dict[str, object]) -> str:
-    output = template
-    for key, value in replacements.items():
-        output = output.replace("{" + key + "}", str(value))
-    return output
 
+class AgentPool(ThreadPoolExecutor):
+    """Agent thread pool that counts its queued and running calls for /api/health and /metrics."""
 
-def consensus_score(texts: Sequence[str]) -> float:
-    token_sets = [
-        set(re.findall(r"[a-zA-Z]{4,}", text.lower())[:120])
-        for text in texts if text
-    ]
-    if len(token_sets) < 2:
-        return 0.0
-    scores: List[float] = []
-    for left, right in combinations(token_sets, 2):
-        union = left | right
-        if union:
-            scores.append(len(left & right) / len(union))
-    return float(sum(scores) / len(scores)) if scores else 0.0
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix="agent-")
+        self.max_workers = max_workers
+        self.queued = 0
+        self.busy = 0
+        self._counts = threading.Lock()
 
+    def submit(self, fn, /, *args, **kwargs):
+        def counted():
+            with self._counts:
+                self.queued -= 1
+                self.busy += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counts:
+                    self.busy -= 1
+
+        with self._counts:
+            self.queued += 1
+        try:
+            future = super().submit(counted)
+        except BaseException:
+            with self._counts:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self._uncount_cancelled)
+        return future
+
+    def _uncount_cancelled(self, future) -> None:
+        # Calls cancelled before they started (shutdown with cancel_futures) never ran `counted`.
+        if future.cancelled():
+            with self._counts:
+                self.queued -= 1
+
+
+EXECUTOR = AgentPool(AGENT_THREADS)
+
+# Set while a worker shuts down: new runs are refused so the load balancer retries elsewhere
+DRAINING = threading.Event()
+DRAIN_POLL_SECONDS = 0.1
+# Provider SDKs the agents import on first use; preloading them lets forked workers share the pages
+PRELOAD_MODULES = ("langchain_core.messages", "langchain_openai", "langchain_google_genai", "langchain_anthropic")
+
+# Streamed runs kept for reconnect/resume, oldest finished run evicted first
+STREAM_BUFFER_EVENTS = int(os.getenv("SYNAPSE_STREAM_BUFFER", "2000"))
+STREAM_SPILL_DIR = os.getenv("SYNAPSE_STREAM_SPILL_DIR", "")
+MAX_TRACKED_RUNS = 64
+SSE_SUBSCRIBER_QUEUE = 512
+SSE_KEEPALIVE_SECONDS = 15.0
+RUN_STREAMS: "OrderedDict[str, StreamingDebateManager]" = OrderedDict()
+_RUN_STREAMS_LOCK = threading.Lock()
+
+# Batch jobs run on their own agent pools so interactive runs keep EXECUTOR
+BATCH_DIR = os.getenv("SYNAPSE_BATCH_DIR", batch.BATCH_DIR)
+MAX_BATCH_CONCURRENCY = 8
+MAX_TRACKED_BATCHES = 32
+BATCH_JOBS: "OrderedDict[str, batch.BatchRunner]" = OrderedDict()
 
-def trim_text(value: str, limit: int = 650) -> str:
-    text = (value or "").strip()
-    return text if len(text) <= limit else text[:limit].rstrip() + " ..."
 
+# ─── Helpers ────────────────────────────────────────────────────────────────
 
 def _compute_truth_for_response(resp: dict) -> dict:
     """Compute SAM-AI truth level for a single response."""
@@ -94,6 +149,169 @@ def _compute_truth_for_response(resp: dict) -> dict:
         return {"error": str(e), "truth_score": 0, "reliability_rating": "UNKNOWN"}
 
 
+def _executor_stats() -> dict:
+    """Snapshot of the agent thread pool: size, busy threads and queued calls."""
+    return {"workers": EXECUTOR.max_workers, "busy": EXECUTOR.busy, "queued": EXECUTOR.queued}
+
+
+metrics.EXECUTOR_QUEUE_DEPTH.set_function(lambda: _executor_stats()["queued"])
+metrics.EXECUTOR_BUSY.set_function(lambda: _executor_stats()["busy"])
+
+
+def _process_rss_mb() -> float:
+    """Resident memory of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as handle:
+            pages = int(handle.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1_048_576, 1)
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1_048_576 if sys.platform == "darwin" else 1024), 1)
+
+
+def _profile_requested(data: dict) -> bool:
+    """Profile this request if the body or query string asks for it, or it is sampled."""
+    return profiling.should_profile((data or {}).get("profile") or request.args.get("profile"))
+
+
+def _sharing_allowed(data: dict) -> bool:
+    """`"cache": false` asks for a fresh run: no cached answer and no coalesced provider calls."""
+    return data.get("cache", True) is not False
+
+
+def _cached_answer(data: dict, options: dict):
+    """A cached payload for this request unless it opted out with `"cache": false`."""
+    if not _sharing_allowed(data):
+        return None
+    payload = answer_cache.CACHE.get(options)
+    if payload is not None:
+        metrics.CACHE_HITS.inc(cache="answer")
+        payload["run_id"] = uuid.uuid4().hex
+    return payload
+
+
+def _draining_response():
+    """503 for new work while this worker drains, else None."""
+    if not DRAINING.is_set():
+        return None
+    response = jsonify({"error": "Server is shutting down; retry the request."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def _register_stream(run_id: str) -> StreamingDebateManager:
+    """Create and track the event buffer for a streamed run."""
+    spill_path = os.path.join(STREAM_SPILL_DIR, f"{run_id}.jsonl") if STREAM_SPILL_DIR else None
+    stream = StreamingDebateManager(max_events=STREAM_BUFFER_EVENTS, spill_path=spill_path)
+    with _RUN_STREAMS_LOCK:
+        RUN_STREAMS[run_id] = stream
+    _prune_streams()
+    return stream
+
+
+def _prune_streams() -> None:
+    """
+    Drop the oldest finished runs beyond MAX_TRACKED_RUNS. Live runs are never
+    evicted; the cap is enforced again when they finish.
+    """
+    with _RUN_STREAMS_LOCK:
+        excess = len(RUN_STREAMS) - MAX_TRACKED_RUNS
+        if excess <= 0:
+            return
+        stale = [run_id for run_id, stream in RUN_STREAMS.items() if stream.finished][:excess]
+        evicted = [RUN_STREAMS.pop(run_id) for run_id in stale]
+    for stream in evicted:
+        stream.close(remove_spill=True)
+
+
+def _sse_frame(event: StreamEvent) -> str:
+    return f"id: {event.event_id}\nevent: {event.event_type}\ndata: {event.to_json()}\n\n"
+
+
+def _sse_response(stream: StreamingDebateManager, subscription: Subscription, run_id: str) -> Response:
+    """Serve one subscription as Server-Sent Events until the run ends or the client leaves."""
+    def _generate():
+        try:
+            while True:
+                event = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                if event is None:
+                    if subscription.closed:
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse_frame(event)
+                if event.event_type in TERMINAL_EVENTS:
+                    break
+        finally:
+            stream.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(_generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Run-Id": run_id},
+    )
+
+
+# ─── Process lifecycle ──────────────────────────────────────────────────────
+
+def warm_up() -> dict:
+    """
+    Load what every worker needs before gunicorn forks: provider SDKs, the
+    rendered role prompts and the compiled classifier. Workers then share
+    those pages copy-on-write instead of each paying for them on its first
+    request. Must not start threads or open run-store connections.
+    """
+    loaded = []
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            continue
+    FACT_CHECKER_TEMPLATE.render(round_number="{round}")
+    ADVERSARIAL_TEMPLATE.render(round_number="{round}")
+    QueryClassifier.classify("warm up")
+    return {"models": len(MODEL_CATALOG), "modules": loaded}
+
+
+def reset_executor(max_workers: int = 0) -> AgentPool:
+    """Give this process a fresh agent pool (gunicorn calls it in each forked worker)."""
+    global EXECUTOR
+    previous = EXECUTOR
+    EXECUTOR = AgentPool(max_workers or AGENT_THREADS)
+    previous.shutdown(wait=False)
+    DRAINING.clear()
+    return EXECUTOR
+
+
+def begin_drain() -> None:
+    """Stop taking new runs and cancel batches after their running items. Safe to call from a signal handler."""
+    DRAINING.set()
+    for runner in list(BATCH_JOBS.values()):
+        runner.cancel()
+
+
+def drain(timeout: float) -> bool:
+    """
+    Stop taking new runs, let running debates (streamed ones included) finish,
+    cancel batches after their running items, then flush the run store.
+    Returns False if `timeout` seconds passed first.
+    """
+    begin_drain()
+    deadline = time.monotonic() + max(timeout, 0.0)
+    while True:
+        batches_done = all(runner.finished_at is not None or runner.started_at is None for runner in list(BATCH_JOBS.values()))
+        drained = metrics.ACTIVE_DEBATES.value() <= 0 and batches_done
+        if drained or time.monotonic() >= deadline:
+            break
+        time.sleep(DRAIN_POLL_SECONDS)
+    EXECUTOR.shutdown(wait=drained, cancel_futures=not drained)
+    if run_store.STORE is not None:
+        run_store.STORE.flush()
+    return drained
+
+
 # ─── Routes ─────────────────────────────────────────────────────────────────
 
 @app.route("/")
@@ -103,212 +321,288 @@ def index():
 
 @app.route("/api/run", methods=["POST"])
 def api_run():
+    refused = _draining_response()
+    if refused is not None:
+        return refused
     data = request.get_json(force=True)
-    query = (data.get("query") or "").strip()
-    if not query:
-        return jsonify({"error": "Query is required."}), 400
-
-    debater_items = data.get("debaters", [])
-    judge_item = data.get("judge", "")
-    fact_item = data.get("fact_checker", "")
-    adv_item = data.get("adversarial", "")
-    rounds = max(1, min(int(data.get("rounds", 3)), 8))
-    budget = max(0.01, float(data.get("budget", 0.75)))
-    temp = max(0.0, min(float(data.get("temp", 0.2)), 1.0))
-    consensus_threshold = max(0.1, min(float(data.get("consensus_threshold", 0.55)), 0.99))
-    keys = data.get("keys", {})
-
-    # Build agent roster
-    roster: List[Tuple[str, ModelSpec, str, object]] = []
-    warnings: List[str] = []
-
-    def _resolve_spec(item: object) -> Optional[ModelSpec]:
-        if not item:
-            return None
-        if isinstance(item, dict):
-            from debate_app.agents.providers import build_custom_model_spec
-            try:
-                return build_custom_model_spec(
-                    provider=item.get("provider", "openai"),
-                    model_id=item.get("model_id", ""),
-                    label=item.get("label") or f"Custom {item.get('model_id', '')}",
-                )
-            except Exception as e:
-                warnings.append(str(e))
-                return None
-        return MODEL_LOOKUP.get(str(item))
-
-    for i, item in enumerate(debater_items, start=1):
-        spec = _resolve_spec(item)
-        if not spec:
-            warnings.append(f"Unknown or invalid contributor model: {item}")
-            continue
-        agent = build_agent_from_spec(spec, DEBATER_SYSTEM_PROMPT, keys, f"Contributor {i}", temp)
-        roster.append(("debater", spec, f"Contributor {i}", agent))
-
-    fact_spec = _resolve_spec(fact_item)
-    if fact_spec:
-        agent = build_agent_from_spec(
-            fact_spec,
-            fill_prompt(FACT_CHECKER_SYSTEM_PROMPT, {"round_number": "{round}", "agent_name": "all agents"}),
-            keys, "Verifier", temp,
-        )
-        roster.append(("fact_checker", fact_spec, "Verifier", agent))
-
-    adv_spec = _resolve_spec(adv_item)
-    if adv_spec:
-        agent = build_agent_from_spec(
-            adv_spec,
-            fill_prompt(ADVERSARIAL_SYSTEM_PROMPT, {"round_number": "{round}", "agent_name": "consensus", "topic": query}),
-            keys, "Stress Tester", temp,
+    try:
+        options = parse_run_options(data)
+        roster, judge_spec, judge, warnings = build_roster(options)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    cached = _cached_answer(data, options)
+    if cached is not None:
+        return jsonify(cached)
+
+    run_id = uuid.uuid4().hex
+    with profiling.profile(run_id, enabled=_profile_requested(data)) as profiler:
+        payload = run_collaboration(
+            options["query"], roster, judge_spec, judge,
+            rounds=options["rounds"],
+            budget=options["budget"],
+            consensus_threshold=options["consensus_threshold"],
+            adaptive_rounds=options.get("adaptive_rounds", False),
+            min_gain_per_dollar=options.get("min_gain_per_dollar"),
+            triage=build_triage(options, roster, judge_spec, warnings),
+            escalation_threshold=options.get("escalation_threshold"),
+            executor=EXECUTOR,
+            warnings=warnings,
+            score_truth=_compute_truth_for_response if SAM_AI_AVAILABLE else None,
+            coalesce=_sharing_allowed(data),
         )
-        roster.append(("adversarial", adv_spec, "Stress Tester", agent))
-
-    judge_spec = _resolve_spec(judge_item)
-    if not judge_spec:
-        return jsonify({"error": f"Unknown judge model: {judge_item}"}), 400
-
-    judge = build_agent_from_spec(
-        judge_spec,
-        fill_prompt(JUDGE_SYSTEM_PROMPT, {"original_question": query, "n": rounds}),
-        keys, "Synthesizer", max(temp - 0.05, 0.0),
-    )
-
-    if not roster:
-        return jsonify({"error": "At least one contributor model is required."}), 400
+        payload["sam_ai_available"] = SAM_AI_AVAILABLE
+        payload["run_id"] = run_id
+        if options.get("plan"):
+            payload["roster_plan"] = options["plan"]
+        if profiler:
+            payload["profile"] = profiling.profile_paths(run_id)
+        # Serialising a big transcript is part of what gets profiled.
+        response = jsonify(payload)
+    run_store.save(payload, run_id)
+    answer_cache.CACHE.put(options, payload)
+    return response
+
+
+@app.route("/api/run/stream", methods=["POST"])
+def api_run_stream():
+    """
+    Same contract as /api/run, but answers with a Server-Sent Events stream.
+    Token deltas arrive as `agent_delta` events; the final payload arrives in
+    the `run_complete` event's metadata.
+    """
+    refused = _draining_response()
+    if refused is not None:
+        return refused
+    data = request.get_json(force=True)
+    try:
+        options = parse_run_options(data)
+        roster, judge_spec, judge, warnings = build_roster(options)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    cached = _cached_answer(data, options)
+    run_id = cached["run_id"] if cached is not None else uuid.uuid4().hex
+    stream = _register_stream(run_id)
+    subscription = stream.subscribe(max_queue=SSE_SUBSCRIBER_QUEUE)
+    stream.emit_run_start(run_id)
+    if cached is not None:
+        stream.emit_run_complete(cached)
+        return _sse_response(stream, subscription, run_id)
+
+    profile_run = _profile_requested(data)
+
+    def _run() -> None:
+        with tracing.span("stream_run", run_id=run_id), profiling.profile(run_id, enabled=profile_run):
+            _run_and_publish()
+
+    def _run_and_publish() -> None:
+        try:
+            payload = run_collaboration(
+                options["query"], roster, judge_spec, judge,
+                rounds=options["rounds"],
+                budget=options["budget"],
+                consensus_threshold=options["consensus_threshold"],
+                adaptive_rounds=options.get("adaptive_rounds", False),
+                min_gain_per_dollar=options.get("min_gain_per_dollar"),
+                triage=build_triage(options, roster, judge_spec, warnings),
+                escalation_threshold=options.get("escalation_threshold"),
+                executor=EXECUTOR,
+                warnings=warnings,
+                stream=stream,
+                score_truth=_compute_truth_for_response if SAM_AI_AVAILABLE else None,
+                coalesce=_sharing_allowed(data),
+            )
+            payload["sam_ai_available"] = SAM_AI_AVAILABLE
+            payload["run_id"] = run_id
+            if options.get("plan"):
+                payload["roster_plan"] = options["plan"]
+            if profile_run:
+                payload["profile"] = profiling.profile_paths(run_id)
+            stream.emit_run_complete(payload)
+            run_store.save(payload, run_id)
+            answer_cache.CACHE.put(options, payload)
+        except Exception as exc:
+            traceback.print_exc()
+            stream.emit_run_error(str(exc))
+        finally:
+            _prune_streams()
+
+    # The orchestrator fans out to EXECUTOR itself, so it must not occupy a pool slot.
+    threading.Thread(target=_run, name=f"run-{run_id[:8]}", daemon=True).start()
+    return _sse_response(stream, subscription, run_id)
+
+
+@app.route("/api/run/<run_id>/stream", methods=["GET"])
+def api_run_watch(run_id: str):
+    """
+    Watch a streamed run from another client (e.g. a second dashboard).
+    Replays from `?since=<event_id>` or Last-Event-ID, then follows live.
+    Slow watchers get token deltas coalesced instead of slowing the run.
+    """
+    with _RUN_STREAMS_LOCK:
+        stream = RUN_STREAMS.get(run_id)
+    if stream is None:
+        return jsonify({"error": f"Unknown or expired run: {run_id}"}), 404
 
-    # ─── Run collaborative rounds with PARALLEL execution ───
-    logs: List[Dict] = []
-    context = ""
-    total_cost = 0.0
-    stop_reason = "Configured rounds completed."
-    fatal_failure = False
+    try:
+        since = int(request.args.get("since", request.headers.get("Last-Event-ID", 0)))
+    except ValueError:
+        return jsonify({"error": "since must be an integer event id."}), 400
 
-    for round_number in range(1, rounds + 1):
-        if total_cost >= budget:
-            stop_reason = f"Stopped before round {round_number}: budget reached."
-            break
+    subscription = stream.subscribe(since=since, max_queue=SSE_SUBSCRIBER_QUEUE)
+    return _sse_response(stream, subscription, run_id)
 
-        responses: List[Dict] = []
 
-        # PARALLEL EXECUTION: Submit all agents to ThreadPoolExecutor
-        futures = {}
-        for role, spec, name, agent in roster:
-            if total_cost >= budget:
-                stop_reason = f"Budget reached in round {round_number}."
-                break
-            future = EXECUTOR.submit(agent.generate_response, query=query, context=context)
-            futures[future] = (role, spec, name, agent)
+@app.route("/api/run/<run_id>/events", methods=["GET"])
+def api_run_events(run_id: str):
+    """
+    Replay a streamed run's events after `?since=<event_id>` (or the
+    Last-Event-ID header) so a dropped client can resume cheaply.
+    """
+    with _RUN_STREAMS_LOCK:
+        stream = RUN_STREAMS.get(run_id)
+    if stream is None:
+        return jsonify({"error": f"Unknown or expired run: {run_id}"}), 404
 
-        # Collect results as they complete (non-blocking)
-        for future in as_completed(futures):
-            if total_cost >= budget:
-                break
+    try:
+        since = int(request.args.get("since", request.headers.get("Last-Event-ID", 0)))
+    except ValueError:
+        return jsonify({"error": "since must be an integer event id."}), 400
+
+    complete = stream.finished
+    encoded = stream.get_encoded_events_since(since)
+    last_event_id = stream.last_event_id
+    # Events are already JSON-encoded once at emit time; splice them rather than re-encode.
+    body = (
+        f'{{"run_id": {json.dumps(run_id)}, "last_event_id": {last_event_id}, '
+        f'"complete": {json.dumps(complete)}, "events": [{", ".join(encoded)}]}}'
+    )
+    return Response(body, mimetype="application/json")
 
-            role, spec, name, agent = futures[future]
-            try:
-                result = future.result(timeout=60)
-            except Exception as e:
-                result_content = f"Error: Agent {name} failed - {str(e)}"
-                result = AgentResponse(content=result_content, confidence=0.0, model_name=spec.model_id)
-
-            is_error = str(result.content).strip().lower().startswith("error:")
-            record = {
-                "round": round_number,
-                "agent": name,
-                "role": role,
-                "provider": PROVIDER_LABELS.get(spec.provider, spec.provider),
-                "model": spec.model_id,
-                "confidence": result.confidence,
-                "cost": result.cost,
-                "tokens_input": result.token_usage.get("input", 0),
-                "tokens_output": result.token_usage.get("output", 0),
-                "tokens_total": result.token_usage.get("total", 0),
-                "content": result.content,
-                "is_error": is_error,
-            }
-
-            # Compute SAM-AI truth level for each debater response
-            if SAM_AI_AVAILABLE and role == "debater" and not is_error:
-                truth = _compute_truth_for_response(record)
-                if truth:
-                    record["truth_level"] = truth
-
-            responses.append(record)
-            total_cost += result.cost
-            if is_error:
-                warnings.append(f"{name} failed in round {round_number}: {trim_text(str(result.content), 180)}")
-
-        if not responses:
-            break
 
-        round_cost = sum(r["cost"] for r in responses)
+@app.route("/api/runs", methods=["GET"])
+def api_runs():
+    """
+    Persisted run summaries, newest first. Query parameters: `limit` (max 200),
+    `offset`, `model` (any debater or judge model id), `query` (normalised
+    exact match) and `max_cost`.
+    """
+    if run_store.STORE is None:
+        return jsonify({"error": "Run store is disabled."}), 503
+    try:
+        page = run_store.STORE.list_runs(
+            limit=int(request.args.get("limit", 20)),
+            offset=int(request.args.get("offset", 0)),
+            model=request.args.get("model") or None,
+            query=request.args.get("query") or None,
+            max_cost=float(request.args["max_cost"]) if request.args.get("max_cost") else None,
+        )
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers, max_cost a number."}), 400
+    return jsonify(page)
 
-        if all(r["is_error"] for r in responses):
-            stop_reason = f"Stopped at round {round_number}: all agents returned errors."
-            logs.append({"round": round_number, "responses": responses, "round_cost": round_cost, "consensus": 0.0})
-            fatal_failure = True
-            break
 
-        debater_texts = [r["content"] for r in responses if r["role"] == "debater"]
-        round_consensus = consensus_score(debater_texts)
-        logs.append({"round": round_number, "responses": responses, "round_cost": round_cost, "consensus": round_consensus})
+@app.route("/api/runs/<run_id>", methods=["GET"])
+def api_run_detail(run_id: str):
+    """The stored payload of a finished run."""
+    if run_store.STORE is None:
+        return jsonify({"error": "Run store is disabled."}), 503
+    payload = run_store.STORE.get_run(run_id)
+    if payload is None:
+        return jsonify({"error": f"Unknown run: {run_id}"}), 404
+    return jsonify(payload)
 
-        context_block = "\n".join(f"{r['agent']} ({r['role']}): {r['content']}" for r in responses)
-        context = (context + f"\n\nRound {round_number}\n" + context_block).strip()
-        if len(context) > 18000:
-            context = context[-18000:]
 
-        if round_number >= 2 and round_consensus >= consensus_threshold:
-            stop_reason = f"Stopped early at round {round_number}: consensus {round_consensus:.0%}."
-            break
+@app.route("/api/runs/<run_id>/replay", methods=["POST"])
+def api_run_replay(run_id: str):
+    """
+    Replay a persisted run: provider calls are served from the recorded
+    responses (`"latency": "zero"` or `"original"`), everything else runs for
+    real. Returns the replay report with timings and any mismatches.
+    """
+    if run_store.STORE is None:
+        return jsonify({"error": "Run store is disabled."}), 503
+    payload = run_store.STORE.get_run(run_id)
+    if payload is None:
+        return jsonify({"error": f"Unknown run: {run_id}"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        report = replay.replay_run(
+            payload,
+            latency=data.get("latency", "zero"),
+            executor=EXECUTOR,
+            score_truth=_compute_truth_for_response if SAM_AI_AVAILABLE else None,
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(report)
 
-    # ─── Judge synthesis ───
-    judge_record = None
-    final_answer = "No final synthesis generated."
 
-    if total_cost < budget and not fatal_failure:
-        judge_query = (
-            f"Original question: {query}\n\nCollaborative transcript:\n{context}\n\n"
-            "Deliver one final synthesized answer with rationale, uncertainties, and practical next actions."
+@app.route("/api/batch", methods=["POST"])
+def api_batch():
+    """
+    Start a batch: `queries` (strings or {id, query, expected} objects) plus the
+    shared roster settings of /api/run. Optional: `concurrency` (max 8),
+    `rpm` and `provider_concurrency` ({provider: value}), `max_cost`, and
+    `batch_api: true` to use the providers' discounted batch APIs.
+    Returns 202 with the batch id; results are appended as debates finish.
+    """
+    refused = _draining_response()
+    if refused is not None:
+        return refused
+    data = request.get_json(force=True) or {}
+    rows = data.get("queries") or []
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"error": "queries must be a non-empty list."}), 400
+    batch_id = uuid.uuid4().hex
+    try:
+        items = [parse_query_row(row, index) for index, row in enumerate(rows, start=1)]
+        options = parse_run_options(dict(data, query="batch"))
+        # Validate on a copy: with auto_roster, build_roster writes a plan for this
+        # placeholder query into the options, and each item must plan its own.
+        build_roster(dict(options))
+        runner = batch.BatchRunner(
+            items, options, os.path.join(BATCH_DIR, f"{batch_id}.jsonl"),
+            concurrency=max(1, min(int(data.get("concurrency", 2)), MAX_BATCH_CONCURRENCY)),
+            limiter=batch.ProviderLimiter(
+                {p: float(v) for p, v in (data.get("rpm") or {}).items()},
+                {p: int(v) for p, v in (data.get("provider_concurrency") or {}).items()},
+            ),
+            max_cost=float(data["max_cost"]) if data.get("max_cost") is not None else None,
+            provider_batches=ProviderBatches() if data.get("batch_api") else None,
         )
-        verdict = judge.generate_response(query=judge_query, context="")
-        judge_is_error = str(verdict.content).strip().lower().startswith("error:")
-        total_cost += verdict.cost
-        judge_record = {
-            "agent": "Synthesizer",
-            "role": "judge",
-            "provider": PROVIDER_LABELS.get(judge_spec.provider, judge_spec.provider),
-            "model": judge_spec.model_id,
-            "confidence": verdict.confidence,
-            "cost": verdict.cost,
-            "tokens_input": verdict.token_usage.get("input", 0),
-            "tokens_output": verdict.token_usage.get("output", 0),
-            "tokens_total": verdict.token_usage.get("total", 0),
-            "content": verdict.content,
-            "is_error": judge_is_error,
-        }
-        final_answer = verdict.content
-        if judge_is_error:
-            warnings.append(f"Synthesizer failed: {trim_text(str(verdict.content), 180)}")
-    else:
-        if fatal_failure:
-            final_answer = "Synthesis stopped because all agents returned errors. Check your API keys."
-        else:
-            stop_reason = f"Stopped after rounds: budget cap ${budget:.2f} exhausted."
-
-    return jsonify({
-        "query": query,
-        "rounds_requested": rounds,
-        "rounds_completed": len(logs),
-        "rounds": logs,
-        "judge": judge_record,
-        "total_cost": round(total_cost, 6),
-        "stopped_reason": stop_reason,
-        "final_answer": final_answer,
-        "warnings": warnings,
-        "sam_ai_available": SAM_AI_AVAILABLE,
-    })
+    except (TypeError, ValueError, AttributeError) as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    BATCH_JOBS[batch_id] = runner
+    finished = [job_id for job_id, job in BATCH_JOBS.items() if job.finished_at is not None]
+    for job_id in finished[: max(0, len(BATCH_JOBS) - MAX_TRACKED_BATCHES)]:
+        BATCH_JOBS.pop(job_id, None)
+    threading.Thread(target=runner.run, name=f"batch-{batch_id[:8]}", daemon=True).start()
+    return jsonify({"batch_id": batch_id, "total": runner.total, "status_url": f"/api/batch/{batch_id}"}), 202
+
+
+@app.route("/api/batch/<batch_id>", methods=["GET"])
+def api_batch_status(batch_id: str):
+    runner = BATCH_JOBS.get(batch_id)
+    if runner is None:
+        return jsonify({"error": f"Unknown batch: {batch_id}"}), 404
+    return jsonify({"batch_id": batch_id, **runner.status()})
+
+
+@app.route("/api/batch/<batch_id>/results", methods=["GET"])
+def api_batch_results(batch_id: str):
+    """The batch's JSONL rows written so far."""
+    runner = BATCH_JOBS.get(batch_id)
+    if runner is None:
+        return jsonify({"error": f"Unknown batch: {batch_id}"}), 404
+    if not os.path.exists(runner.out_path):
+        return Response("", mimetype="application/x-ndjson")
+    with open(runner.out_path, "r", encoding="utf-8") as handle:
+        text = handle.read()
+    # A row may be mid-write; serve complete lines only.
+    return Response(text[: text.rfind("\n") + 1], mimetype="application/x-ndjson")
 
 
 @app.route("/api/analyze", methods=["POST"])
@@ -333,11 +627,26 @@ def api_analyze():
     if not text:
         return jsonify({"error": "No text provided for analysis."}), 400
 
+    profile_id = f"analyze-{uuid.uuid4().hex}"
+    with profiling.profile(profile_id, enabled=_profile_requested(data)) as profiler:
+        response = make_response(_run_analysis(data, text))
+    if profiler:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _run_analysis(data: dict, text: str):
+    """SAM-AI report plus per-response truth levels for /api/analyze."""
     try:
         # Run the full SAM-AI analysis pipeline
-        report = run_full_analysis(text)
+        started = time.perf_counter()
+        with tracing.span("sam_ai_analysis", chars=len(text)):
+            report = run_full_analysis(text)
+        analysis_ms = elapsed_ms(started)
+        metrics.SCORING_DURATION.observe(analysis_ms / 1000.0, kind="sam_ai_analysis")
 
         # Compute individual truth levels if responses provided
+        started = time.perf_counter()
         individual_truths = []
         responses = data.get("responses", [])
         for resp in responses:
@@ -354,6 +663,7 @@ def api_analyze():
             "sam_ai_available": True,
             "analysis": report,
             "individual_truths": individual_truths,
+            "timings": {"analysis_ms": analysis_ms, "truth_ms": elapsed_ms(started)},
         })
 
     except Exception as e:
@@ -367,15 +677,28 @@ def api_analyze():
 
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    """Check if the server is running and ready."""
+    """Check if the server is running and ready (503 while the worker drains)."""
     return jsonify({
-        "status": "healthy",
+        "status": "draining" if DRAINING.is_set() else "healthy",
         "server": "SynapseForge v2.0 + SAM-AI",
-        "parallel_workers": 10,
+        "pid": os.getpid(),
+        "parallel_workers": EXECUTOR.max_workers,
+        "executor": _executor_stats(),
+        "memory_rss_mb": _process_rss_mb(),
+        "tracked_runs": len(RUN_STREAMS),
+        "run_store": run_store.STORE.stats() if run_store.STORE is not None else None,
+        "answer_cache": answer_cache.CACHE.stats(),
+        "single_flight": coalescing.FLIGHTS.stats(),
         "models_available": len(MODEL_CATALOG),
         "sam_ai_available": SAM_AI_AVAILABLE,
         "sam_ai_error": _SAM_AI_ERROR if not SAM_AI_AVAILABLE else None,
-    }), 200
+    }), 503 if DRAINING.is_set() else 200
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/api/models", methods=["GET"])
@@ -420,5 +743,8 @@ if __name__ == "__main__":
     print(f"  SAM-AI: {'[OK] Available' if SAM_AI_AVAILABLE else '[WARN] Not Available'}")
     if not SAM_AI_AVAILABLE:
         print(f"  Error: {_SAM_AI_ERROR}")
+    print("  Development server; use `gunicorn -c gunicorn.conf.py server:app` in production.")
     print("=" * 60)
-    app.run(debug=True, use_reloader=False, port=5000, threaded=True)
+    # The Werkzeug debugger executes code from the browser: opt in with SYNAPSE_DEBUG=1.
+    debug = os.getenv("SYNAPSE_DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+    app.run(debug=debug, use_reloader=False, port=5000, threaded=True)
@@ -320,10 +320,28 @@ async function runSynthesis() {
     }
   };
 
+  const loadingLive = document.getElementById("loading-live");
+  loadingLive.innerHTML = "";
+  const liveText = {};
+
+  const onStreamEvent = (ev) => {
+    const key = `${ev.agent_name} · round ${ev.round_number}`;
+    if (ev.event_type === "round_start") {
+      loadingText.textContent = `⚡ Round ${ev.round_number} in progress...`;
+    } else if (ev.event_type === "agent_delta") {
+      liveText[key] = (liveText[key] || "") + ev.content;
+      loadingLive.innerHTML = `<strong>${escapeHtml(ev.agent_name)}</strong>\n${escapeHtml(liveText[key].slice(-480))}`;
+    } else if (ev.event_type === "agent_response") {
+      loadingSub.textContent = `${ev.agent_name} finished round ${ev.round_number}`;
+    } else if (ev.event_type === "synthesis_start") {
+      loadingText.textContent = "⚖️ Synthesizing final answer...";
+    }
+  };
+
   try {
     loadingText.textContent = "⚡ Running collaborative synthesis...";
     loadingSub.textContent = `${payload.debaters.length} models × ${payload.rounds} rounds`;
-    const resp = await fetch("/api/run", {
+    const resp = await fetch("/api/run/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(payload),
@@ -334,7 +352,8 @@ async function runSynthesis() {
       throw new Error(errData.error || "Server error: " + resp.status);
     }
 
-    lastRun = await resp.json();
+    lastRun = await readRunStream(resp, onStreamEvent);
+    loadingLive.innerHTML = "";
     renderResults(lastRun);
     renderFeed(lastRun);
     renderAnalytics(lastRun);
@@ -351,9 +370,67 @@ async function runSynthesis() {
     showToast("❌ " + err.message, "error");
   } finally {
     loading.style.display = "none";
+    loadingLive.innerHTML = "";
   }
 }
 
+// Parse the Server-Sent Events body of /api/run/stream, calling onEvent for each
+// event, and resolve with the payload carried by the final run_complete event.
+// If the connection drops mid-run, missed events are replayed from
+// /api/run/<id>/events starting after the last event id seen.
+async function readRunStream(resp, onEvent) {
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+  let runId = resp.headers.get("X-Run-Id");
+  let lastEventId = 0;
+  let runError = null;
+
+  const handle = (ev) => {
+    if (ev.event_id <= lastEventId) return;
+    lastEventId = ev.event_id;
+    if (ev.event_type === "run_start") runId = ev.metadata.run_id || runId;
+    if (ev.event_type === "run_error") runError = ev.content || "Run failed";
+    if (ev.event_type === "run_complete") result = ev.metadata.payload;
+    onEvent(ev);
+  };
+
+  try {
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let sep;
+      while ((sep = buffer.indexOf("\n\n")) !== -1) {
+        const frame = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+        const data = frame.split("\n")
+          .filter(line => line.startsWith("data:"))
+          .map(line => line.slice(5).trim())
+          .join("\n");
+        if (data) handle(JSON.parse(data));
+      }
+    }
+  } catch (err) {
+    if (!runId) throw err;
+  }
+
+  while (!result && !runError && runId) {
+    const resume = await fetch(`/api/run/${runId}/events?since=${lastEventId}`);
+    if (!resume.ok) break;
+    const batch = await resume.json();
+    batch.events.forEach(handle);
+    if (batch.complete) break;
+    await new Promise(r => setTimeout(r, 1000));
+  }
+
+  if (runError) throw new Error(runError);
+  if (!result) throw new Error("Stream ended before the run completed.");
+  return result;
+}
+
 function clearResults() {
   lastRun = null;
   document.getElementById("results-area").style.display = "none";
@@ -863,6 +940,32 @@ function renderAnalytics(run) {
     agentTokens[a] = (agentTokens[a] || 0) + (r.tokens_total || 0);
   });
 
+  const timings = run.timings || {};
+  const agentLatency = {};
+  const agentCalls = {};
+  allResponses.forEach(r => {
+    const t = r.timings || {};
+    if (t.provider_ms == null) return;
+    const a = r.agent || "Unknown";
+    agentLatency[a] = (agentLatency[a] || 0) + t.provider_ms;
+    agentCalls[a] = (agentCalls[a] || 0) + 1;
+  });
+  Object.keys(agentLatency).forEach(a => { agentLatency[a] = Math.round(agentLatency[a] / agentCalls[a]); });
+
+  const phaseRows = (run.rounds || []).map(rd => {
+    const t = rd.timings || {};
+    const calls = (rd.responses || []).map(r => r.timings || {});
+    const slowest = Math.max(0, ...calls.map(c => c.provider_ms || 0));
+    const queued = Math.max(0, ...calls.map(c => c.queue_ms || 0));
+    const ttfts = calls.map(c => c.ttft_ms).filter(v => v != null);
+    return `<tr><td>Round ${rd.round}</td><td>${fmtMs(t.wall_ms)}</td><td>${fmtMs(slowest)}</td>
+      <td>${ttfts.length ? fmtMs(Math.min(...ttfts)) : "—"}</td><td>${fmtMs(queued)}</td>
+      <td>${fmtMs((t.consensus_ms || 0) + (t.truth_ms || 0))}</td><td>${fmtMs(t.context_ms)}</td></tr>`;
+  }).join("");
+  const judgeTimings = (run.judge && run.judge.timings) || {};
+  const judgeRow = run.judge ? `<tr><td>Judge</td><td>${fmtMs(timings.judge_ms)}</td><td>${fmtMs(judgeTimings.provider_ms)}</td>
+      <td>${judgeTimings.ttft_ms != null ? fmtMs(judgeTimings.ttft_ms) : "—"}</td><td>—</td><td>—</td><td>—</td></tr>` : "";
+
   container.innerHTML = `
     <div class="grid-4" style="margin-bottom:24px">
       <div class="metric-card"><div class="metric-value">$${(run.total_cost || 0).toFixed(4)}</div><div class="metric-label">Total Cost</div></div>
@@ -871,6 +974,21 @@ function renderAnalytics(run) {
       <div class="metric-card"><div class="metric-value">${agents.size}</div><div class="metric-label">Agents</div></div>
     </div>
 
+    <div class="grid-4" style="margin-bottom:24px">
+      <div class="metric-card"><div class="metric-value">${fmtMs(timings.total_ms)}</div><div class="metric-label">Run Time</div></div>
+      <div class="metric-card"><div class="metric-value">${timings.first_token_ms != null ? fmtMs(timings.first_token_ms) : "—"}</div><div class="metric-label">First Token</div></div>
+      <div class="metric-card"><div class="metric-value">${fmtMs(timings.judge_ms)}</div><div class="metric-label">Judge</div></div>
+      <div class="metric-card"><div class="metric-value">${fmtMs((timings.consensus_ms || 0) + (timings.truth_ms || 0))}</div><div class="metric-label">Scoring</div></div>
+    </div>
+
+    <div class="card" style="margin-bottom:20px">
+      <div class="card-title" style="margin-bottom:12px"><span class="icon">⏱️</span> Phase Timings</div>
+      <table class="timing-table">
+        <thead><tr><th>Phase</th><th>Wall</th><th>Slowest call</th><th>First token</th><th>Max queue wait</th><th>Scoring</th><th>Context</th></tr></thead>
+        <tbody>${phaseRows}${judgeRow}</tbody>
+      </table>
+    </div>
+
     <div class="grid-2">
       <div class="card">
         <div class="card-title" style="margin-bottom:12px"><span class="icon">📈</span> Cost per Round</div>
@@ -891,9 +1009,21 @@ function renderAnalytics(run) {
         <canvas id="chart-provider" height="220"></canvas>
       </div>
     </div>
+    <div class="grid-2" style="margin-top:20px">
+      <div class="card">
+        <div class="card-title" style="margin-bottom:12px"><span class="icon">⏱️</span> Avg Provider Latency by Agent (ms)</div>
+        <canvas id="chart-latency" height="220"></canvas>
+      </div>
+    </div>
   `;
 
   drawCharts(roundCosts, agentTokens, providerCosts);
+  drawBarChart("chart-latency", Object.keys(agentLatency), Object.values(agentLatency));
+}
+
+function fmtMs(ms) {
+  if (ms == null || isNaN(ms)) return "—";
+  return ms >= 1000 ? (ms / 1000).toFixed(2) + "s" : Math.round(ms) + "ms";
 }
 
 // ═════════════════════════════════════════════════════════════════
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+"""
+Micro-benchmarks for the CPU-side hot paths of a debate run.
+
+Times consensus_score, fill_prompt, context extension/truncation,
+_build_messages, normalize_run_payload, QueryClassifier.classify/classify_many and
+compute_truth_level on seeded fixtures (2-20 agents, 1-8 rounds, 2-20 KB
+responses) with the stdlib timeit, so no extra dependency is needed.
+
+Each run is stored as output/benchmarks/micro/<commit>.json; pass --compare to
+diff against another commit's file and exit 1 on regressions.
+
+    python -m tests.bench_hotpaths
+    python -m tests.bench_hotpaths --compare HEAD~1 --threshold 0.25
+    python -m tests.bench_hotpaths --quick --only consensus
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import subprocess
+import time
+import timeit
+
+from debate_app.agents.providers import _build_messages
+from debate_app.core.prompts import ADVERSARIAL_SYSTEM_PROMPT, JUDGE_SYSTEM_PROMPT
+from debate_app.orchestrator import consensus_score, extend_context, fill_prompt
+from debate_app.v3_core import QueryClassifier
+
+OUT_DIR = os.path.join("output", "benchmarks", "micro")
+AGENT_COUNTS = (2, 6, 20)
+ROUND_COUNTS = (1, 4, 8)
+RESPONSE_KB = (2, 20)
+
+VOCABULARY = (
+    "evidence suggests deployment latency throughput regression baseline rollout trunk branch "
+    "release velocity defects review pipeline caching consensus uncertainty tradeoff hypothesis "
+    "measurement variance incident reliability staffing migration dependency contract boundary "
+    "however therefore although because despite whereas moreover additionally consequently"
+).split()
+
+QUERIES = [
+    "What is the capital of Australia?",
+    "Why did the 2008 financial crisis spread so quickly?",
+    "Is it ethical to use facial recognition in schools?",
+    "Write a short story about a lighthouse keeper.",
+    "How many moons does Jupiter have and when were they discovered?",
+    "Should we migrate our monolith to microservices next quarter?",
+    "What caused the decline of the Roman Empire?",
+    "Compare Rust and Go for building network services.",
+]
+
+
+def make_text(rng, size_kb):
+    """Prose-like text of roughly size_kb kilobytes."""
+    words, length = [], 0
+    while length < size_kb * 1024:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.08:
+            words[-1] += "."
+    return " ".join(words)
+
+
+def make_responses(rng, agents, size_kb, round_number=1):
+    return [
+        {
+            "round": round_number,
+            "agent": f"Contributor {i + 1}",
+            "role": "debater",
+            "provider": "Mock",
+            "model": "mock-skeptic",
+            "confidence": 0.62,
+            "cost": 0.0012,
+            "tokens_input": 1200,
+            "tokens_output": size_kb * 256,
+            "tokens_total": 1200 + size_kb * 256,
+            "content": make_text(rng, size_kb),
+            "is_error": False,
+        }
+        for i in range(agents)
+    ]
+
+
+def make_payload(rng, agents, rounds, size_kb):
+    return {
+        "query": QUERIES[0],
+        "rounds_requested": rounds,
+        "rounds_completed": rounds,
+        "rounds": [
+            {"round": r, "responses": make_responses(rng, agents, size_kb, r), "round_cost": 0.01, "consensus": 0.4}
+            for r in range(1, rounds + 1)
+        ],
+        "judge": None,
+        "total_cost": 0.05,
+        "stopped_reason": "Configured rounds completed.",
+        "final_answer": make_text(rng, size_kb),
+        "warnings": [],
+    }
+
+
+def build_cases():
+    """Name -> zero-argument callable for every benchmark case."""
+    rng = random.Random(2024)
+    cases = {}
+
+    for agents in AGENT_COUNTS:
+        for size_kb in RESPONSE_KB:
+            texts = [r["content"] for r in make_responses(rng, agents, size_kb)]
+            cases[f"consensus_score[agents={agents},kb={size_kb}]"] = lambda texts=texts: consensus_score(texts)
+
+    for size_kb in RESPONSE_KB:
+        topic = make_text(rng, size_kb)
+        cases[f"fill_prompt[kb={size_kb}]"] = lambda topic=topic: fill_prompt(
+            ADVERSARIAL_SYSTEM_PROMPT, {"round_number": 3, "agent_name": "consensus", "topic": topic}
+        )
+    cases["fill_prompt[judge]"] = lambda: fill_prompt(JUDGE_SYSTEM_PROMPT, {"original_question": QUERIES[5], "n": 4})
+
+    for agents in AGENT_COUNTS:
+        for rounds in ROUND_COUNTS:
+            per_round = [make_responses(rng, agents, 2, r) for r in range(1, rounds + 1)]
+
+            def extend_all(per_round=per_round):
+                context = ""
+                for number, responses in enumerate(per_round, start=1):
+                    context = extend_context(context, number, responses)
+                return context
+
+            cases[f"extend_context[agents={agents},rounds={rounds}]"] = extend_all
+
+    for size_kb in RESPONSE_KB:
+        context = make_text(rng, size_kb)
+        cases[f"build_messages[kb={size_kb}]"] = lambda context=context: _build_messages(
+            JUDGE_SYSTEM_PROMPT, QUERIES[5], context
+        )
+
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            from app import normalize_run_payload
+    except Exception:
+        normalize_run_payload = None
+    if normalize_run_payload:
+        for agents, rounds in ((2, 1), (6, 4), (20, 8)):
+            payload = make_payload(rng, agents, rounds, 2)
+            # normalize_run_payload rewrites the dict in place with the same shape, so reuse is fair.
+            cases[f"normalize_run_payload[agents={agents},rounds={rounds}]"] = (
+                lambda payload=payload: normalize_run_payload(payload)
+            )
+
+    classifier = QueryClassifier()
+    cases["classify[8 queries]"] = lambda: [classifier.classify(q) for q in QUERIES]
+    query_log = [rng.choice(QUERIES) + f" ({i % 50})" for i in range(1000)]
+    cases["classify_many[1000 queries]"] = lambda: classifier.classify_many(query_log)
+
+    try:
+        from integration.sam_bridge import compute_truth_level
+    except Exception:
+        compute_truth_level = None
+    if compute_truth_level:
+        for size_kb in RESPONSE_KB:
+            text = make_text(rng, size_kb)
+            cases[f"compute_truth_level[kb={size_kb}]"] = lambda text=text: compute_truth_level(text, 0.6)
+
+    return cases
+
+
+def time_case(func, repeat, min_time):
+    """Best per-call time in microseconds over `repeat` batches of about `min_time` seconds."""
+    timer = timeit.Timer(func)
+    single = max(timer.timeit(number=1), 1e-7)
+    number = max(1, int(min_time / single))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return round(best / number * 1e6, 3), number
+
+
+def git_commit():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"]) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return sha, dirty
+
+
+def run(only=None, quick=False):
+    cases = build_cases()
+    repeat, min_time = (2, 0.01) if quick else (5, 0.1)
+    results = {}
+    for name, func in cases.items():
+        if only and not any(token in name for token in only):
+            continue
+        per_call_us, number = time_case(func, repeat, min_time)
+        results[name] = {"us_per_call": per_call_us, "loops": number}
+    return results
+
+
+def compare(current, previous, threshold):
+    """Regression lines for cases that got slower than `threshold` (relative)."""
+    regressions = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        ratio = result["us_per_call"] / before["us_per_call"] if before["us_per_call"] else 1.0
+        marker = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"  {name:<52} {before['us_per_call']:>12.1f} -> {result['us_per_call']:>12.1f} us  x{ratio:.2f} {marker}")
+        if marker:
+            regressions.append(name)
+    return regressions
+
+
+def resolve_previous(ref, out_dir):
+    """A results file path, or a commit-ish whose stored results we load."""
+    if os.path.exists(ref):
+        return ref
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", ref], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    path = os.path.join(out_dir, f"{sha}.json")
+    return path if os.path.exists(path) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark the CPU hot paths.")
+    parser.add_argument("--only", nargs="*", default=None, help="Run cases whose name contains any of these")
+    parser.add_argument("--quick", action="store_true", help="Fewer, shorter repeats (smoke run)")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--compare", default=None, help="Commit-ish or results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.quick)
+    sha, dirty = git_commit()
+    record = {
+        "commit": sha,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "results": results,
+    }
+    # Read the comparison first: it may be the file this run is about to overwrite.
+    previous, previous_path = None, None
+    if args.compare:
+        previous_path = resolve_previous(args.compare, args.out)
+        if not previous_path:
+            print(f"No stored results for {args.compare}; run the suite on that commit first.")
+            return 1
+        with open(previous_path, "r", encoding="utf-8") as handle:
+            previous = json.load(handle)["results"]
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{sha}{'-dirty' if dirty else ''}.json")
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(record, handle, indent=2)
+
+    for name, result in results.items():
+        print(f"  {name:<52} {result['us_per_call']:>12.1f} us")
+    print(f"Stored {len(results)} cases -> {path}")
+
+    if previous is not None:
+        print(f"Compared with {previous_path}:")
+        regressions = compare(results, previous, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+"""
+Load-generation suite for the SynapseForge server.
+
+Drives N concurrent streamed debates (/api/run/stream), follows each with
+/api/analyze, and reports throughput, latency percentiles per phase (time to
+first token, each round, judge synthesis, SAM-AI), agent thread-pool saturation
+and memory growth sampled from /api/health. With --baseline it fails (exit 1)
+when a scenario regresses past the stored numbers.
+
+Runs in-process against the Flask app by default; --url targets a live server
+(start it with SYNAPSE_MOCK_PROFILE or point the roster at the stand-in).
+
+    python -m tests.load_suite --runs 40 --concurrency 8
+    python -m tests.load_suite --scenario standin --baseline tests/load_baselines.json
+    python -m tests.load_suite --url http://localhost:5000 --runs 100 --concurrency 16
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import gc
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from debate_app.agents.providers import MockProfile, set_default_mock_profile
+from debate_app.benchmark import latency_summary
+
+QUERY = "Should a five-person team move from GitFlow to trunk-based development?"
+
+SCENARIOS = {
+    "mock": {
+        "run": {
+            "debaters": ["Mock Skeptic", "Mock Optimist"],
+            "judge": "Mock Judge",
+            "fact_checker": "Mock Fact Checker",
+            "rounds": 2,
+            "consensus_threshold": 0.99,
+        },
+        "mock_profile": {
+            "latency": "fixed", "latency_ms": 40, "tokens_per_second": 1500,
+            "output_tokens": 60, "seed": 7,
+        },
+    },
+    "standin": {
+        "run": {
+            "debaters": ["Local Stand-in", "Local Stand-in"],
+            "judge": "Local Stand-in",
+            "fact_checker": "Local Stand-in",
+            "rounds": 2,
+            "consensus_threshold": 0.99,
+        },
+        "standin": {"latencies_ms": [40, 60, 80], "tokens_per_second": 1500, "completion_tokens": 60},
+    },
+}
+
+PHASES = ("total", "ttft", "rounds", "judge", "sam_ai")
+HEALTH_SAMPLE_SECONDS = 0.05
+MEMORY_SLACK_MB = 24.0
+
+
+class InProcessClient:
+    """Flask test client; the server shares this process."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, path, body=None):
+        response = self.app.test_client().open(path, method=method, json=body)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class HttpClient:
+    """Plain urllib client for a live server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=600) as response:
+                return response.status, response.read().decode("utf-8")
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read().decode("utf-8")
+
+
+def parse_sse(text):
+    return [json.loads(line[len("data:"):]) for line in text.splitlines() if line.startswith("data:")]
+
+
+def phase_timings(events):
+    """Seconds per phase from server-side event timestamps."""
+    start = next((e["timestamp"] for e in events if e["event_type"] == "run_start"), 0.0)
+    first_delta = next((e["timestamp"] for e in events if e["event_type"] == "agent_delta"), None)
+    round_starts = {e["round_number"]: e["timestamp"] for e in events if e["event_type"] == "round_start"}
+    rounds = [
+        e["timestamp"] - round_starts[e["round_number"]]
+        for e in events
+        if e["event_type"] == "round_complete" and e["round_number"] in round_starts
+    ]
+    synthesis = {e["event_type"]: e["timestamp"] for e in events if e["event_type"].startswith("synthesis_")}
+    judge = None
+    if "synthesis_start" in synthesis and "synthesis_complete" in synthesis:
+        judge = synthesis["synthesis_complete"] - synthesis["synthesis_start"]
+    return {
+        "ttft": first_delta - start if first_delta is not None and start else None,
+        "rounds": rounds,
+        "judge": judge,
+    }
+
+
+def run_once(client, body, analyze=True):
+    """One streamed debate, then SAM-AI analysis of its answer."""
+    started = time.perf_counter()
+    status, text = client.request("POST", "/api/run/stream", body)
+    total = time.perf_counter() - started
+    events = parse_sse(text) if status == 200 else []
+    final = events[-1] if events else {}
+    if final.get("event_type") != "run_complete":
+        return {"ok": False, "total": total, "error": final.get("content") or f"HTTP {status}"}
+
+    result = {"ok": True, "total": total, **phase_timings(events)}
+    if analyze:
+        payload = final["metadata"]["payload"]
+        started = time.perf_counter()
+        status, _ = client.request("POST", "/api/analyze", {
+            "text": payload.get("final_answer", ""),
+            "responses": [r for rnd in payload.get("rounds", []) for r in rnd.get("responses", [])],
+        })
+        # 503 means SAM-AI is not installed on the server; there is no phase to time.
+        result["sam_ai"] = time.perf_counter() - started if status != 503 else None
+    return result
+
+
+class HealthSampler(threading.Thread):
+    """Polls /api/health for executor load and RSS while the load runs."""
+
+    def __init__(self, client):
+        super().__init__(name="load-health", daemon=True)
+        self.client = client
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        status, text = self.client.request("GET", "/api/health")
+        if status == 200:
+            self.samples.append(json.loads(text))
+
+    def run(self):
+        while not self._stop_event.wait(HEALTH_SAMPLE_SECONDS):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+def summarize_health(samples):
+    executor = [s.get("executor") or {} for s in samples]
+    memory = [s.get("memory_rss_mb", 0.0) for s in samples]
+    workers = max((e.get("workers", 0) for e in executor), default=0)
+    saturated = [e for e in executor if e.get("queued", 0) > 0 or (workers and e.get("busy", 0) >= workers)]
+    return {
+        "executor": {
+            "workers": workers,
+            "max_busy": max((e.get("busy", 0) for e in executor), default=0),
+            "max_queued": max((e.get("queued", 0) for e in executor), default=0),
+            "saturated_share": round(len(saturated) / len(executor), 3) if executor else 0.0,
+        },
+        "memory_mb": {
+            "start": memory[0] if memory else 0.0,
+            "end": memory[-1] if memory else 0.0,
+            "peak": max(memory, default=0.0),
+            "growth": round(memory[-1] - memory[0], 1) if memory else 0.0,
+        },
+    }
+
+
+def run_load(client, body, runs, concurrency, analyze=True, warmup=1):
+    """Run `runs` debates `concurrency` at a time and build the report."""
+    for _ in range(warmup):
+        run_once(client, body, analyze)
+    # Full collections over whatever the process imported before (e.g. a whole
+    # pytest session) would otherwise land in the measured window.
+    gc.collect()
+    gc.freeze()
+
+    sampler = HealthSampler(client)
+    sampler.sample()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-") as pool:
+        results = list(pool.map(lambda _: run_once(client, body, analyze), range(runs)))
+    wall = time.perf_counter() - started
+    sampler.stop()
+    gc.unfreeze()
+
+    ok = [r for r in results if r["ok"]]
+    latency = {
+        "total": latency_summary([r["total"] for r in ok]),
+        "ttft": latency_summary([r["ttft"] for r in ok if r.get("ttft") is not None]),
+        "rounds": latency_summary([t for r in ok for t in r.get("rounds", [])]),
+        "judge": latency_summary([r["judge"] for r in ok if r.get("judge") is not None]),
+    }
+    sam_ai = [r["sam_ai"] for r in ok if r.get("sam_ai") is not None]
+    latency["sam_ai"] = latency_summary(sam_ai) if sam_ai else None
+
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "errors": len(results) - len(ok),
+        "error_samples": sorted({r["error"] for r in results if not r["ok"]})[:5],
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 3) if wall else 0.0,
+        "latency_s": latency,
+        **summarize_health(sampler.samples),
+    }
+
+
+def baseline_from_report(report):
+    """The subset of a report that later runs are held to."""
+    return {
+        "runs": report["runs"],
+        "concurrency": report["concurrency"],
+        "errors": report["errors"],
+        "throughput_rps": report["throughput_rps"],
+        "latency_s": {
+            phase: {"p95": summary["p95"]} for phase, summary in report["latency_s"].items() if summary
+        },
+        "memory_mb": {"growth": report["memory_mb"]["growth"]},
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Regression messages for `report` against a stored baseline (empty when within tolerance)."""
+    failures = []
+    if (report["runs"], report["concurrency"]) != (baseline["runs"], baseline["concurrency"]):
+        failures.append(
+            f"shape {report['runs']}x{report['concurrency']} differs from baseline "
+            f"{baseline['runs']}x{baseline['concurrency']}"
+        )
+        return failures
+    if report["errors"] > baseline.get("errors", 0):
+        failures.append(f"errors {report['errors']} > baseline {baseline.get('errors', 0)}")
+    floor = baseline["throughput_rps"] * (1 - tolerance)
+    if report["throughput_rps"] < floor:
+        failures.append(f"throughput {report['throughput_rps']} rps < {floor:.3f} rps")
+    for phase in PHASES:
+        expected = (baseline["latency_s"].get(phase) or {}).get("p95")
+        measured = (report["latency_s"].get(phase) or {}).get("p95")
+        if expected is None or measured is None:
+            continue
+        ceiling = expected * (1 + tolerance)
+        if measured > ceiling:
+            failures.append(f"{phase} p95 {measured}s > {ceiling:.3f}s")
+    allowed = baseline["memory_mb"]["growth"] * (1 + tolerance) + MEMORY_SLACK_MB
+    if report["memory_mb"]["growth"] > allowed:
+        failures.append(f"memory growth {report['memory_mb']['growth']} MB > {allowed:.1f} MB")
+    return failures
+
+
+def run_scenario(name, runs, concurrency, url=None, analyze=True):
+    """Set up the providers a scenario needs and run it in-process or against `url`."""
+    scenario = SCENARIOS[name]
+    # Every request repeats QUERY; bypass the answer cache so each one runs a debate.
+    body = {"query": QUERY, "cache": False, **scenario["run"]}
+    standin = None
+    if url:
+        return run_load(HttpClient(url), body, runs, concurrency, analyze)
+
+    from server import app
+
+    if "mock_profile" in scenario:
+        set_default_mock_profile(MockProfile.from_dict(scenario["mock_profile"]))
+    if "standin" in scenario:
+        from tests.openai_standin import OpenAIStandin
+
+        standin = OpenAIStandin(**scenario["standin"]).start()
+        os.environ["LOCAL_OPENAI_BASE_URL"] = standin.base_url
+    try:
+        return run_load(InProcessClient(app), body, runs, concurrency, analyze)
+    finally:
+        set_default_mock_profile(None)
+        if standin:
+            standin.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test /api/run/stream and /api/analyze.")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mock")
+    parser.add_argument("--runs", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--url", default=None, help="Live server base URL (default: in-process)")
+    parser.add_argument("--no-analyze", action="store_true", help="Skip the /api/analyze call per run")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression")
+    parser.add_argument("--out", default=os.path.join("output", "benchmarks", "load"))
+    args = parser.parse_args(argv)
+
+    report = run_scenario(args.scenario, args.runs, args.concurrency, args.url, not args.no_analyze)
+    report["scenario"] = args.scenario
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"{args.scenario}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    latency = report["latency_s"]
+    print(f"{args.scenario}: {report['runs']} runs x{report['concurrency']} in {report['wall_s']}s "
+          f"-> {report['throughput_rps']} runs/s, {report['errors']} errors")
+    for phase in PHASES:
+        if latency.get(phase):
+            print(f"  {phase:<7} p50 {latency[phase]['p50']}s  p95 {latency[phase]['p95']}s  p99 {latency[phase]['p99']}s")
+    print(f"  executor {report['executor']}  memory {report['memory_mb']}")
+    print(f"  report -> {out_path}")
+
+    if args.baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as handle:
+                baselines = json.load(handle)
+        if args.update_baseline:
+            baselines[args.scenario] = baseline_from_report(report)
+            with open(args.baseline, "w", encoding="utf-8") as handle:
+                json.dump(baselines, handle, indent=2)
+            print(f"  baseline updated -> {args.baseline}")
+        elif args.scenario in baselines:
+            failures = compare_to_baseline(report, baselines[args.scenario], args.tolerance)
+            for failure in failures:
+                print(f"  REGRESSION: {failure}")
+            return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
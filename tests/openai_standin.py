@@ -0,0 +1,510 @@
+#!/usr/bin/env python
+"""
+Local OpenAI-compatible stand-in server for end-to-end throughput tests.
+
+Serves /v1/chat/completions (plain and streamed, with usage) and /v1/models on
+a background thread, so the real ChatOpenAI client path - connection pooling,
+JSON parsing, usage metadata extraction - runs without keys or network.
+
+Prompts are cached like OpenAI's automatic prefix caching: usage reports
+`prompt_tokens_details.cached_tokens` for the prefix shared with an earlier
+prompt, in 128-token steps once it reaches `prompt_cache_min_tokens`.
+
+It also answers the asynchronous batch APIs: OpenAI's /v1/files + /v1/batches
+and Anthropic's /v1/messages/batches. A batch reports in progress for
+`batch_delay_s` and then ends with one result per request. Scripted faults
+apply per request, so "500"/"429" produce errored result lines.
+
+Use it from tests:
+
+    with OpenAIStandin(latencies_ms=[50, 120], faults=["500"]) as standin:
+        os.environ["LOCAL_OPENAI_BASE_URL"] = standin.base_url
+
+or standalone for load runs:
+
+    python -m tests.openai_standin --port 8089 --latency-ms 800 --tokens-per-second 60
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAULTS = ("500", "429", "timeout", "disconnect", "malformed")
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "OpenAIStandin/1.0"
+
+    def setup(self):
+        super().setup()
+        self.server.standin._count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def _send_bytes(self, data, content_type="application/jsonl"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        standin = self.server.standin
+        if path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "local-standin", "object": "model"}]})
+            return
+        parts = path.split("/")
+        if path.startswith("/v1/batches/"):
+            batch = standin._openai_batch(parts[3])
+            if batch:
+                self._send_json(200, batch)
+            else:
+                self._not_found()
+        elif path.startswith("/v1/files/") and path.endswith("/content"):
+            data = standin._files.get(parts[3])
+            if data is not None:
+                self._send_bytes(data)
+            else:
+                self._not_found()
+        elif path.startswith("/v1/messages/batches/") and path.endswith("/results"):
+            batch = standin._anthropic_batch(parts[4])
+            if batch and batch["processing_status"] == "ended":
+                self._send_bytes(standin._files[batch["id"]])
+            else:
+                self._not_found()
+        elif path.startswith("/v1/messages/batches/"):
+            batch = standin._anthropic_batch(parts[4])
+            if batch:
+                self._send_json(200, batch)
+            else:
+                self._not_found()
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        path = self.path.rstrip("/")
+        standin = self.server.standin
+        if path == "/v1/files":
+            content = _multipart_file(raw, self.headers.get("Content-Type", ""))
+            if content is None:
+                self._send_json(400, {"error": {"message": "Expected a multipart file upload", "type": "invalid_request_error"}})
+                return
+            self._send_json(200, standin._store_file(content))
+            return
+        if path not in ("/v1/chat/completions", "/v1/batches", "/v1/messages/batches"):
+            self._not_found()
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+        if path == "/v1/batches":
+            batch = standin._create_openai_batch(body)
+            if batch:
+                self._send_json(200, batch)
+            else:
+                self._not_found()
+        elif path == "/v1/messages/batches":
+            self._send_json(200, standin._create_anthropic_batch(body))
+        else:
+            standin._serve(self, body)
+
+
+def _multipart_file(raw, content_type):
+    """The payload of the `file` part of a multipart/form-data body, or None."""
+    marker = "boundary="
+    if marker not in content_type:
+        return None
+    boundary = ("--" + content_type.split(marker, 1)[1].strip().strip('"')).encode("ascii")
+    for part in raw.split(boundary):
+        head, sep, payload = part.partition(b"\r\n\r\n")
+        if sep and b'name="file"' in head:
+            return payload[:-2] if payload.endswith(b"\r\n") else payload
+    return None
+
+
+class _StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up on injected faults are expected, not test failures.
+        if isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class OpenAIStandin:
+    """
+    Scripted OpenAI-compatible server.
+
+    latencies_ms: time to first token per request, cycled in order.
+    tokens_per_second: streaming pace after the first token (0 = instant).
+    completion_tokens: words per answer; usage reports one token per word.
+    faults: scripted per-request outcomes consumed in order ("" = normal,
+        or one of FAULTS); error_rate adds random faults after the script.
+    prompt_cache_min_tokens: shortest shared prefix reported as cached.
+    batch_delay_s: how long a submitted batch stays in progress.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latencies_ms=(0.0,),
+        tokens_per_second=0.0,
+        completion_tokens=48,
+        faults=(),
+        error_rate=0.0,
+        timeout_s=30.0,
+        seed=None,
+        batch_delay_s=0.0,
+        prompt_cache_min_tokens=1024,
+    ):
+        self.latencies = itertools.cycle([float(value) for value in latencies_ms] or [0.0])
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.faults = list(faults)
+        self.error_rate = error_rate
+        self.timeout_s = timeout_s
+        self.rng = random.Random(seed)
+        self.batch_delay_s = batch_delay_s
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self._prompts = []
+        self.stats = {
+            "requests": 0, "streamed": 0, "connections": 0, "faults": 0, "in_flight": 0, "max_in_flight": 0,
+            "batches": 0, "batch_requests": 0,
+        }
+        self._files = {}
+        self._batches = {}
+        self._lock = threading.Lock()
+        self._server = _StandinServer((host, port), _StandinHandler)
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def root_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self):
+        return f"{self.root_url}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="openai-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key, delta=1):
+        with self._lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def _next_request(self):
+        """Pick (first-token delay, fault) for the next request."""
+        with self._lock:
+            delay = next(self.latencies) / 1000.0
+            fault = self.faults.pop(0) if self.faults else ""
+            if not fault and self.error_rate and self.rng.random() < self.error_rate:
+                fault = self.rng.choice(("500", "429"))
+        return delay, fault
+
+    def _answer(self, messages):
+        last = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "") or ""
+        topic = " ".join(str(last).split()[:6]) or "the question"
+        words = f"Stand-in answer on {topic}:".split()
+        filler = itertools.cycle("evidence suggests a balanced approach with measured risk".split())
+        while len(words) < self.completion_tokens:
+            words.append(next(filler))
+        return [word + " " for word in words[: max(self.completion_tokens, 1)]]
+
+    def _cached_tokens(self, prompt):
+        """Tokens of the longest prefix `prompt` shares with an earlier prompt, in 128-token steps."""
+        with self._lock:
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._prompts), default=0)
+            self._prompts.append(prompt)
+            del self._prompts[:-256]
+        tokens = shared // 4 // 128 * 128
+        return tokens if tokens >= self.prompt_cache_min_tokens else 0
+
+    def _usage(self, messages, words):
+        prompt = "".join(str(m.get("content") or "") for m in messages)
+        prompt_tokens = max(len(prompt) // 4, 1)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+            "prompt_tokens_details": {"cached_tokens": self._cached_tokens(prompt)},
+        }
+
+    def _batch_answer(self, custom_id, messages, model):
+        """(ok, body) for one batched request, consuming the fault script like a realtime call."""
+        self._count("batch_requests")
+        _, fault = self._next_request()
+        if fault in ("500", "429"):
+            self._count("faults")
+            return False, {"message": f"Stand-in injected {fault}", "type": "server_error" if fault == "500" else "rate_limit_exceeded"}
+        words = self._answer(messages)
+        return True, {"content": "".join(words).rstrip(), "usage": self._usage(messages, words), "model": model}
+
+    def _store_file(self, content):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"}
+
+    def _create_openai_batch(self, body):
+        if body.get("input_file_id") not in self._files:
+            return None
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        self._count("batches")
+        with self._lock:
+            self._batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"), "status": "in_progress",
+                "input_file_id": body["input_file_id"], "output_file_id": None, "error_file_id": None,
+                "created_at": int(time.time()), "_ready_at": time.monotonic() + self.batch_delay_s,
+            }
+        return self._openai_batch(batch_id)
+
+    def _openai_batch(self, batch_id):
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None or batch.get("object") != "batch":
+                return None
+            ready = batch["status"] == "in_progress" and time.monotonic() >= batch["_ready_at"]
+            if ready:
+                batch["status"] = "finalizing"
+            lines = self._files[batch["input_file_id"]].decode("utf-8").splitlines() if ready else []
+        if ready:
+            output = []
+            for line in filter(None, lines):
+                request = json.loads(line)
+                ok, answer = self._batch_answer(request["custom_id"], request["body"].get("messages") or [], request["body"].get("model"))
+                response = {"status_code": 200 if ok else 500, "request_id": uuid.uuid4().hex, "body": {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "model": answer.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer["content"]}, "finish_reason": "stop"}],
+                    "usage": answer["usage"],
+                } if ok else {"error": answer}}
+                output.append(json.dumps({"id": f"batch_req_{uuid.uuid4().hex[:8]}", "custom_id": request["custom_id"],
+                                          "response": response, "error": None}) + "\n")
+            output_id = self._store_file("".join(output).encode("utf-8"))["id"]
+            with self._lock:
+                batch.update(status="completed", output_file_id=output_id)
+        return {key: value for key, value in batch.items() if not key.startswith("_")}
+
+    def _create_anthropic_batch(self, body):
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:12]}"
+        self._count("batches")
+        with self._lock:
+            self._batches[batch_id] = {
+                "id": batch_id, "type": "message_batch", "processing_status": "in_progress",
+                "results_url": None, "_requests": body.get("requests") or [],
+                "_ready_at": time.monotonic() + self.batch_delay_s,
+            }
+        return self._anthropic_batch(batch_id)
+
+    def _anthropic_batch(self, batch_id):
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None or batch.get("type") != "message_batch":
+                return None
+            ready = batch["processing_status"] == "in_progress" and time.monotonic() >= batch["_ready_at"]
+            if ready:
+                batch["_ready_at"] = float("inf")  # build the results exactly once
+        if ready:
+            output = []
+            for request in batch["_requests"]:
+                params = request.get("params") or {}
+                messages = [{"role": "system", "content": params.get("system", "")}] + list(params.get("messages") or [])
+                ok, answer = self._batch_answer(request["custom_id"], messages, params.get("model"))
+                if ok:
+                    usage = answer["usage"]
+                    result = {"type": "succeeded", "message": {
+                        "id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant", "model": answer["model"],
+                        "content": [{"type": "text", "text": answer["content"]}], "stop_reason": "end_turn",
+                        "usage": {"input_tokens": usage["prompt_tokens"], "output_tokens": usage["completion_tokens"]},
+                    }}
+                else:
+                    result = {"type": "errored", "error": {"type": "error", "error": {"type": "api_error", "message": answer["message"]}}}
+                output.append(json.dumps({"custom_id": request["custom_id"], "result": result}) + "\n")
+            with self._lock:
+                self._files[batch_id] = "".join(output).encode("utf-8")
+                batch.update(processing_status="ended", results_url=f"{self.root_url}/v1/messages/batches/{batch_id}/results")
+        return {key: value for key, value in batch.items() if not key.startswith("_")}
+
+    def _serve(self, handler, body):
+        self._count("requests")
+        self._count("in_flight")
+        try:
+            self._respond(handler, body)
+        finally:
+            self._count("in_flight", -1)
+
+    def _respond(self, handler, body):
+        delay, fault = self._next_request()
+        time.sleep(delay)
+        if fault:
+            self._count("faults")
+        if fault in ("500", "429"):
+            status, kind = (500, "server_error") if fault == "500" else (429, "rate_limit_exceeded")
+            handler._send_json(
+                status,
+                {"error": {"message": f"Stand-in injected {fault}", "type": kind}},
+                headers={"retry-after-ms": "1"},
+            )
+            return
+        if fault == "timeout":
+            time.sleep(self.timeout_s)
+            handler.close_connection = True
+            return
+        if fault == "malformed":
+            data = b'{"id": "chatcmpl-broken", "choices": ['
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+            return
+
+        messages = body.get("messages") or []
+        model = body.get("model") or "local-standin"
+        words = self._answer(messages)
+        usage = self._usage(messages, words)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            if fault == "disconnect":
+                handler.close_connection = True
+                return
+            if self.tokens_per_second > 0:
+                time.sleep(len(words) / self.tokens_per_second)
+            handler._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(words).rstrip()},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self._count("streamed")
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        handler._write_chunk(f"data: {json.dumps(chunk({'role': 'assistant', 'content': ''}))}\n\n")
+        for index, word in enumerate(words):
+            if fault == "disconnect" and index == len(words) // 2:
+                handler.close_connection = True
+                return
+            if self.tokens_per_second > 0:
+                time.sleep(1.0 / self.tokens_per_second)
+            handler._write_chunk(f"data: {json.dumps(chunk({'content': word}))}\n\n")
+        handler._write_chunk(f"data: {json.dumps(chunk({}, 'stop'))}\n\n")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+            handler._write_chunk(f"data: {json.dumps(final)}\n\n")
+        handler._write_chunk("data: [DONE]\n\n")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the local OpenAI-compatible stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0.0], help="First-token latencies, cycled")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=48)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--prompt-cache-min-tokens", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    standin = OpenAIStandin(
+        host=args.host,
+        port=args.port,
+        latencies_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        prompt_cache_min_tokens=args.prompt_cache_min_tokens,
+    ).start()
+    print(f"OpenAI stand-in listening on {standin.base_url} (set LOCAL_OPENAI_BASE_URL to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Test the final-answer cache: exact and MinHash/LSH near-duplicate hits, roster keys, TTL and the API.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+from debate_app import answer_cache, metrics
+from debate_app.orchestrator import parse_run_options
+
+ROSTER = {"debaters": ["Mock Skeptic", "Mock Optimist"], "judge": "Mock Judge", "rounds": 1}
+
+
+def _options(query, **overrides):
+    return parse_run_options({"query": query, **ROSTER, **overrides})
+
+
+def _payload(query, cost=0.12):
+    return {"query": query, "run_id": "source", "final_answer": f"Answer to {query}", "total_cost": cost,
+            "judge": {"agent": "Synthesizer", "is_error": False}, "rounds": []}
+
+
+def test_exact_and_near_duplicate_hits():
+    """Rewordings above the threshold hit; different questions, rosters, run limits and accounts miss."""
+    cache = answer_cache.AnswerCache(ttl=60, threshold=0.8)
+    query = "Should we migrate our monolith to microservices next quarter?"
+    assert cache.put(_options(query), _payload(query))
+
+    exact = cache.get(_options("  should we migrate our monolith to MICROSERVICES next quarter "))
+    near = cache.get(_options("Should we migrate the monolith to microservices next quarter?"))
+    print(f"\nexact {exact['cached']}\nnear {near['cached']}")
+    assert exact["cached"]["match"] == "exact" and exact["total_cost"] == 0.0
+    assert exact["cached"]["saved_cost"] == 0.12
+    assert near["cached"]["match"] == "near" and near["cached"]["similarity"] >= 0.8
+    assert near["final_answer"] == f"Answer to {query}"
+
+    assert cache.get(_options("How many moons does Saturn have?")) is None
+    assert cache.get(_options(query, judge="Mock Skeptic")) is None
+    assert cache.get(_options(query, rounds=2)) is None
+    assert cache.get(_options(query, budget=5.0)) is None
+    assert cache.get(_options(query, consensus_threshold=0.95)) is None
+
+    # Answers are scoped to the account whose keys paid for them.
+    keyed = {"openai": "sk-tenant-a"}
+    assert cache.put(_options(query, keys=keyed), _payload(query))
+    assert cache.get(_options(query, keys={"openai": "sk-tenant-b"})) is None
+    assert cache.get(_options(query, keys=dict(keyed)))["cached"]["match"] == "exact"
+    assert "sk-tenant-a" not in answer_cache.roster_signature(_options(query, keys=keyed))
+    assert cache.stats()["hits"] == {"exact": 2, "near": 1}
+
+
+def test_numbers_ttl_and_failed_runs():
+    """Differing numbers never match, entries expire, failed syntheses are not cached but tier-1 answers are."""
+    cache = answer_cache.AnswerCache(ttl=0.2, threshold=0.8)
+    query = "What changed in the 2023 tax rules for freelancers?"
+    cache.put(_options(query), _payload(query))
+    assert cache.get(_options("What changed in the 2024 tax rules for freelancers?")) is None
+    assert cache.get(_options(query)) is not None
+    time.sleep(0.25)
+    assert cache.get(_options(query)) is None and len(cache) == 0
+
+    failed = dict(_payload(query), judge={"agent": "Synthesizer", "is_error": True})
+    assert not cache.put(_options(query), failed)
+    triaged = dict(_payload(query), judge=None, tier=1)
+    assert cache.put(_options(query), triaged) and cache.get(_options(query))["tier"] == 1
+    assert not cache.put(_options(query), dict(triaged, final_answer=""))
+    assert not answer_cache.AnswerCache(ttl=0).put(_options(query), _payload(query))
+
+
+def test_api_serves_cached_answer():
+    """A repeated /api/run (and /api/run/stream) is answered from the cache; `"cache": false` bypasses it."""
+    from server import app
+
+    answer_cache.CACHE.clear()
+    client = app.test_client()
+    body = {"query": "Is a final-answer cache worth it for reworded questions?", **ROSTER}
+    hits_before = metrics.CACHE_HITS.value(cache="answer")
+
+    first = client.post("/api/run", json=body).get_json()
+    second = client.post("/api/run", json=dict(body, query="is a final answer cache worth it for reworded questions")).get_json()
+    fresh = client.post("/api/run", json=dict(body, cache=False)).get_json()
+    streamed = client.post("/api/run/stream", json=body).get_data(as_text=True)
+
+    assert "cached" not in first and "cached" not in fresh
+    assert second["cached"]["source_run_id"] == first["run_id"]
+    assert second["final_answer"] == first["final_answer"] and second["run_id"] != first["run_id"]
+    assert '"cached": {' in streamed and "agent_delta" not in streamed
+    assert metrics.CACHE_HITS.value(cache="answer") == hits_before + 2
+    answer_cache.CACHE.clear()
+
+
+if __name__ == "__main__":
+    test_exact_and_near_duplicate_hits()
+    test_numbers_ttl_and_failed_runs()
+    test_api_serves_cached_answer()
+    print("\n✅ ALL ANSWER CACHE TESTS PASSED")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Test batch debates: checkpointed resume, provider rate limits and the /api/batch endpoints.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+import threading
+import time
+
+from debate_app import batch
+from debate_app.orchestrator import parse_run_options
+
+ROSTER = {"debaters": ["Mock Skeptic", "Mock Optimist"], "judge": "Mock Judge", "rounds": 1}
+
+
+def _items(count):
+    return [{"id": f"q{i}", "query": f"Evaluation question number {i}?", "expected": None} for i in range(count)]
+
+
+def _rows(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def test_batch_resumes_from_checkpoint():
+    """A rerun skips ids already written as ok, retries failures and ignores a torn last line."""
+    options = parse_run_options(dict(ROSTER, query="batch"))
+    with tempfile.TemporaryDirectory() as directory:
+        out = os.path.join(directory, "eval.jsonl")
+        with open(out, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps({"id": "q0", "status": "ok"}) + "\n")
+            handle.write(json.dumps({"id": "q1", "status": "error"}) + "\n")
+            handle.write('{"id": "q2", "sta')
+
+        summary = batch.BatchRunner(_items(6), options, out, concurrency=3).run()
+        rows = _rows(out)
+        print(f"\nSummary: {summary}")
+        assert summary["skipped"] == 1 and summary["ok"] == 5 and summary["failed"] == 0
+        assert sorted(r["id"] for r in rows if r["status"] == "ok") == ["q0", "q1", "q2", "q3", "q4", "q5"]
+        assert all(r.get("run_id") for r in rows[2:])
+        assert os.path.exists(batch.summary_path(out))
+
+        again = batch.BatchRunner(_items(6), options, out).run()
+        assert again["skipped"] == 6 and again["ok"] == 0 and len(_rows(out)) == len(rows)
+
+
+def test_provider_limits_are_respected():
+    """Per-provider rpm buckets pace calls and in-flight caps bound concurrency."""
+    bucket = batch.TokenBucket(rate=20.0, capacity=1.0)
+    started = time.perf_counter()
+    for _ in range(5):
+        bucket.take()
+    elapsed = time.perf_counter() - started
+    print(f"\n5 tokens at 20/s took {elapsed:.3f}s")
+    assert elapsed >= 0.18
+
+    limiter = batch.ProviderLimiter(concurrency={"mock": 2})
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def call():
+        with limiter.slot("mock"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2 and limiter.waited_s["mock"] > 0
+
+
+def test_batch_endpoint_runs_and_reports():
+    """POST /api/batch starts a job whose status and JSONL results can be polled."""
+    import server
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous, server.BATCH_DIR = server.BATCH_DIR, directory
+        try:
+            client = server.app.test_client()
+            started = client.post("/api/batch", json=dict(ROSTER, queries=["First question?", {"id": "b", "query": "Second?"}],
+                                                          concurrency=2, rpm={"mock": 600}))
+            assert started.status_code == 202
+            batch_id = started.get_json()["batch_id"]
+            deadline = time.time() + 20
+            status = {}
+            while time.time() < deadline:
+                status = client.get(f"/api/batch/{batch_id}").get_json()
+                if status["complete"]:
+                    break
+                time.sleep(0.05)
+            rows = [json.loads(line) for line in client.get(f"/api/batch/{batch_id}/results").get_data(as_text=True).splitlines()]
+            print(f"\nStatus: {status}")
+            assert status["complete"] and status["ok"] == 2
+            assert {r["id"] for r in rows} == {"1", "b"}
+            assert client.post("/api/batch", json=dict(ROSTER, queries=[])).status_code == 400
+            assert client.get("/api/batch/unknown").status_code == 404
+
+            # With auto_roster each item is planned for its own query, not for the validation placeholder.
+            planned = client.post("/api/batch", json={"queries": ["Why do leaves change colour in autumn?"],
+                                                      "auto_roster": True, "providers": ["mock"], "rounds": 1})
+            runner = server.BATCH_JOBS[planned.get_json()["batch_id"]]
+            assert "plan" not in runner.options and not runner.options["debaters"]
+            deadline = time.time() + 20
+            while runner.finished_at is None and time.time() < deadline:
+                time.sleep(0.05)
+            assert runner.finished_at is not None
+        finally:
+            server.BATCH_DIR = previous
+
+
+if __name__ == "__main__":
+    test_batch_resumes_from_checkpoint()
+    test_provider_limits_are_respected()
+    test_batch_endpoint_runs_and_reports()
+    print("\n✅ ALL BATCH TESTS PASSED")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Test provider batch-API mode against the stand-in's OpenAI and Anthropic batch endpoints.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from debate_app import batch
+from debate_app.agents.batch_api import BatchAPIAgent, ProviderBatches
+from debate_app.agents.providers import AnthropicAgent, ModelSpec
+from debate_app.core.pricing import estimate_cost
+from debate_app.orchestrator import parse_run_options
+from tests.openai_standin import OpenAIStandin
+
+LOCAL_MINI = {"provider": "local", "model_id": "gpt-4o-mini", "label": "Local mini"}
+
+
+def test_batch_pricing_discount():
+    """Models with a batch price cost half through the batch API; unknown models stay free."""
+    realtime = estimate_cost("gpt-4o", 10_000, 2_000)
+    assert estimate_cost("gpt-4o", 10_000, 2_000, batch=True) == round(realtime / 2, 6)
+    assert estimate_cost("claude-3-haiku-20240307", 1000, 1000, batch=True) == round(
+        estimate_cost("claude-3-haiku-20240307", 1000, 1000) / 2, 6)
+    assert estimate_cost("gemini-1.5-pro", 1000, 1000, batch=True) == estimate_cost("gemini-1.5-pro", 1000, 1000)
+    assert estimate_cost("local-standin", 1000, 1000, batch=True) == 0.0
+
+
+def test_batch_run_goes_through_openai_batches():
+    """Concurrent debates park at each round barrier and share one provider batch per round."""
+    options = parse_run_options({"query": "batch", "debaters": [LOCAL_MINI, dict(LOCAL_MINI, model_id="gpt-4o", label="Local 4o")],
+                                 "judge": LOCAL_MINI, "rounds": 1, "cache": False})
+    items = [{"id": f"q{i}", "query": f"Nightly question {i}?", "expected": None} for i in range(4)]
+    with OpenAIStandin(batch_delay_s=0.2, completion_tokens=30) as standin, tempfile.TemporaryDirectory() as directory:
+        os.environ["LOCAL_OPENAI_BASE_URL"] = standin.base_url
+        batches = ProviderBatches(window_s=0.3, poll_interval_s=0.05)
+        summary = batch.BatchRunner(items, options, os.path.join(directory, "out.jsonl"), concurrency=4,
+                                    include_payload=True, provider_batches=batches).run()
+        rows = batch.completed_ids(os.path.join(directory, "out.jsonl"))
+        stats = dict(standin.stats)
+    print(f"\nStand-in: {stats}\nCollectors: {summary['provider_batches']}")
+    assert summary["ok"] == 4 and rows == {"q0", "q1", "q2", "q3"}
+    assert stats["requests"] == 0 and stats["batch_requests"] == 12
+    assert stats["batches"] <= 3
+    collector = next(iter(summary["provider_batches"].values()))
+    assert collector["requests"] == 12 and collector["in_flight"] == 0
+
+
+def test_batched_costs_and_errored_requests():
+    """Anthropic batch results are priced at the batch rate; errored items come back as error responses."""
+    spec = ModelSpec(label="Claude Haiku", provider="anthropic", model_id="claude-3-haiku-20240307")
+    with OpenAIStandin(faults=["500"], completion_tokens=40) as standin:
+        batches = ProviderBatches(window_s=0.2, poll_interval_s=0.05, anthropic_base_url=standin.root_url)
+        agent = batches.wrap(AnthropicAgent(name="Claude", model_name=spec.model_id, api_key="test-key",
+                                            system_prompt="Be brief."), spec)
+        assert isinstance(agent, BatchAPIAgent)
+        # Callers sharing a batched call wait out the batch, not the realtime timeout.
+        assert agent.call_timeout_s > 24 * 3600
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            responses = list(pool.map(agent.generate_response, ["First?", "Second?"]))
+        batches.close()
+        stats = dict(standin.stats)
+    errors = [r for r in responses if r.content.startswith("Error:")]
+    answers = [r for r in responses if not r.content.startswith("Error:")]
+    print(f"\nResponses: {[(r.content[:40], r.cost) for r in responses]}")
+    assert stats["batches"] == 1 and len(errors) == 1 and len(answers) == 1
+    answer = answers[0]
+    usage = answer.token_usage
+    assert answer.confidence == 0.9 and usage["output"] == 40
+    assert answer.cost == estimate_cost(spec.model_id, usage["input"], usage["output"], batch=True) > 0
+    assert answer.metadata["batch_id"].startswith("msgbatch_")
+    assert batches.wrap(AnthropicAgent(api_key="k"), ModelSpec("Gemini", "google", "gemini-1.5-pro")) is None
+
+
+if __name__ == "__main__":
+    test_batch_pricing_discount()
+    test_batch_run_goes_through_openai_batches()
+    test_batched_costs_and_errored_requests()
+    print("\n✅ ALL BATCH API TESTS PASSED")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Test the single-agent vs debate benchmark harness on mock agents.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+from debate_app.agents.providers import MockProfile, set_default_mock_profile
+from debate_app.benchmark import load_queries, main, percentile, run_debate
+from debate_app.orchestrator import MAX_CONTEXT_CHARS, extend_context, parse_run_options
+from tests import bench_hotpaths
+
+
+def _write_queries(directory):
+    path = os.path.join(directory, "queries.jsonl")
+    rows = [
+        {"id": "q1", "query": "What is the capital of France?", "expected": "Paris"},
+        {"request_id": "q2", "title": "Caching", "body": "Why does caching reduce latency?"},
+        {"question": "Should teams pair program?"},
+    ]
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(json.dumps(row) for row in rows) + "\n")
+    return path
+
+
+def test_percentile_interpolates():
+    """Percentiles interpolate linearly between ranks."""
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 95) == 0.0
+
+
+def test_load_queries_accepts_request_style_rows():
+    """query/question/title+body rows all load, ids carried through."""
+    with tempfile.TemporaryDirectory() as directory:
+        items = load_queries(_write_queries(directory))
+    print(f"\nLoaded: {[item['id'] for item in items]}")
+    assert [item["id"] for item in items] == ["q1", "q2", "3"]
+    assert items[1]["query"] == "Caching\n\nWhy does caching reduce latency?"
+    assert items[0]["expected"] == "Paris"
+
+
+def test_benchmark_cli_writes_rows_and_summary():
+    """The CLI writes one BenchmarkResult row per query plus a summary."""
+    with tempfile.TemporaryDirectory() as directory:
+        out_dir = os.path.join(directory, "run")
+        assert main([_write_queries(directory), "--out", out_dir, "--rounds", "2"]) == 0
+
+        with open(os.path.join(out_dir, "results.jsonl"), encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle]
+        with open(os.path.join(out_dir, "summary.json"), encoding="utf-8") as handle:
+            summary = json.load(handle)
+
+    print(f"\nSummary: {json.dumps(summary['latency_s'])}")
+    assert [row["id"] for row in rows] == ["q1", "q2", "3"]
+    for row in rows:
+        assert row["performance_vs_single"] in ("better", "equal", "worse")
+        assert row["synapse_tokens"] > row["single_agent_tokens"] > 0
+        assert row["synapse_latency_s"] >= 0.0
+    assert summary["queries"] == 3
+    assert set(summary["latency_s"]["synapse"]) >= {"p50", "p95", "p99"}
+    assert sum(summary["outcomes_vs_single"].values()) == 3
+
+
+def test_tier_1_runs_score_as_answers():
+    """A run resolved at triage is a success scored by its verifier, with the triage calls counted."""
+    options = parse_run_options({
+        "query": "Name the largest planet in the solar system.", "debaters": ["Mock Skeptic", "Mock Optimist"],
+        "fact_checker": "Mock Fact Checker", "judge": "Mock Judge", "rounds": 2, "tiered": True,
+        "triage_model": "Mock Optimist", "cache": False,
+    })
+    set_default_mock_profile(MockProfile(seed=1))
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = run_debate(options, executor)
+    finally:
+        set_default_mock_profile(None)
+    triage = result["payload"]["triage"]
+    print(f"\nTier {result['payload']['tier']}: confidence {result['confidence']}, tokens {result['tokens']}")
+    assert result["payload"]["tier"] == 1 and not result["is_error"]
+    assert result["confidence"] == triage["verifier_confidence"] == 0.85
+    assert result["tokens"] == sum(r["tokens_total"] for r in triage["responses"]) > 0
+
+
+def test_micro_bench_cases_run():
+    """The hot-path micro-benchmarks build their fixtures and time every selected case."""
+    results = bench_hotpaths.run(only=["consensus_score[agents=2,", "extend_context[agents=20,rounds=8]"], quick=True)
+    print(f"\nMicro results: {results}")
+    assert len(results) == 3
+    assert all(result["us_per_call"] > 0 for result in results.values())
+
+    responses = bench_hotpaths.make_responses(bench_hotpaths.random.Random(1), 20, 2)
+    context = ""
+    for number in range(1, 9):
+        context = extend_context(context, number, responses)
+    assert len(context) == MAX_CONTEXT_CHARS
+    assert context.endswith(responses[-1]["content"])
+
+
+if __name__ == "__main__":
+    test_percentile_interpolates()
+    test_load_queries_accepts_request_style_rows()
+    test_benchmark_cli_writes_rows_and_summary()
+    test_tier_1_runs_score_as_answers()
+    test_micro_bench_cases_run()
+    print("\n✅ ALL BENCHMARK TESTS PASSED")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+"""
+Test single-flight coalescing of identical in-flight provider calls.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from debate_app import answer_cache, metrics
+from debate_app.agents import coalescing
+from debate_app.agents.providers import MockAgent, MockProfile, OpenAIAgent, set_default_mock_profile
+from debate_app.core.base import Agent, AgentResponse
+
+
+class CountingAgent(Agent):
+    """Streams three words slowly and counts how often it is really called."""
+
+    def __init__(self, fail=False):
+        super().__init__("Counter", "test agent", "Be brief.", model=None)
+        self.calls = 0
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def coalesce_key(self, query, context=None):
+        return ("Counter", query, context or "")
+
+    def generate_response_stream(self, query, context=None):
+        with self.lock:
+            self.calls += 1
+        for word in ("one ", "two ", "three"):
+            time.sleep(0.05)
+            if self.fail:
+                raise RuntimeError("upstream reset")
+            yield word
+        yield AgentResponse(content="one two three", confidence=0.5, cost=0.09, model_name="counter")
+
+
+def _consume(agent, query, coalesce=True):
+    items = list(coalescing.generate(agent, query, "", streaming=True, coalesce=coalesce))
+    return "".join(i for i in items if isinstance(i, str)), items[-1]
+
+
+def test_identical_calls_share_one_upstream_request():
+    """Concurrent identical calls go upstream once, replay the deltas and split the cost."""
+    agent = CountingAgent()
+    hits_before = metrics.CACHE_HITS.value(cache="single_flight")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(lambda _: _consume(agent, "same question"), range(3)))
+    print(f"\nUpstream calls: {agent.calls}, results: {[r[1].metadata for r in results]}")
+    assert agent.calls == 1
+    assert all(text == "one two three" for text, _ in results)
+    assert sum(1 for _, final in results if final.metadata["coalesced"]["leader"]) == 1
+    assert all(final.metadata["coalesced"]["shared_by"] == 3 for _, final in results)
+    assert abs(sum(final.cost for _, final in results) - 0.09) < 1e-9
+    assert metrics.CACHE_HITS.value(cache="single_flight") == hits_before + 2
+
+    # Once the flight has landed nothing is retained: the next call goes upstream alone.
+    text, final = _consume(agent, "same question")
+    assert agent.calls == 2 and final.cost == 0.09 and "coalesced" not in final.metadata
+
+
+def test_distinct_opted_out_and_failed_calls():
+    """Different prompts and coalesce=False never share; a leader's failure reaches its followers."""
+    agent = CountingAgent()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(lambda q: _consume(agent, q), ["first", "second"]))
+        list(pool.map(lambda _: _consume(agent, "third", coalesce=False), range(2)))
+    assert agent.calls == 4
+
+    failing = CountingAgent(fail=True)
+    errors = []
+
+    def call(_):
+        try:
+            _consume(failing, "boom")
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(call, range(2)))
+    assert failing.calls == 1 and errors == ["upstream reset", "upstream reset"]
+
+
+def test_follower_gives_up_on_hung_leader():
+    """A follower waits no longer than the call timeout, then makes its own call and takes no share."""
+    release = threading.Event()
+    agent = CountingAgent()
+
+    def hanging(after):
+        """The first call hangs once it has streamed `after` deltas; later calls run normally."""
+        def produce():
+            first = agent.calls == 0
+            for sent, item in enumerate(agent.generate_response_stream("q")):
+                if first and sent == after:
+                    release.wait(5.0)
+                yield item
+        return produce
+
+    def race(after):
+        agent.calls = 0
+        release.clear()
+        flights = coalescing.SingleFlight(timeout=0.2)
+        produce = hanging(after)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            led = pool.submit(lambda: list(flights.run("k", produce)))
+            time.sleep(0.1 + 0.05 * after)
+            started = time.monotonic()
+            followed = list(flights.run("k", produce))
+            waited = time.monotonic() - started
+            release.set()
+            return led.result(5.0), followed, waited, flights.stats()
+
+    led, followed, waited, stats = race(0)
+    print(f"\nFollower fell back after {waited:.2f}s: {stats}")
+    assert waited < 2.0 and agent.calls == 2 and stats["timeouts"] == 1
+    assert followed[-1].cost == led[-1].cost == 0.09 and "coalesced" not in led[-1].metadata
+
+    # Once deltas have been replayed a fresh call would repeat them, so the follower ends in an error.
+    led, followed, _, _ = race(1)
+    assert agent.calls == 1 and followed[0] == "one "
+    assert followed[-1].content.startswith("Error: shared provider call timed out")
+    assert led[-1].cost == 0.09 and "coalesced" not in led[-1].metadata
+
+
+def test_follower_stays_with_slow_but_live_leader():
+    """The wait restarts with every delta, and a leader's own call bound outlasts the registry default."""
+    agent = CountingAgent()
+
+    def slow(pause, words=6):
+        def produce():
+            agent.calls += 1
+            for word in range(words):
+                time.sleep(pause)
+                yield f"{word} "
+            yield AgentResponse(content="done", cost=0.06)
+        return produce
+
+    def share(produce, timeout=None):
+        flights = coalescing.SingleFlight(timeout=0.25)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            led = pool.submit(lambda: list(flights.run("k", produce, timeout)))
+            time.sleep(0.05)
+            followed = list(flights.run("k", produce, timeout))
+            return led.result(5.0), followed, flights.stats()
+
+    # 6 x 0.15s streams for about 0.9s, well past the 0.25s bound, yet never stalls that long.
+    led, followed, stats = share(slow(0.15))
+    print(f"\nLive leader: {stats}")
+    assert agent.calls == 1 and stats["timeouts"] == 0
+    assert followed[:-1] == led[:-1] and followed[-1].metadata["coalesced"]["shared_by"] == 2
+
+    # A batch-style leader is silent until it lands; its own longer bound keeps the follower waiting.
+    agent.calls = 0
+    led, followed, stats = share(slow(0.4, words=1), timeout=2.0)
+    assert agent.calls == 1 and stats["timeouts"] == 0 and followed[-1].cost == 0.03
+
+
+def test_keys_cover_prompt_and_credentials():
+    """Provider keys differ by API key, temperature and system prompt, and mocks by name."""
+    first = OpenAIAgent(model_name="gpt-4o", api_key="sk-a", system_prompt="Debate.")
+    if first.model is None:
+        print("\nlangchain_openai unavailable; checking that unconfigured agents opt out")
+        assert first.coalesce_key("q") is None
+    else:
+        assert first.coalesce_key("q") == OpenAIAgent(model_name="gpt-4o", api_key="sk-a", system_prompt="Debate.").coalesce_key("q")
+        assert first.coalesce_key("q") != OpenAIAgent(model_name="gpt-4o", api_key="sk-b", system_prompt="Debate.").coalesce_key("q")
+        assert first.coalesce_key("q") != OpenAIAgent(model_name="gpt-4o", api_key="sk-a", system_prompt="Judge.").coalesce_key("q")
+        assert "sk-a" not in repr(first.coalesce_key("q"))
+    assert OpenAIAgent(api_key="").coalesce_key("q") is None
+    assert MockAgent("A", "skeptical").coalesce_key("q") != MockAgent("B", "skeptical").coalesce_key("q")
+    assert MockAgent("A", "skeptical").coalesce_key("q", "") == MockAgent("A", "skeptical").coalesce_key("q", None)
+
+
+class CountingModel:
+    """Stands in for a chat client: answers slowly and counts upstream requests."""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.1)
+        return AIMessage(content="An independent take.")
+
+
+def test_same_model_contributors_stay_independent():
+    """Two roster slots on one model in one run are two samples, so each goes upstream."""
+    from debate_app.agents.providers import MODEL_LOOKUP
+    from debate_app.orchestrator import run_collaboration
+
+    agents = [OpenAIAgent(name=f"Contributor {i}", model_name="gpt-4o-mini", api_key="sk-a", system_prompt="Debate.")
+              for i in (1, 2)]
+    if agents[0].model is None:
+        print("\nlangchain_openai unavailable; skipping")
+        return
+    model = CountingModel()
+    for agent in agents:
+        agent.model = model
+    assert agents[0].coalesce_key("q") != agents[1].coalesce_key("q")
+    spec = MODEL_LOOKUP["OpenAI GPT-4o mini"]
+    roster = [("debater", spec, agent.name, agent) for agent in agents]
+    judge = MockAgent("Judge", "balanced")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        payload = run_collaboration("Same model, two seats?", roster, MODEL_LOOKUP["Mock Judge"], judge,
+                                    rounds=1, budget=1.0, consensus_threshold=0.99, executor=executor,
+                                    record_metrics=False)
+    records = payload["rounds"][0]["responses"]
+    print(f"\nUpstream calls: {model.calls}")
+    assert model.calls == 2 and not any("coalesced" in r for r in records)
+
+
+def test_concurrent_runs_share_round_one():
+    """Two identical /api/run requests at once share their round-1 calls; "cache": false opts out."""
+    from server import app
+
+    body = {"query": "Should we coalesce identical provider calls?", "debaters": ["Mock Skeptic", "Mock Optimist"],
+            "judge": "Mock Judge", "rounds": 1}
+    set_default_mock_profile(MockProfile(latency="fixed", latency_ms=150, price_as="gpt-4o", seed=5))
+    try:
+        client = app.test_client()
+
+        def run(extra):
+            return client.post("/api/run", json=dict(body, **extra)).get_json()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            shared = list(pool.map(run, [{}, {}]))
+            fresh = list(pool.map(run, [{"cache": False}, {"cache": False}]))
+    finally:
+        set_default_mock_profile(None)
+        answer_cache.CACHE.clear()
+
+    records = [r for payload in shared for r in payload["rounds"][0]["responses"]]
+    print(f"\nCoalesced records: {[r.get('coalesced') for r in records]}")
+    assert all(r["coalesced"]["shared_by"] == 2 for r in records)
+    assert abs(sum(r["cost"] for r in records) - sum(r["coalesced"]["upstream_cost"] for r in records) / 2) < 1e-9
+    contents = [{r["agent"]: r["content"] for r in payload["rounds"][0]["responses"]} for payload in shared]
+    assert contents[0] == contents[1]
+    assert not any("coalesced" in r for payload in fresh for r in payload["rounds"][0]["responses"])
+    assert client.get("/api/health").get_json()["single_flight"]["in_flight"] == 0
+
+
+if __name__ == "__main__":
+    test_identical_calls_share_one_upstream_request()
+    test_distinct_opted_out_and_failed_calls()
+    test_follower_gives_up_on_hung_leader()
+    test_follower_stays_with_slow_but_live_leader()
+    test_keys_cover_prompt_and_credentials()
+    test_same_model_contributors_stay_independent()
+    test_concurrent_runs_share_round_one()
+    print("\n✅ ALL COALESCING TESTS PASSED")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Test the server under concurrent load against the stored baselines.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+from tests.load_suite import compare_to_baseline, run_scenario
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_baselines.json")
+# Looser than the CLI default: CI machines are noisier than the box that recorded the baseline.
+TOLERANCE = 0.6
+
+
+def _baseline(scenario):
+    with open(BASELINES, "r", encoding="utf-8") as handle:
+        return json.load(handle)[scenario]
+
+
+def test_mock_scenario_within_baseline():
+    """Concurrent streamed debates on simulated providers stay within the stored baseline."""
+    baseline = _baseline("mock")
+    report = run_scenario("mock", baseline["runs"], baseline["concurrency"])
+    print(f"\nThroughput {report['throughput_rps']} runs/s, executor {report['executor']}")
+    assert report["errors"] == 0
+    assert report["latency_s"]["rounds"]["p50"] > 0
+    assert report["latency_s"]["judge"]["p50"] > 0
+    assert report["executor"]["max_busy"] > 0
+    assert compare_to_baseline(report, baseline, TOLERANCE) == []
+
+
+def test_regressions_are_reported():
+    """Slower phases, lower throughput and errors are all flagged."""
+    baseline = _baseline("mock")
+    report = json.loads(json.dumps(baseline))
+    report["errors"] = 2
+    report["throughput_rps"] = baseline["throughput_rps"] / 2
+    report["latency_s"]["judge"]["p95"] = baseline["latency_s"]["judge"]["p95"] * 3
+    failures = compare_to_baseline(report, baseline, 0.3)
+    print(f"\nFailures: {failures}")
+    assert len(failures) == 3
+    assert compare_to_baseline(baseline, baseline, 0.3) == []
+
+
+if __name__ == "__main__":
+    test_mock_scenario_within_baseline()
+    test_regressions_are_reported()
+    print("\n✅ ALL LOAD TESTS PASSED")
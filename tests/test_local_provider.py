@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Test the "local" provider end to end against the OpenAI-compatible stand-in server.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+
+from debate_app.agents.providers import MODEL_LOOKUP, build_agent_from_spec, provider_has_key
+from debate_app.core.base import AgentResponse
+from debate_app.orchestrator import parse_run_options, run_synthesis
+from tests.openai_standin import OpenAIStandin
+
+
+def _local_agent(standin):
+    os.environ["LOCAL_OPENAI_BASE_URL"] = standin.base_url
+    return build_agent_from_spec(MODEL_LOOKUP["Local Stand-in"], "You are a careful analyst.")
+
+
+def test_blocking_call_reads_usage():
+    """A plain completion goes through ChatOpenAI and carries the server's usage."""
+    with OpenAIStandin(completion_tokens=20) as standin:
+        response = _local_agent(standin).generate_response("Is caching worth it?")
+    print(f"\nUsage: {response.token_usage}")
+    assert provider_has_key("local")
+    assert response.content.startswith("Stand-in answer on")
+    assert response.token_usage["output"] == 20
+    assert response.token_usage["total"] == response.token_usage["input"] + 20
+
+
+def test_stream_reads_usage_chunk():
+    """Streamed completions yield deltas and pick up the trailing usage chunk."""
+    with OpenAIStandin(completion_tokens=12) as standin:
+        items = list(_local_agent(standin).generate_response_stream("Stream please"))
+    deltas = [item for item in items if isinstance(item, str)]
+    final = items[-1]
+    assert len(deltas) == 12
+    assert isinstance(final, AgentResponse)
+    assert final.content == "".join(deltas)
+    assert final.token_usage["output"] == 12
+
+
+def test_faults_surface_or_retry():
+    """A scripted 500 is retried by the client; a mid-stream disconnect becomes an error response."""
+    with OpenAIStandin(faults=["500", "", "disconnect"]) as standin:
+        agent = _local_agent(standin)
+        recovered = agent.generate_response("retry me")
+        broken = list(agent.generate_response_stream("drop me"))[-1]
+        stats = dict(standin.stats)
+    print(f"\nStats: {stats}")
+    assert not recovered.content.startswith("Error:")
+    assert broken.content.startswith("Error:")
+    assert stats["faults"] == 2
+
+
+def test_full_run_against_standin():
+    """A whole debate runs over HTTP; calls overlap and reuse pooled connections."""
+    run = {
+        "query": "Should small teams adopt trunk-based development?",
+        "debaters": ["Local Stand-in", "Local Stand-in"],
+        "judge": "Local Stand-in",
+        "fact_checker": "Local Stand-in",
+        "rounds": 2,
+    }
+    with OpenAIStandin(latencies_ms=[40, 80]) as standin:
+        os.environ["LOCAL_OPENAI_BASE_URL"] = standin.base_url
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            payload = run_synthesis(parse_run_options(run), executor)
+        stats = dict(standin.stats)
+    print(f"\nStats: {stats}")
+    assert payload["final_answer"].startswith("Stand-in answer on")
+    assert payload["rounds_completed"] >= 1
+    assert stats["max_in_flight"] > 1
+    assert stats["connections"] < stats["requests"]
+
+
+if __name__ == "__main__":
+    test_blocking_call_reads_usage()
+    test_stream_reads_usage_chunk()
+    test_faults_surface_or_retry()
+    test_full_run_against_standin()
+    print("\n✅ ALL LOCAL PROVIDER TESTS PASSED")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Test the Prometheus metrics registry and the /metrics endpoint.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from debate_app.metrics import Counter, Gauge, Histogram, Registry, classify_error
+
+
+def test_exposition_format():
+    """Counters, gauges and cumulative histogram buckets render in text format 0.0.4."""
+    registry = Registry()
+    calls = registry.register(Counter("demo_calls_total", "Calls.", ("provider",)))
+    depth = registry.register(Gauge("demo_depth", "Depth."))
+    latency = registry.register(Histogram("demo_latency_seconds", "Latency.", ("model",), (0.1, 1.0)))
+
+    calls.inc(provider='Open"AI')
+    calls.inc(2, provider='Open"AI')
+    depth.set_function(lambda: 7)
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, model="m")
+
+    text = registry.render()
+    print("\n" + text)
+    assert '# TYPE demo_calls_total counter' in text
+    assert 'demo_calls_total{provider="Open\\"AI"} 3' in text
+    assert "demo_depth 7" in text
+    assert 'demo_latency_seconds_bucket{model="m",le="0.1"} 1' in text
+    assert 'demo_latency_seconds_bucket{model="m",le="1"} 2' in text
+    assert 'demo_latency_seconds_bucket{model="m",le="+Inf"} 3' in text
+    assert 'demo_latency_seconds_count{model="m"} 3' in text
+    try:
+        calls.inc(provider="x", model="y")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unexpected labels must be rejected")
+
+
+def test_error_classes():
+    """Provider error strings map onto a small set of classes."""
+    assert classify_error("Error: OpenAI API key is missing.") == "auth"
+    assert classify_error("Error: Mock provider injected failure (HTTP 429 rate limited).") == "rate_limit"
+    assert classify_error("Error: Request timed out.") == "timeout"
+    assert classify_error("Error: Connection error.") == "unavailable"
+    assert classify_error("Error: something odd") == "other"
+
+
+def test_metrics_endpoint_after_run():
+    """/metrics reflects a finished /api/run: latency, rounds, judge, tokens and errors."""
+    from server import app
+
+    client = app.test_client()
+    client.post("/api/run", json={
+        "query": "Is caching worth it?",
+        "debaters": ["Mock Skeptic", "OpenAI GPT-4o mini"],
+        "judge": "Mock Judge",
+        "rounds": 1,
+        "cache": False,
+    })
+    response = client.get("/metrics")
+    text = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    for series in (
+        'synapse_provider_latency_seconds_count{provider="Mock",model="mock-skeptic"}',
+        "synapse_round_duration_seconds_count",
+        "synapse_judge_duration_seconds_count",
+        'synapse_tokens_per_call_count{provider="Mock",model="mock-judge",direction="output"}',
+        "synapse_active_debates 0",
+        "synapse_executor_queue_depth",
+    ):
+        assert series in text, series
+    if not os.getenv("OPENAI_API_KEY"):
+        assert 'synapse_agent_errors_total{provider="OpenAI",error_class="auth"}' in text
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_error_classes()
+    test_metrics_endpoint_after_run()
+    print("\n✅ ALL METRICS TESTS PASSED")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Test the latency-simulating mock provider used for offline load testing.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+import time
+
+from debate_app.agents.providers import MockAgent, MockProfile
+from debate_app.core.base import AgentResponse
+
+
+def test_default_profile_is_instant_and_free():
+    """Without a profile the mock behaves like the demo agent."""
+    agent = MockAgent("Contributor 1", "skeptical")
+    started = time.perf_counter()
+    response = agent.generate_response("Is caching worth it?")
+    assert time.perf_counter() - started < 0.05
+    assert response.content.startswith("[Contributor 1] Assessment:")
+    assert response.cost == 0.0
+    assert response.token_usage["total"] == response.token_usage["input"] + response.token_usage["output"]
+
+
+def test_seeded_profile_is_deterministic():
+    """Same seed, agent, query and context give identical text and usage."""
+    profile = MockProfile(output_tokens=200, seed=11, price_as="gpt-4o-mini")
+    first = MockAgent("A", "optimistic", profile).generate_response("q", "ctx")
+    second = MockAgent("A", "optimistic", profile).generate_response("q", "ctx")
+    other = MockAgent("A", "optimistic", profile).generate_response("another q", "ctx")
+    print(f"\nOutput tokens: {first.token_usage['output']} vs {other.token_usage['output']}")
+    assert first.content == second.content
+    assert first.token_usage == second.token_usage
+    assert first.cost > 0
+    assert first.token_usage["output"] > 60
+
+
+def test_latency_models():
+    """Fixed and trace latencies delay the call by the configured amount."""
+    fixed = MockAgent("A", "judge", MockProfile(latency="fixed", latency_ms=60))
+    started = time.perf_counter()
+    fixed.generate_response("q")
+    assert time.perf_counter() - started >= 0.06
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(json.dumps({"latency_ms": 40}) for _ in range(3)))
+        profile = MockProfile.parse(json.dumps({"latency": "trace", "trace_path": path, "seed": 1}))
+    assert profile.latency_trace == (40.0, 40.0, 40.0)
+    started = time.perf_counter()
+    MockAgent("A", "judge", profile).generate_response("q")
+    assert time.perf_counter() - started >= 0.04
+
+
+def test_error_injection_rate():
+    """Roughly error_rate of calls fail with a provider-style error."""
+    agent = MockAgent("A", "skeptical", MockProfile(error_rate=0.3, seed=5))
+    failures = sum(
+        agent.generate_response(f"q{i}").content.startswith("Error:") for i in range(400)
+    )
+    print(f"\nInjected failures: {failures}/400")
+    assert 80 <= failures <= 160
+
+
+def test_stream_paces_deltas():
+    """Streaming yields word deltas at tokens_per_second and ends with the response."""
+    agent = MockAgent("A", "adversarial", MockProfile(output_tokens=40, tokens_per_second=2000, seed=3))
+    items = list(agent.generate_response_stream("q"))
+    deltas = [item for item in items if isinstance(item, str)]
+    assert len(deltas) > 5
+    assert isinstance(items[-1], AgentResponse)
+    assert "".join(deltas) == items[-1].content
+
+
+def test_profile_rejects_unknown_fields():
+    """Typos in a profile fail loudly instead of silently running instant."""
+    for spec in ('{"latncy": "fixed"}', '{"latency": "gamma"}', '{"latency": "trace"}'):
+        try:
+            MockProfile.parse(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f"{spec} should be rejected")
+
+
+if __name__ == "__main__":
+    test_default_profile_is_instant_and_free()
+    test_seeded_profile_is_deterministic()
+    test_latency_models()
+    test_error_injection_rate()
+    test_stream_paces_deltas()
+    test_profile_rejects_unknown_fields()
+    print("\n✅ ALL MOCK PROVIDER TESTS PASSED")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Test the production entry point: gunicorn sizing, per-worker executors, warm-up and graceful drain.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importlib.util
+import logging
+import signal
+import threading
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_config(env):
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", os.path.join(ROOT, "gunicorn.conf.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_gunicorn_config_sizing():
+    """Workers default to the core count; threads, bind and drain time come from the environment."""
+    default = _load_config({"SYNAPSE_WEB_WORKERS": ""})
+    assert default.workers == os.cpu_count() and default.worker_class == "gthread" and default.preload_app
+    sized = _load_config({"SYNAPSE_WEB_WORKERS": "3", "SYNAPSE_WEB_THREADS": "4",
+                          "SYNAPSE_BIND": "127.0.0.1:9000", "SYNAPSE_DRAIN_TIMEOUT": "45"})
+    print(f"\nSized: {sized.workers} workers x {sized.threads} threads on {sized.bind}, drain {sized.graceful_timeout}s")
+    assert (sized.workers, sized.threads, sized.bind, sized.graceful_timeout) == (3, 4, "127.0.0.1:9000", 45)
+    assert all(callable(getattr(sized, hook)) for hook in ("when_ready", "post_fork", "post_worker_init", "worker_exit"))
+
+
+def test_warm_up_and_per_worker_executor():
+    """Warm-up loads the catalog without starting threads; each worker gets a fresh agent pool."""
+    import server
+
+    before = threading.active_count()
+    report = server.warm_up()
+    assert report["models"] == len(server.MODEL_CATALOG) and threading.active_count() == before
+    previous = server.EXECUTOR
+    fresh = server.reset_executor(3)
+    try:
+        assert server.EXECUTOR is fresh and fresh is not previous and fresh.max_workers == 3
+        assert server.app.test_client().get("/api/health").get_json()["executor"]["workers"] == 3
+    finally:
+        server.reset_executor()
+
+
+def test_agent_pool_counts_queued_and_running_calls():
+    """The pool's own counters feed /api/health: running and queued calls, back to zero after cancel."""
+    import server
+
+    release = threading.Event()
+    pool = server.reset_executor(2)
+    try:
+        futures = [pool.submit(release.wait, 5.0) for _ in range(5)]
+        time.sleep(0.1)
+        stats = server.app.test_client().get("/api/health").get_json()["executor"]
+        print(f"\nWhile blocked: {stats}")
+        assert stats == {"workers": 2, "busy": 2, "queued": 3}
+        pool.shutdown(wait=False, cancel_futures=True)
+        release.set()
+        for future in futures[:2]:
+            future.result(5.0)
+        time.sleep(0.05)
+        assert (pool.busy, pool.queued) == (0, 0) and sum(f.cancelled() for f in futures) == 3
+    finally:
+        release.set()
+        server.reset_executor()
+
+
+def test_drain_waits_for_running_debates():
+    """Draining refuses new runs with 503 and returns once the running debate ends, or at the timeout."""
+    import server
+    from debate_app import metrics
+
+    client = server.app.test_client()
+    metrics.ACTIVE_DEBATES.inc()
+    threading.Timer(0.3, metrics.ACTIVE_DEBATES.dec).start()
+    result = {}
+    drainer = threading.Thread(target=lambda: result.update(drained=server.drain(5.0), at=time.monotonic()))
+    started = time.monotonic()
+    try:
+        drainer.start()
+        time.sleep(0.1)
+        refused = client.post("/api/run", json={"query": "Too late?"})
+        health = client.get("/api/health")
+        print(f"\nWhile draining: run {refused.status_code}, health {health.status_code} {health.get_json()['status']}")
+        assert refused.status_code == 503 and refused.headers["Retry-After"] == "1"
+        assert health.status_code == 503 and health.get_json()["status"] == "draining"
+        drainer.join(5.0)
+        assert result["drained"] and result["at"] - started >= 0.3
+
+        server.reset_executor()
+        metrics.ACTIVE_DEBATES.inc()
+        try:
+            assert server.drain(0.2) is False
+        finally:
+            metrics.ACTIVE_DEBATES.dec()
+    finally:
+        server.reset_executor()
+    assert client.get("/api/health").status_code == 200
+
+
+def test_sigterm_starts_drain_and_exit_uses_the_time_left():
+    """SIGTERM refuses new runs at once; the exit hook only waits out what is left of the graceful timeout."""
+    import server
+    from debate_app import metrics
+
+    config = _load_config({"SYNAPSE_DRAIN_TIMEOUT": "1"})
+    stopped = []
+    worker = SimpleNamespace(pid=os.getpid(), log=logging.getLogger("test.worker"))
+    previous = signal.signal(signal.SIGTERM, lambda sig, frame: stopped.append(server.DRAINING.is_set()))
+    metrics.ACTIVE_DEBATES.inc()
+    try:
+        config.post_worker_init(worker)
+        os.kill(os.getpid(), signal.SIGTERM)
+        # gunicorn's own handler ran after the drain began, before the worker loop stops.
+        assert stopped == [True] and server.DRAINING.is_set()
+        assert server.app.test_client().post("/api/run", json={"query": "Too late?"}).status_code == 503
+        time.sleep(0.6)
+        started = time.monotonic()
+        config.worker_exit(None, worker)
+        waited = time.monotonic() - started
+        print(f"\nExit hook waited {waited:.2f}s of the 1s graceful timeout")
+        assert 0.2 <= waited < 0.7
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        metrics.ACTIVE_DEBATES.dec()
+        server.reset_executor()
+
+
+if __name__ == "__main__":
+    test_gunicorn_config_sizing()
+    test_warm_up_and_per_worker_executor()
+    test_agent_pool_counts_queued_and_running_calls()
+    test_drain_waits_for_running_debates()
+    test_sigterm_starts_drain_and_exit_uses_the_time_left()
+    print("\n✅ ALL PRODUCTION TESTS PASSED")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Test the opt-in sampling profiler: collapsed stacks, speedscope output and the request flag.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+import time
+
+from debate_app import profiling
+from debate_app.agents.providers import MockProfile, set_default_mock_profile
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_profiler_writes_collapsed_and_speedscope():
+    """A profiled block produces both files, with the hot function in the stacks."""
+    with tempfile.TemporaryDirectory() as directory:
+        with profiling.profile("unit", directory=directory) as profiler:
+            _busy(0.15)
+        with open(os.path.join(directory, "unit.collapsed"), encoding="utf-8") as handle:
+            collapsed = handle.read()
+        with open(os.path.join(directory, "unit.speedscope.json"), encoding="utf-8") as handle:
+            speedscope = json.load(handle)
+
+    print(f"\n{profiler.sample_count} samples; top: {collapsed.splitlines()[0][:120]}")
+    assert profiler.sample_count > 5
+    assert "_busy (" in collapsed
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    frames = speedscope["shared"]["frames"]
+    assert all(index < len(frames) for sample in speedscope["profiles"][0]["samples"] for index in sample)
+
+
+def test_should_profile_flag_and_rate():
+    """Explicit flags win; without one the sampling rate decides."""
+    assert profiling.should_profile(True)
+    assert profiling.should_profile("1")
+    assert not profiling.should_profile("false") or profiling.PROFILE_RATE > 0
+    assert not profiling.should_profile(None) or profiling.PROFILE_RATE > 0
+
+
+def test_profiled_run_covers_worker_threads():
+    """`"profile": true` on /api/run profiles the request and its executor threads."""
+    from server import app
+
+    set_default_mock_profile(MockProfile(latency="fixed", latency_ms=60))
+    try:
+        payload = app.test_client().post("/api/run", json={
+            "query": "Is caching worth it?",
+            "debaters": ["Mock Skeptic", "Mock Optimist"],
+            "judge": "Mock Judge",
+            "rounds": 1,
+            "profile": True,
+            "cache": False,
+        }).get_json()
+    finally:
+        set_default_mock_profile(None)
+
+    paths = payload["profile"]
+    with open(paths["collapsed"], encoding="utf-8") as handle:
+        collapsed = handle.read()
+    os.remove(paths["collapsed"])
+    os.remove(paths["speedscope"])
+    threads = {line.split(";", 1)[0] for line in collapsed.splitlines()}
+    print(f"\nProfiled threads: {threads}")
+    assert any(name.startswith("agent-") for name in threads)
+    assert "timed_call_agent" in collapsed
+
+
+if __name__ == "__main__":
+    test_profiler_writes_collapsed_and_speedscope()
+    test_should_profile_flag_and_rate()
+    test_profiled_run_covers_worker_threads()
+    print("\n✅ ALL PROFILING TESTS PASSED")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Test compiled prompt templates: segment rendering, load-time validation and memoised renders.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from debate_app.core.prompts import (
+    ADVERSARIAL_SYSTEM_PROMPT,
+    ADVERSARIAL_TEMPLATE,
+    FACT_CHECKER_SYSTEM_PROMPT,
+    FACT_CHECKER_TEMPLATE,
+    JUDGE_SYSTEM_PROMPT,
+)
+from debate_app.core.templates import PromptTemplate, fill_prompt
+
+
+def _legacy_fill(template, replacements):
+    output = template
+    for key, value in replacements.items():
+        output = output.replace("{" + key + "}", str(value))
+    return output
+
+
+def test_renders_match_sequential_replace():
+    """Compiled renders equal the old replace loop and leave format hints and unfilled fields alone."""
+    values = {"round_number": 4}
+    assert FACT_CHECKER_TEMPLATE.render(values) == _legacy_fill(FACT_CHECKER_SYSTEM_PROMPT, values)
+    assert fill_prompt(FACT_CHECKER_SYSTEM_PROMPT, values) == _legacy_fill(FACT_CHECKER_SYSTEM_PROMPT, values)
+    assert fill_prompt(JUDGE_SYSTEM_PROMPT, {"round_number": 1}) == JUDGE_SYSTEM_PROMPT
+
+    rendered = ADVERSARIAL_TEMPLATE.render(round_number="{round}")
+    print(f"\nAdversarial segments: {len(ADVERSARIAL_TEMPLATE.segments)}")
+    assert rendered == ADVERSARIAL_SYSTEM_PROMPT.replace("{round_number}", "{round}")
+    assert "{description}" in rendered and "{round_number}" not in rendered
+    assert FACT_CHECKER_TEMPLATE.render() is FACT_CHECKER_TEMPLATE.text
+
+    # Substituted text is never rescanned, and fill_prompt ignores keys the template lacks.
+    template = PromptTemplate("Q: {question} / {answer}", ("question", "answer"))
+    assert template.render(question="{answer}", answer="42") == "Q: {answer} / 42"
+    assert fill_prompt("Round {round_number}", {"round_number": 3, "topic": "unused"}) == "Round 3"
+
+
+def test_placeholders_validated_at_load():
+    """A declared field missing from the text fails on construction; unknown fields fail on render."""
+    try:
+        PromptTemplate("Round {round}", ("round_number",), name="broken")
+        raise AssertionError("missing placeholder was accepted")
+    except ValueError as exc:
+        assert "broken" in str(exc) and "round_number" in str(exc)
+    try:
+        ADVERSARIAL_TEMPLATE.render(round_number=1, topic="typo")
+        raise AssertionError("unknown field was accepted")
+    except KeyError as exc:
+        assert "topic" in str(exc)
+
+
+def test_renders_are_memoised():
+    """Repeated renders with the same values reuse the cached string."""
+    template = PromptTemplate("Stress test for {topic}, round {round_number}.", ("topic", "round_number"))
+    first = template.render(topic="caching", round_number=2)
+    second = template.render({"topic": "caching"}, round_number="2")
+    info = template.cache_info()
+    print(f"\nCache: {info}")
+    assert first is second and info.hits == 1 and info.misses == 1
+    assert template.render(topic="other", round_number=2) != first
+
+
+if __name__ == "__main__":
+    test_renders_match_sequential_replace()
+    test_placeholders_validated_at_load()
+    test_renders_are_memoised()
+    print("\n✅ ALL PROMPT TEMPLATE TESTS PASSED")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Test deterministic replay of recorded runs against their recorded responses.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import copy
+import tempfile
+
+from debate_app import replay, run_store
+from debate_app.agents.providers import MockProfile, set_default_mock_profile
+
+RUN_BODY = {
+    "query": "Should we replay production runs?",
+    "debaters": ["Mock Skeptic", "Mock Optimist", "Mock Challenger"],
+    "judge": "Mock Judge",
+    "rounds": 2,
+    "cache": False,
+}
+
+
+def _recorded_run():
+    from server import app
+
+    set_default_mock_profile(MockProfile(latency="fixed", latency_ms=80, seed=3))
+    try:
+        return app.test_client().post("/api/run", json=RUN_BODY).get_json()
+    finally:
+        set_default_mock_profile(None)
+
+
+def test_zero_latency_replay_matches_without_provider_time():
+    """A zero-latency replay reproduces the run and spends only orchestration time."""
+    original = _recorded_run()
+    report = replay.replay_run(original, latency="zero")
+    print(f"\nOriginal {original['timings']['total_ms']} ms -> replay {report['timings']['total_ms']} ms, "
+          f"cpu {report['cpu_ms']} ms, mismatches {report['mismatches']}")
+    assert report["mismatches"] == []
+    assert report["payload"]["final_answer"] == original["final_answer"]
+    assert report["timings"]["total_ms"] < original["timings"]["total_ms"] / 4
+
+
+def test_original_latency_replay_keeps_provider_time():
+    """With original latency each call waits as long as the recorded one did."""
+    original = _recorded_run()
+    report = replay.replay_run(original, latency="original")
+    print(f"\nOriginal {original['timings']['total_ms']} ms -> replay {report['timings']['total_ms']} ms")
+    assert report["mismatches"] == []
+    assert report["timings"]["total_ms"] >= 0.8 * original["timings"]["total_ms"]
+
+
+def test_changed_orchestration_is_reported():
+    """Differences between the recording and the replay come back as mismatches."""
+    original = _recorded_run()
+    tampered = copy.deepcopy(original)
+    tampered["rounds"][0]["consensus"] += 0.1
+    tampered["final_answer"] = "Something else."
+    mismatches = replay.replay_run(tampered)["mismatches"]
+    print(f"\nMismatches: {mismatches}")
+    assert any("round 1 consensus" in m for m in mismatches)
+    assert any(m.startswith("final_answer") for m in mismatches)
+
+
+def test_replay_endpoint_uses_the_run_store():
+    """POST /api/runs/<id>/replay replays a persisted run."""
+    from server import app
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous = run_store.STORE.path if run_store.STORE is not None else ""
+        store = run_store.configure(os.path.join(directory, "runs.sqlite3"))
+        try:
+            original = _recorded_run()
+            store.flush()
+            client = app.test_client()
+            report = client.post(f"/api/runs/{original['run_id']}/replay", json={"latency": "zero"}).get_json()
+            assert report["source_run_id"] == original["run_id"]
+            assert report["mismatches"] == []
+            assert client.post(f"/api/runs/{original['run_id']}/replay", json={"latency": "slow"}).status_code == 400
+            assert client.post("/api/runs/missing/replay").status_code == 404
+        finally:
+            run_store.configure(previous)
+
+
+if __name__ == "__main__":
+    test_zero_latency_replay_matches_without_provider_time()
+    test_original_latency_replay_keeps_provider_time()
+    test_changed_orchestration_is_reported()
+    test_replay_endpoint_uses_the_run_store()
+    print("\n✅ ALL REPLAY TESTS PASSED")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Test auto-roster planning: role counts per query type, latency/cost trade-offs, budgets and the API.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from debate_app import answer_cache, metrics, planner
+from debate_app.agents.providers import LOCAL_BASE_URL_ENV, PROVIDER_ENV_KEYS
+from debate_app.orchestrator import build_roster, parse_run_options
+
+FACTUAL = "What is the boiling point of water at sea level?"
+MINI = "OpenAI GPT-4o mini"
+
+
+def test_factual_query_skips_stress_tester():
+    """A factual query plans two contributors and a verifier; unconfigured setups fall back to mocks."""
+    saved = {name: os.environ.pop(name, None) for name in list(PROVIDER_ENV_KEYS.values()) + [LOCAL_BASE_URL_ENV]}
+    try:
+        options = parse_run_options({"query": FACTUAL, "auto_roster": True, "rounds": 2})
+        roster, judge_spec, _, warnings = build_roster(options)
+    finally:
+        os.environ.update({name: value for name, value in saved.items() if value is not None})
+    plan = options["plan"]
+    print(f"\nPlan: {plan['query_type']} {plan['debaters']} / {plan['fact_checker']} / {plan['judge']}\nWarnings: {warnings}")
+    assert plan["query_type"] == "factual" and plan["roles"] == {"contributors": 2, "verifiers": 1, "stress_testers": 0}
+    assert [role for role, *_ in roster] == ["debater", "debater", "fact_checker"]
+    assert sorted(plan["debaters"]) == ["Mock Optimist", "Mock Skeptic"] and plan["adversarial"] == ""
+    assert judge_spec.label == "Mock Judge" and plan["within_budget"]
+    assert any("suggest 2 verifiers" in w for w in warnings)
+
+    ethical = planner.plan_roster("Should companies be allowed to sell user data?", 2, 0.75, providers=["mock"])
+    assert ethical.roles["stress_testers"] == 1 and ethical.adversarial == "Mock Challenger"
+    assert len(ethical.debaters) == 3 and any("reusing" in w for w in ethical.warnings)
+
+
+def test_observed_latency_and_budget_shape_the_plan():
+    """Fast cheap models win until observed latency rules them out; an impossible budget warns."""
+    before = planner.plan_roster(FACTUAL, 3, 1.0, providers=["openai"])
+    print(f"\nBefore: {before.debaters} + {before.fact_checker}, {before.expected_latency_s}s ${before.expected_cost}")
+    assert MINI in before.debaters and before.fact_checker == MINI and before.judge == "OpenAI GPT-4o"
+    assert before.within_budget and before.expected_latency_s == 3 * 2.5 + 5.0
+
+    for _ in range(planner.MIN_OBSERVATIONS):
+        metrics.PROVIDER_LATENCY.observe(30.0, provider="OpenAI", model="gpt-4o-mini")
+    after = planner.plan_roster(FACTUAL, 3, 1.0, providers=["openai"])
+    print(f"After: {after.debaters} + {after.fact_checker}, {after.expected_latency_s}s ${after.expected_cost}")
+    assert MINI not in after.debaters and after.fact_checker != MINI
+    assert after.expected_latency_s < 3 * 30.0 and after.expected_cost > before.expected_cost
+
+    broke = planner.plan_roster(FACTUAL, 3, 0.0001, providers=["openai"])
+    assert not broke.within_budget and MINI in broke.debaters
+    assert any("over the $0.00 budget" in w for w in broke.warnings)
+    mini = next(m for m in broke.models if m["label"] == MINI)
+    assert mini["observed"] and mini["latency_s"] == 30.0
+
+
+def test_api_run_with_auto_roster():
+    """/api/run plans the roster, keeps an explicit judge and returns the plan."""
+    from server import app
+
+    body = {"query": "Why do leaves change colour in autumn?", "auto_roster": True, "providers": ["mock"],
+            "judge": "Mock Judge", "rounds": 1, "cache": False}
+    try:
+        payload = app.test_client().post("/api/run", json=body).get_json()
+    finally:
+        answer_cache.CACHE.clear()
+    plan = payload["roster_plan"]
+    roles = sorted(r["role"] for r in payload["rounds"][0]["responses"])
+    print(f"\nCausal plan: {plan['debaters']} {plan['fact_checker']} {plan['adversarial']}, roles {roles}")
+    assert plan["query_type"] == "causal" and plan["judge"] == "Mock Judge"
+    assert roles == ["adversarial", "debater", "debater", "fact_checker"]
+    assert payload["final_answer"]
+
+
+if __name__ == "__main__":
+    test_factual_query_skips_stress_tester()
+    test_observed_latency_and_budget_shape_the_plan()
+    test_api_run_with_auto_roster()
+    print("\n✅ ALL ROSTER PLANNER TESTS PASSED")
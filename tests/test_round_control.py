@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Test adaptive round control: per-round decisions, their inputs, and early stops in real runs.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+
+from debate_app import answer_cache
+from debate_app.agents.providers import MODEL_LOOKUP
+from debate_app.core.base import Agent, AgentResponse
+from debate_app.orchestrator import run_collaboration
+from debate_app.round_control import RoundController, count_issues
+
+
+class FixedAgent(Agent):
+    """Says the same thing every round at a fixed price."""
+
+    def __init__(self, name, content, cost=0.01):
+        super().__init__(name, "test agent", "Be brief.", model=None)
+        self.content = content
+        self.cost = cost
+
+    def generate_response(self, query, context=None):
+        return AgentResponse(content=self.content, confidence=0.7, cost=self.cost, model_name="fixed")
+
+
+def _log(round_number, consensus, cost=0.01, responses=()):
+    return {"round": round_number, "consensus": consensus, "round_cost": cost, "responses": list(responses)}
+
+
+def test_decisions_follow_trajectory_issues_and_budget():
+    """Flat consensus stops, rising consensus continues, open issues add value and the budget caps."""
+    controller = RoundController(max_rounds=6, budget=1.0, consensus_threshold=0.9, min_gain_per_dollar=0.5)
+    first = controller.decide([_log(1, 0.2)], 0.01)
+    assert not first["stop"] and first["reason"] == "no trajectory yet" and first["expected_gain"] is None
+
+    flat = controller.decide([_log(1, 0.2), _log(2, 0.2)], 0.02)
+    print(f"\nFlat: {flat}")
+    assert flat["stop"] and flat["reason"] == "expected gain below minimum"
+
+    rising = controller.decide([_log(1, 0.2), _log(2, 0.3), _log(3, 0.38)], 0.03)
+    print(f"Rising: {rising}")
+    assert not rising["stop"] and rising["decay"] == 0.8 and rising["expected_gain"] == round(0.08 * 0.8, 4)
+
+    pricey = controller.decide([_log(1, 0.2), _log(2, 0.3, cost=0.4)], 0.41)
+    assert pricey["stop"] and pricey["reason"] == "budget"
+    costly = RoundController(6, 10.0, 0.9).decide([_log(1, 0.2), _log(2, 0.24, cost=0.5)], 0.6)
+    assert costly["stop"] and costly["reason"] == "expected gain per dollar below threshold"
+    assert costly["gain_per_dollar"] < 0.5
+
+    verifier = {"role": "fact_checker", "content": "INCORRECT: the date. Claim B needs a source. ❌", "is_error": False}
+    stress = {"role": "adversarial", "content": "Counterpoint: edge cases under load.", "is_error": False}
+    assert count_issues([verifier, stress]) == {"fact_checker": 3, "adversarial": 2}
+    issues = controller.decide([_log(1, 0.2), _log(2, 0.2, responses=[verifier, stress])], 0.02)
+    assert not issues["stop"] and issues["verifier_issues"] == 3 and issues["expected_gain"] > 0
+
+    assert controller.decide([_log(1, 0.5), _log(2, 0.95)], 0.02)["reason"] == "consensus threshold"
+    assert RoundController(2, 1.0, 0.9).decide([_log(1, 0.2), _log(2, 0.3)], 0.02)["reason"] == "round limit"
+
+
+def test_adaptive_run_stops_when_rounds_change_nothing():
+    """A debate that repeats itself stops after round 2 instead of running all six rounds."""
+    spec = MODEL_LOOKUP["Mock Skeptic"]
+    roster = [
+        ("debater", spec, "Contributor 1", FixedAgent("A", "Caching static prompts reduces latency and cost overall.")),
+        ("debater", spec, "Contributor 2", FixedAgent("B", "Static prompts make provider caching effective for cost.")),
+    ]
+    judge = FixedAgent("Judge", "Cache the static prompts.")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        fixed = run_collaboration("Cache prompts?", roster, MODEL_LOOKUP["Mock Judge"], judge, rounds=6, budget=5.0,
+                                  consensus_threshold=0.99, executor=executor, record_metrics=False)
+        adaptive = run_collaboration("Cache prompts?", roster, MODEL_LOOKUP["Mock Judge"], judge, rounds=6, budget=5.0,
+                                     consensus_threshold=0.99, executor=executor, record_metrics=False,
+                                     adaptive_rounds=True)
+    print(f"\nFixed: {fixed['rounds_completed']} rounds ${fixed['total_cost']}; "
+          f"adaptive: {adaptive['rounds_completed']} rounds ${adaptive['total_cost']} ({adaptive['stopped_reason']})")
+    assert fixed["rounds_completed"] == 6 and "control" not in fixed["rounds"][0]
+    assert adaptive["rounds_completed"] == 2 and adaptive["total_cost"] < fixed["total_cost"]
+    assert adaptive["stopped_reason"] == "Stopped adaptively at round 2: expected gain below minimum."
+    assert [log["control"]["stop"] for log in adaptive["rounds"]] == [False, True]
+    assert adaptive["settings"]["adaptive_rounds"] is True and adaptive["final_answer"] == "Cache the static prompts."
+
+
+def test_api_run_reports_round_decisions():
+    """/api/run with "adaptive_rounds" attaches a decision to every round."""
+    from server import app
+
+    body = {"query": "Should we stop debates early?", "debaters": ["Mock Skeptic", "Mock Optimist"],
+            "fact_checker": "Mock Fact Checker", "judge": "Mock Judge", "rounds": 4,
+            "adaptive_rounds": True, "min_gain_per_dollar": 2.0, "cache": False}
+    try:
+        payload = app.test_client().post("/api/run", json=body).get_json()
+    finally:
+        answer_cache.CACHE.clear()
+    decisions = [log["control"] for log in payload["rounds"]]
+    print(f"\nDecisions: {[(d['reason'], d['expected_gain']) for d in decisions]}")
+    assert decisions and decisions[-1]["stop"] and not any(d["stop"] for d in decisions[:-1])
+    assert {"consensus_delta", "verifier_issues", "stress_issues", "remaining_budget"} <= set(decisions[0])
+    assert payload["settings"]["min_gain_per_dollar"] == 2.0
+
+
+if __name__ == "__main__":
+    test_decisions_follow_trajectory_issues_and_budget()
+    test_adaptive_run_stops_when_rounds_change_nothing()
+    test_api_run_reports_round_decisions()
+    print("\n✅ ALL ROUND CONTROL TESTS PASSED")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Test the SQLite run store: batched background writes, pagination and the /api/runs endpoints.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlite3
+import tempfile
+import threading
+
+from debate_app import run_store
+
+
+def _payload(query, cost, model="mock-skeptic"):
+    record = {"round": 1, "agent": "Contributor 1", "role": "debater", "provider": "Mock", "model": model,
+              "cost": cost, "tokens_input": 10, "tokens_output": 20, "content": "An answer.", "is_error": False,
+              "timings": {"provider_ms": 12.5}}
+    return {
+        "query": query,
+        "rounds_requested": 1,
+        "rounds_completed": 1,
+        "rounds": [{"round": 1, "responses": [record], "round_cost": cost, "consensus": 0.5, "timings": {"wall_ms": 13.0}}],
+        "judge": dict(record, round=None, agent="Synthesizer", role="judge", model="mock-judge"),
+        "total_cost": cost,
+        "stopped_reason": "Configured rounds completed.",
+        "final_answer": "Final.",
+        "warnings": [],
+        "timings": {"total_ms": 40.0},
+    }
+
+
+def test_concurrent_saves_are_batched_and_indexed():
+    """Saves from many threads land in WAL-mode tables and can be paged and filtered."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = run_store.RunStore(os.path.join(directory, "runs.sqlite3"))
+
+        def save_many(offset):
+            for i in range(25):
+                store.save(_payload(f"Question {offset + i}?", cost=(offset + i) / 1000.0,
+                                    model="mock-optimist" if i % 5 == 0 else "mock-skeptic"))
+
+        threads = [threading.Thread(target=save_many, args=(n * 25,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+
+        first = store.list_runs(limit=10)
+        second = store.list_runs(limit=10, offset=10)
+        print(f"\nStats: {store.stats()}; first page starts at {first['runs'][0]['query']}")
+        assert store.written == 100 and first["total"] == 100
+        assert not {r["run_id"] for r in first["runs"]} & {r["run_id"] for r in second["runs"]}
+        assert store.list_runs(model="mock-optimist")["total"] == 20
+        assert store.list_runs(model="mock-judge")["total"] == 100
+        assert store.list_runs(max_cost=0.0095)["total"] == 10
+        assert store.find_by_query("  question 42? ")[0]["query"] == "Question 42?"
+
+        with sqlite3.connect(store.path) as connection:
+            assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 200
+            plan = " ".join(row[-1] for row in connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM runs WHERE query_hash = ?", ("x",)))
+            assert "idx_runs_query_hash" in plan
+        store.close()
+
+
+def test_triage_calls_are_stored_as_responses():
+    """Runs resolved at tier 1 keep their triage calls as response rows, tagged by role."""
+    triage = [dict(_payload("q", 0.001)["rounds"][0]["responses"][0], round=0, agent=name, role=role, model=model)
+              for name, role, model in (("Triage 1", "triage", "mock-optimist"), ("Triage 2", "triage", "mock-optimist"),
+                                        ("Triage Verifier", "triage_verifier", "mock-fact-checker"))]
+    resolved = dict(_payload("Largest planet?", 0.003), rounds=[], judge=None, tier=1, rounds_completed=0,
+                    triage={"escalate": False, "responses": triage})
+    with tempfile.TemporaryDirectory() as directory:
+        store = run_store.RunStore(os.path.join(directory, "runs.sqlite3"))
+        run_id = store.save(resolved)
+        store.flush()
+        with sqlite3.connect(store.path) as connection:
+            rows = connection.execute("SELECT round, role, model FROM responses WHERE run_id = ? ORDER BY agent",
+                                      (run_id,)).fetchall()
+        print(f"\nTier-1 rows: {rows}")
+        assert rows == [(0, "triage", "mock-optimist"), (0, "triage", "mock-optimist"),
+                        (0, "triage_verifier", "mock-fact-checker")]
+        assert store.list_runs(model="mock-fact-checker")["total"] == 1
+        assert store.list_runs()["runs"][0]["models"] == ["mock-fact-checker", "mock-optimist"]
+        store.close()
+
+
+def test_api_runs_round_trip():
+    """A run answered by /api/run is listed by /api/runs and returned whole by /api/runs/<id>."""
+    from server import app
+
+    with tempfile.TemporaryDirectory() as directory:
+        previous = run_store.STORE.path if run_store.STORE is not None else ""
+        store = run_store.configure(os.path.join(directory, "runs.sqlite3"))
+        try:
+            client = app.test_client()
+            payload = client.post("/api/run", json={
+                "query": "Should we persist every run?",
+                "debaters": ["Mock Skeptic", "Mock Optimist"],
+                "judge": "Mock Judge",
+                "rounds": 1,
+            }).get_json()
+            store.flush()
+
+            page = client.get("/api/runs?limit=5").get_json()
+            stored = client.get(f"/api/runs/{payload['run_id']}").get_json()
+            print(f"\nListed {page['total']} run(s): {page['runs'][0]['models']}")
+            assert page["total"] == 1 and page["runs"][0]["run_id"] == payload["run_id"]
+            assert stored["final_answer"] == payload["final_answer"]
+            assert stored["rounds"] == payload["rounds"]
+            assert client.get("/api/runs/missing").status_code == 404
+            assert client.get("/api/runs?limit=abc").status_code == 400
+        finally:
+            run_store.configure(previous)
+
+
+if __name__ == "__main__":
+    test_concurrent_saves_are_batched_and_indexed()
+    test_triage_calls_are_stored_as_responses()
+    test_api_runs_round_trip()
+    print("\n✅ ALL RUN STORE TESTS PASSED")
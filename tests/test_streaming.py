@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+"""
+Test token-level streaming: provider deltas, orchestrator events and the SSE endpoint.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from debate_app.agents.providers import OpenAIAgent
+from debate_app.core.base import AgentResponse
+from debate_app.orchestrator import parse_run_options, run_synthesis
+from debate_app.streaming import StreamEvent, StreamingDebateManager
+
+DEMO_RUN = {
+    "query": "Should small teams adopt trunk-based development?",
+    "debaters": ["Mock Skeptic", "Mock Optimist"],
+    "judge": "Mock Judge",
+    "fact_checker": "Mock Fact Checker",
+    "rounds": 2,
+    "cache": False,
+}
+
+
+def test_provider_stream_yields_deltas_then_response():
+    """OpenAIAgent.generate_response_stream yields text deltas and one final AgentResponse."""
+    agent = OpenAIAgent(name="Streamer", model_name="gpt-4o-mini", api_key="sk-test")
+    agent.model = GenericFakeChatModel(messages=iter([AIMessage(content="alpha beta gamma")]))
+
+    items = list(agent.generate_response_stream("What streams?", context=""))
+    deltas = [item for item in items if isinstance(item, str)]
+    final = items[-1]
+
+    print(f"\nDeltas: {deltas}")
+    assert len(deltas) > 1
+    assert isinstance(final, AgentResponse)
+    assert final.content == "".join(deltas) == "alpha beta gamma"
+    assert final.token_usage["total"] > 0
+
+
+def test_orchestrator_emits_deltas_before_responses():
+    """Every agent_response is preceded by that agent's deltas; scoring sees final text only."""
+    events = []
+    stream = StreamingDebateManager(callback=events.append)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        payload = run_synthesis(parse_run_options(DEMO_RUN), executor, stream=stream)
+    assert stream.drain(timeout=5)
+
+    kinds = [e.event_type for e in events]
+    print(f"\nEvents: {kinds}")
+    assert kinds[0] == "round_start"
+    assert kinds[-1] == "synthesis_complete"
+    for event in events:
+        if event.event_type == "agent_response":
+            streamed = "".join(
+                e.content for e in events
+                if e.event_type == "agent_delta"
+                and e.agent_name == event.agent_name
+                and e.round_number == event.round_number
+            )
+            assert streamed == event.content
+    assert payload["final_answer"] == events[-1].content
+
+
+def test_payload_carries_phase_timings():
+    """Records, rounds and the payload all carry monotonic timings."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        payload = run_synthesis(parse_run_options(DEMO_RUN), executor, stream=StreamingDebateManager())
+
+    timings = payload["timings"]
+    print(f"\nTimings: {timings}")
+    for key in ("total_ms", "rounds_ms", "judge_ms", "consensus_ms", "truth_ms", "queue_ms", "provider_ms"):
+        assert timings[key] >= 0.0
+    assert timings["total_ms"] >= timings["rounds_ms"]
+    assert timings["first_token_ms"] is not None
+    for log in payload["rounds"]:
+        assert log["timings"]["wall_ms"] >= 0.0
+        for record in log["responses"]:
+            assert set(record["timings"]) >= {"queue_ms", "provider_ms", "ttft_ms"}
+    assert payload["judge"]["timings"]["provider_ms"] <= timings["judge_ms"]
+
+
+def test_sse_endpoint_delivers_run_complete():
+    """/api/run/stream ends with a run_complete event carrying the /api/run payload."""
+    from server import app
+
+    response = app.test_client().post("/api/run/stream", json=DEMO_RUN)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+
+    events = [
+        json.loads(line[len("data:"):])
+        for line in response.get_data(as_text=True).splitlines()
+        if line.startswith("data:")
+    ]
+    final = events[-1]
+    print(f"\nSSE events received: {len(events)}")
+    assert final["event_type"] == "run_complete"
+    assert final["metadata"]["payload"]["rounds_completed"] >= 1
+    assert any(e["event_type"] == "agent_delta" for e in events)
+
+
+def test_ring_buffer_is_bounded_with_increasing_ids():
+    """Only the newest max_events stay in memory; ids keep increasing."""
+    stream = StreamingDebateManager(max_events=5)
+    for i in range(12):
+        stream.emit_agent_delta(1, "Contributor 1", "debater", f"tok{i} ")
+
+    ids = [event.event_id for event in stream.events]
+    print(f"\nBuffered ids: {ids}")
+    assert ids == [8, 9, 10, 11, 12]
+    assert [e.event_id for e in stream.get_events_since(10)] == [11, 12]
+    assert stream.get_events_since(12) == []
+
+
+def test_spill_to_disk_replays_evicted_events(tmp_path):
+    """With a spill file, get_events_since reaches back past the in-memory window."""
+    spill = tmp_path / "run.jsonl"
+    stream = StreamingDebateManager(max_events=4, spill_path=str(spill))
+    for i in range(300):
+        stream.emit_agent_delta(1, "Contributor 1", "debater", f"tok{i} ")
+
+    replay = stream.get_events_since(150)
+    print(f"\nReplayed {len(replay)} events, first id {replay[0].event_id}")
+    assert [e.event_id for e in replay] == list(range(151, 301))
+    assert replay[0].content == "tok150 "
+    assert len(stream.events) == 4
+
+    # A line still being appended by an emitter is past the snapshot and never parsed.
+    with open(spill, "ab") as handle:
+        handle.write(b'{"event_id": 297, "event_ty')
+    assert [e.event_id for e in stream.get_events_since(290)] == list(range(291, 301))
+    stream.close(remove_spill=True)
+    assert not spill.exists()
+
+
+def test_eviction_spares_live_runs(tmp_path):
+    """Over the tracking cap, only finished runs are evicted; a closed manager drops later emits."""
+    import server
+
+    saved = server.MAX_TRACKED_RUNS, server.STREAM_SPILL_DIR
+    server.MAX_TRACKED_RUNS, server.STREAM_SPILL_DIR = 2, str(tmp_path)
+    try:
+        live = server._register_stream("live-run")
+        watcher = live.subscribe()
+        live.emit_run_start("live-run")
+        for i in range(3):
+            done = server._register_stream(f"done-{i}")
+            done.emit_run_complete({})
+            server._prune_streams()
+        print(f"\nTracked: {list(server.RUN_STREAMS)}")
+        assert "live-run" in server.RUN_STREAMS and not watcher.closed
+        assert len(server.RUN_STREAMS) == 2
+
+        live.emit_run_complete({"final_answer": "Done."})
+        server._register_stream("next-run")
+        assert list(server.RUN_STREAMS) == ["done-2", "next-run"]
+        assert [event.event_type for event in watcher] == ["run_start", "run_complete"]
+    finally:
+        server.MAX_TRACKED_RUNS, server.STREAM_SPILL_DIR = saved
+        for run_id in ("live-run", "next-run"):
+            server.RUN_STREAMS.pop(run_id, None)
+
+    spill = tmp_path / "closed.jsonl"
+    closed = StreamingDebateManager(max_events=1, spill_path=str(spill))
+    closed.emit_round_start(1)
+    closed.close(remove_spill=True)
+    for i in range(3):
+        closed.emit_agent_delta(1, "Contributor 1", "debater", f"tok{i} ")
+    assert not spill.exists() and closed.last_event_id == 1
+
+
+def test_events_are_encoded_once():
+    """The JSON encoding is cached at emit time and round-trips."""
+    stream = StreamingDebateManager()
+    stream.emit_round_start(1)
+    event = stream.events[0]
+    assert event.to_json() is event.to_json()
+    assert StreamEvent.from_json(event.to_json()).to_dict() == event.to_dict()
+
+
+def test_resume_endpoint_returns_missed_events():
+    """/api/run/<id>/events?since=N replays what a dropped client missed."""
+    from server import app
+
+    client = app.test_client()
+    response = client.post("/api/run/stream", json=DEMO_RUN)
+    response.get_data()
+    run_id = response.headers["X-Run-Id"]
+
+    resumed = client.get(f"/api/run/{run_id}/events?since=3").get_json()
+    print(f"\nResumed {len(resumed['events'])} events of {resumed['last_event_id']}")
+    assert resumed["complete"] is True
+    assert resumed["events"][0]["event_id"] == 4
+    assert resumed["events"][-1]["event_type"] == "run_complete"
+    assert client.get("/api/run/unknown/events").status_code == 404
+
+
+def test_slow_subscriber_does_not_block_emit():
+    """A consumer that never reads gets coalesced deltas; emit stays fast and lossless for others."""
+    import time
+
+    stream = StreamingDebateManager()
+    stalled = stream.subscribe(max_queue=8)
+    healthy = stream.subscribe(max_queue=4096)
+
+    started = time.perf_counter()
+    for i in range(1000):
+        stream.emit_agent_delta(1, f"Contributor {i % 2 + 1}", "debater", f"t{i} ")
+    stream.emit_agent_response(1, "Contributor 1", "debater", "done", 0.0, 0.5)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n1001 emits in {elapsed * 1000:.1f} ms; stalled queue={stalled.pending()} "
+          f"coalesced={stalled.coalesced} dropped={stalled.dropped}")
+    assert stalled.pending() <= 8
+    assert stalled.coalesced > 0
+    assert healthy.pending() == 1001
+
+    # Coalesced deltas still add up to every token for each agent, in order.
+    stream.emit_run_error("stop")
+    received = list(stalled)
+    text = "".join(e.content for e in received if e.agent_name == "Contributor 1" and e.event_type == "agent_delta")
+    assert text == "".join(f"t{i} " for i in range(0, 1000, 2))
+    ids = [e.event_id for e in received]
+    assert ids == sorted(ids)
+
+
+def test_watch_endpoint_replays_finished_run():
+    """A second dashboard can attach to a run by id and receive the whole event stream."""
+    from server import app
+
+    client = app.test_client()
+    response = client.post("/api/run/stream", json=DEMO_RUN)
+    first = response.get_data(as_text=True)
+    run_id = response.headers["X-Run-Id"]
+
+    watched = client.get(f"/api/run/{run_id}/stream?since=0").get_data(as_text=True)
+    assert watched == first
+    assert client.get("/api/run/unknown/stream").status_code == 404
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+
+    test_provider_stream_yields_deltas_then_response()
+    test_orchestrator_emits_deltas_before_responses()
+    test_payload_carries_phase_timings()
+    test_sse_endpoint_delivers_run_complete()
+    test_ring_buffer_is_bounded_with_increasing_ids()
+    test_spill_to_disk_replays_evicted_events(pathlib.Path(tempfile.mkdtemp()))
+    test_eviction_spares_live_runs(pathlib.Path(tempfile.mkdtemp()))
+    test_events_are_encoded_once()
+    test_resume_endpoint_returns_missed_events()
+    test_slow_subscriber_does_not_block_emit()
+    test_watch_endpoint_replays_finished_run()
+    print("\n✅ ALL STREAMING TESTS PASSED")
@@ -41,6 +41,29 @@ def test_query_classification():
     print("\n✓ Query classification working\n")
 
 
+def test_classifier_word_boundaries():
+    """Keywords match whole words (with simple inflections), never inside other words."""
+    print("=" * 70)
+    print("TEST 1b: Classifier word boundaries and batches (v3)")
+    print("=" * 70)
+    
+    # "whatever", "copyright" and "showcase" used to match "what", "right" and "cause".
+    assert QueryClassifier.score("Whatever copyright showcase")[QueryType.FACTUAL] == 0
+    assert QueryClassifier.classify("Summarise the copyright showcase") == QueryType.FACTUAL
+    assert max(QueryClassifier.score("Summarise the copyright showcase").values()) == 0
+    assert QueryClassifier.classify("What caused the decline of the Roman Empire?") == QueryType.CAUSAL
+    assert QueryClassifier.classify("How   many moons does Jupiter have?") == QueryType.FACTUAL
+    assert QueryClassifier.score("Ideas we designed for a story")[QueryType.CREATIVE] == 3
+    
+    queries = ["Why do stars twinkle?", "why do  stars twinkle?", "Should AI be regulated?", "Design a bridge"]
+    batch = QueryClassifier.classify_many(queries)
+    print(f"\nBatch: {[t.value for t in batch]}")
+    assert batch == [QueryClassifier.classify(q) for q in queries]
+    assert batch == [QueryType.CAUSAL, QueryType.CAUSAL, QueryType.ETHICAL, QueryType.CREATIVE]
+    
+    print("\n✓ Word-boundary classification working\n")
+
+
 def test_credence_propagation():
     """Test credence update mechanism."""
     print("=" * 70)
@@ -191,6 +214,7 @@ if __name__ == "__main__":
     print("\n")
     
     test_query_classification()
+    test_classifier_word_boundaries()
     test_credence_propagation()
     test_context_pruning()
     test_benchmarking()